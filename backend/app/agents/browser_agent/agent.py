@@ -1,9 +1,10 @@
 from google.adk.agents import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
-from google.adk.models import LlmRequest, LlmResponse, Gemini
+from google.adk.models import LlmRequest, LlmResponse
 from google.genai.types import GenerateContentConfig
 from .tools import browser_use_tool
 from app.config.environment import environment
+from app.agents.shared import build_llm, offload_large_tool_response
 
 def before_model_callback(callback_context: CallbackContext, llm_request: LlmRequest):
     """Injects user_id and session_id into the invocation state for delegation."""
@@ -39,10 +40,7 @@ def after_model_callback(callback_context: CallbackContext, llm_response: LlmRes
     print(f"--- BrowserAgent AFTER Callback END ---")
     return None
 
-llm = Gemini(
-    model_name=environment.AI_AGENT_MODEL,
-    api_key=environment.GOOGLE_API_KEY
-)
+llm = build_llm("browser_agent")
 
 browser_agent = LlmAgent(
     model=llm,
@@ -203,6 +201,7 @@ browser_agent = LlmAgent(
 """
     ),
     tools=[browser_use_tool],
+    after_tool_callback=offload_large_tool_response,
     # before_model_callback=before_model_callback,
     # after_model_callback=after_model_callback,
 ) 
\ No newline at end of file
@@ -13,6 +13,8 @@ from app.features.chat.services.websocket_service import WebSocketService
 from app.features.chat.repositories.websocket_repository import WebSocketRepository as WSRepo
 from google.adk.tools import ToolContext
 from beanie import PydanticObjectId
+from app.infrastructure.turns import BROWSER, on_turn_cancel, get_turn_scheduler
+from app.infrastructure.metrics import instrument_tool
 
 from .helpers.browser_use_helper import (
     get_context_ids,
@@ -80,6 +82,7 @@ async def error_callback_decide_raise() -> bool:
     return False
 
 
+@instrument_tool
 async def browser_use_tool(
     tool_context: ToolContext,
     url: str
@@ -115,62 +118,68 @@ async def browser_use_tool(
 
     browser: Optional[Browser] = None
     context: Optional[BrowserContext] = None
-    try:
-        # Use helper functions
-        run_sensitive_data = get_sensitive_data(url)
-        execution_llm, planner_llm = get_llm_config()
-        task_description = construct_task_description(url)
-
-        # Browser Setup
-        cookie_path = get_cookie_file_path(user_id)
+    unregister_cancel_hook = lambda: None
+    # Chromium is the scarcest resource we have: hold a browser slot from launch through cleanup
+    async with get_turn_scheduler().slot(BROWSER):
+        try:
+            # Use helper functions
+            run_sensitive_data = get_sensitive_data(url)
+            execution_llm, planner_llm = get_llm_config()
+            task_description = construct_task_description(url)
+
+            # Browser Setup
+            cookie_path = get_cookie_file_path(user_id)
         
-        browser_config = BrowserConfig(headless=True)
-        context_config = BrowserContextConfig(cookies_file=cookie_path)
-        browser = Browser(config=browser_config)
-
-        logger.info(f"Tool: Creating browser context with cookie file: {cookie_path}")
-        context = await browser.new_context(config=context_config)
-        logger.info(f"Tool: Browser context created.")
-
-        partial_new_step_callback = functools.partial(
-            new_step_callback_save_screenshot,
-            chat_id=session_id,
-            tool_context=tool_context # use this to send a message to the WebSocket client
-        )
-
-        # Create and run browser-use Agent with callbacks
-        browser_use_agent = BrowserUseAgent(
-            task=task_description,
-            llm=execution_llm,
-            planner_llm=planner_llm,
-            browser_context=context,
-            use_vision_for_planner=False,
-            sensitive_data=run_sensitive_data if run_sensitive_data else None,
-            register_new_step_callback=partial_new_step_callback,
-            register_done_callback=done_callback_log_history,
-            register_external_agent_status_raise_error_callback=error_callback_decide_raise
-        )
-        history = await browser_use_agent.run()
-
-        # Process results - expect a dict from helper now
-        result_dict = extract_result(history)
+            browser_config = BrowserConfig(headless=True)
+            context_config = BrowserContextConfig(cookies_file=cookie_path)
+            browser = Browser(config=browser_config)
+
+            logger.info(f"Tool: Creating browser context with cookie file: {cookie_path}")
+            context = await browser.new_context(config=context_config)
+            logger.info(f"Tool: Browser context created.")
+
+            partial_new_step_callback = functools.partial(
+                new_step_callback_save_screenshot,
+                chat_id=session_id,
+                tool_context=tool_context # use this to send a message to the WebSocket client
+            )
+
+            # Create and run browser-use Agent with callbacks
+            browser_use_agent = BrowserUseAgent(
+                task=task_description,
+                llm=execution_llm,
+                planner_llm=planner_llm,
+                browser_context=context,
+                use_vision_for_planner=False,
+                sensitive_data=run_sensitive_data if run_sensitive_data else None,
+                register_new_step_callback=partial_new_step_callback,
+                register_done_callback=done_callback_log_history,
+                register_external_agent_status_raise_error_callback=error_callback_decide_raise
+            )
+            # If the turn is cancelled, stop the agent between steps as well as interrupting the current await
+            unregister_cancel_hook = on_turn_cancel(browser_use_agent.stop)
+            history = await browser_use_agent.run()
+
+            # Process results - expect a dict from helper now
+            result_dict = extract_result(history)
         
-        # Return the dictionary directly
-        return result_dict
+            # Return the dictionary directly
+            return result_dict
         
-    except Exception as e:
-        logger.error(f"Tool: Unhandled exception during execution: {e}", exc_info=True)
-        # Return error dict directly
-        return {"status": "error", "error_message": f"An unexpected error occurred: {e}"}
-    finally:
-        # Cleanup
-        browser_local = locals().get('browser')
-        context_local = locals().get('context')
+        except Exception as e:
+            logger.error(f"Tool: Unhandled exception during execution: {e}", exc_info=True)
+            # Return error dict directly
+            return {"status": "error", "error_message": f"An unexpected error occurred: {e}"}
+        finally:
+            unregister_cancel_hook()
+            # Cleanup
+            browser_local = locals().get('browser')
+            context_local = locals().get('context')
         
-        if browser_local or context_local:
-            logger.info("Tool: Cleaning up browser resources...")
-            # We might double-close if error happened in try, but cleanup_resources should handle that
-            await cleanup_resources(browser_local, context_local)
-            logger.info(f"Tool: Browser resources cleanup finished.")
-        else:
-             logger.info("Tool: No browser/context resources were initialized, skipping cleanup.")
\ No newline at end of file
+            if browser_local or context_local:
+                logger.info("Tool: Cleaning up browser resources...")
+                # We might double-close if error happened in try, but cleanup_resources should handle that
+                await cleanup_resources(browser_local, context_local)
+                logger.info(f"Tool: Browser resources cleanup finished.")
+            else:
+                 logger.info("Tool: No browser/context resources were initialized, skipping cleanup.")
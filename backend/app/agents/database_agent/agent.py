@@ -1,7 +1,7 @@
 from google.adk.agents import LlmAgent
-from google.adk.models import Gemini
 from app.config.environment import environment
 from .tools import query_sql_database, query_mongodb_database
+from app.agents.shared import fetch_tool_output, build_llm, offload_large_tool_response
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmResponse
 
@@ -14,10 +14,7 @@ def after_model_callback(callback_context: CallbackContext, llm_response: LlmRes
     print(f"--- DatabaseAgent AFTER Callback END ---")
     return None
 
-llm = Gemini(
-    model_name=environment.AI_AGENT_MODEL,
-    api_key=environment.GOOGLE_API_KEY
-)
+llm = build_llm("database_agent")
 
 database_agent = LlmAgent(
     model=llm, 
@@ -57,6 +54,7 @@ database_agent = LlmAgent(
         2.  **Analyze Request & Find Hash:**
             *   Confirm the request is for debug logs.
             *   **First, check the context:** Look in `context.database_agent.query_sql_database` for recent SQL results (especially if the request mentions a booking ID or PNR). If you find a result with a `debug_transaction_id` field, use that value as the `search_hash`.
+            *   If that context entry has a `blob_ref` instead of results, its `preview` may already contain the field; otherwise read it with `fetch_tool_output(blob_ref=...)`.
             *   **If not in context:** Check if the user provided a `search_hash` directly in their request.
             *   **If hash still not found:** Respond to the user asking them to provide the `search_hash` value. Then **STOP**. Do not call any tools in this turn.
         3.  **Generate MongoDB Query Dictionary (if hash is found):**
@@ -81,5 +79,6 @@ database_agent = LlmAgent(
         *   **Input Request:** "Fetch debug logs for search_hash abcdef12345"
         *   **Your Tool Call:** `query_mongodb_database(query_dict={{"transaction_id": "abcdef12345"}})` # Note: Escaped braces, collection not specified
     """,
-    tools=[query_sql_database, query_mongodb_database]
+    tools=[query_sql_database, query_mongodb_database, fetch_tool_output],
+    after_tool_callback=offload_large_tool_response
 ) 
\ No newline at end of file
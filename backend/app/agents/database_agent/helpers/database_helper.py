@@ -1,7 +1,8 @@
 # Helper functions for database agent tools
+import asyncio
 import logging
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.engine import Engine
@@ -12,11 +13,21 @@ from bson import ObjectId
 
 # Assuming these functions correctly retrieve the necessary objects
 from app.infrastructure.database.external import get_external_mongo_db, get_sql_engine
+from app.infrastructure.turns import current_turn, on_turn_cancel
 
 logger = logging.getLogger(__name__) # Use a logger specific to helpers
 
 # --- SQL Execution Helper --- 
 
+def kill_sql_query(sql_engine: Engine, connection_id: int):
+    """Aborts the statement running on another MySQL connection (used when an agent turn is cancelled)."""
+    try:
+        with sql_engine.connect() as connection:
+            connection.execute(text(f"KILL QUERY {int(connection_id)}"))
+        logger.info(f"Helper (SQL): Killed query on connection {connection_id}.")
+    except SQLAlchemyError as e:
+        logger.warning(f"Helper (SQL): Failed to kill query on connection {connection_id}: {e}")
+
 def execute_sql_query_with_engine(sql_engine: Engine, query: str) -> Dict[str, Any]:
     """Executes a read-only SQL query and returns the result as a dictionary."""
     if sql_engine is None:
@@ -27,8 +38,17 @@ def execute_sql_query_with_engine(sql_engine: Engine, query: str) -> Dict[str, A
 
     logger.info(f"Helper (SQL): Attempting to execute query: '{query[:100]}...'")
 
+    unregister_cancel_hook = lambda: None
     try:
         with sql_engine.connect() as connection:
+            if current_turn() is not None:
+                # Called from a cancellable agent turn: let a cancel kill this statement server-side,
+                # since the worker thread itself can't be interrupted
+                connection_id: Optional[int] = connection.execute(text("SELECT CONNECTION_ID()")).scalar()
+                if connection_id is not None:
+                    unregister_cancel_hook = on_turn_cancel(
+                        lambda: asyncio.to_thread(kill_sql_query, sql_engine, connection_id)
+                    )
             result_proxy = connection.execute(text(query))
             results = result_proxy.mappings().all()
             
@@ -59,6 +79,8 @@ def execute_sql_query_with_engine(sql_engine: Engine, query: str) -> Dict[str, A
         logger.error(f"Helper (SQL): Non-SQLAlchemy error during query execution: {e}", exc_info=True)
         # Return dict directly
         return {"status": "error", "message": f"An unexpected error occurred during database query execution."}
+    finally:
+        unregister_cancel_hook()
 
 # --- MongoDB Execution Helpers --- 
 
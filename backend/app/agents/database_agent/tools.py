@@ -13,9 +13,12 @@ from .helpers.database_helper import (
 
 # Import engine factory directly for passing to helper
 from app.infrastructure.database.external import get_sql_engine 
+from app.infrastructure.turns import DB, get_turn_scheduler
+from app.infrastructure.metrics import instrument_tool
 
 logger = logging.getLogger(__name__)
 
+@instrument_tool
 async def query_sql_database(tool_context: ToolContext, query: str) -> Dict[str, Any]:
     """Executes a read-only SQL query string against the company database using SQLAlchemy.
 
@@ -53,7 +56,8 @@ async def query_sql_database(tool_context: ToolContext, query: str) -> Dict[str,
     result_dict: Dict[str, Any]
     try:
         # Helper now returns a dict
-        result_dict = await asyncio.to_thread(execute_sql_query_with_engine, sql_engine, query)
+        async with get_turn_scheduler().slot(DB):
+            result_dict = await asyncio.to_thread(execute_sql_query_with_engine, sql_engine, query)
         # No need to parse JSON anymore
         # result_dict = json.loads(result_str) 
     except json.JSONDecodeError: # Keep this? Maybe helper could raise instead? For now, keep
@@ -69,6 +73,7 @@ async def query_sql_database(tool_context: ToolContext, query: str) -> Dict[str,
 
 # --- New Tool for MongoDB --- 
 
+@instrument_tool
 async def query_mongodb_database(tool_context: ToolContext, query_dict: Dict[str, Any], limit: int = 25) -> Dict[str, Any]:
     """Executes a read-only query against the 'debug_logs' MongoDB collection using PyMongo.
     
@@ -102,7 +107,8 @@ async def query_mongodb_database(tool_context: ToolContext, query_dict: Dict[str
     result_dict: Dict[str, Any]
     try:
         # Helper now returns a dict
-        result_dict = await asyncio.to_thread(execute_mongo_query, query_dict, limit)
+        async with get_turn_scheduler().slot(DB):
+            result_dict = await asyncio.to_thread(execute_mongo_query, query_dict, limit)
         # No need to parse JSON anymore
         # result_dict = json.loads(result_str)
     except json.JSONDecodeError: # Keep this? Maybe helper could raise instead? For now, keep
@@ -2,11 +2,12 @@ from google.adk.agents import LlmAgent
 from google.adk.runners import InvocationContext
 from google.adk.agents.callback_context import CallbackContext
 from google.genai.types import GenerateContentConfig
-from google.adk.models import LlmRequest, LlmResponse, Gemini
+from google.adk.models import LlmRequest, LlmResponse
 
 from app.config.environment import environment
 from app.agents.database_agent.agent import database_agent
 from app.agents.browser_agent.agent import browser_agent
+from app.agents.shared import fetch_tool_output, build_llm, offload_large_tool_response
 
 def before_model_callback(callback_context: InvocationContext, llm_request: LlmRequest):
     """Stores user_id and session_id into the invocation state for delegation."""
@@ -20,10 +21,7 @@ def after_model_callback(callback_context: CallbackContext, llm_response: LlmRes
     print(f"--- JonasAgent AFTER Callback END ---")
     return None
 
-llm = Gemini(
-    model_name=environment.AI_AGENT_MODEL,
-    api_key=environment.GOOGLE_API_KEY
-)
+llm = build_llm("jonas_agent")
 
 jonas_agent = LlmAgent(
     model=llm,
@@ -92,7 +90,8 @@ jonas_agent = LlmAgent(
         ## 5 · Context Usage  
         - Read data via explicit paths (`context.<source_agent>.<tool_name>`).  
         - Do **not** mutate read‑only fields.  
-        - Store large blobs in the artifact service, not in chat.
+        - Large results are stored out of line: such an entry holds `blob_ref`, `size_bytes`, `schema` and a `preview` instead of the data.  
+          Answer from the schema and preview when you can; otherwise call `fetch_tool_output(blob_ref=...)` and page with `next_offset` while `has_more` is true.
 
         ---
 
@@ -112,6 +111,8 @@ jonas_agent = LlmAgent(
 
     """,
 
+    tools=[fetch_tool_output],
+    after_tool_callback=offload_large_tool_response,
     sub_agents=[browser_agent, database_agent],
     # before_model_callback=before_model_callback,
     # after_model_callback=after_model_callback,
@@ -0,0 +1,7 @@
+# agents/shared/__init__.py
+
+from .tools import fetch_tool_output # Tools available to every agent
+from .llm_backends import ReplayLlm, RecordingLlm, build_llm # Model backend selection (LLM_BACKEND)
+from .callbacks import offload_large_tool_response # after_tool_callback keeping large outputs out of sessions
+
+__all__ = ["fetch_tool_output", "ReplayLlm", "RecordingLlm", "build_llm", "offload_large_tool_response"]
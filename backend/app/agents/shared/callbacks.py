@@ -0,0 +1,41 @@
+import logging
+from typing import Any, Dict, Optional
+
+from google.adk.tools import BaseTool, ToolContext
+
+from app.config.environment import environment
+from app.infrastructure.blobs import get_blob_store, is_blob_reference, offload_if_large
+from .tools import fetch_tool_output
+
+logger = logging.getLogger(__name__)
+
+async def offload_large_tool_response(
+    tool: BaseTool,
+    args: Dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any
+) -> Optional[Dict[str, Any]]:
+    """after_tool_callback: swaps a tool response over TOOL_OUTPUT_OFFLOAD_THRESHOLD_BYTES for its blob reference.
+
+    Runs before ADK builds the function_response event, so the raw payload never reaches the persisted
+    session (or the model); the agent reads it back with fetch_tool_output if the preview isn't enough.
+    Returns None to keep the response as is.
+    """
+    if tool.name == fetch_tool_output.__name__ or is_blob_reference(tool_response):
+        return None # Slices of an output that is already stored out of line
+    data = tool_response if isinstance(tool_response, dict) else {"result": tool_response}
+    try:
+        offloaded = await offload_if_large(
+            get_blob_store(),
+            data,
+            threshold_bytes=environment.TOOL_OUTPUT_OFFLOAD_THRESHOLD_BYTES,
+            preview_chars=environment.TOOL_OUTPUT_PREVIEW_CHARS,
+            metadata={"source_agent": tool_context.agent_name, "content_type": tool.name}
+        )
+    except Exception as e:
+        logger.error(f"Failed to offload the '{tool.name}' response; keeping it inline: {e}", exc_info=True)
+        return None
+    if offloaded is data:
+        return None
+    logger.info(f"Offloaded the '{tool.name}' response ({offloaded['size_bytes']} bytes) to {offloaded['blob_ref']}")
+    return offloaded
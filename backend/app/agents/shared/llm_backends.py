@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import AsyncGenerator, Dict, List, Optional
+
+from google.adk.models import BaseLlm, Gemini, LlmRequest, LlmResponse
+from google.genai import types as genai_types
+from pydantic import PrivateAttr
+
+from app.config.environment import environment
+
+logger = logging.getLogger(__name__)
+
+# Fixture format (JSON lines), one model call per line:
+# {"agent": "jonas_agent", "request_key": "<sha256>", "responses": [<LlmResponse JSON>, ...], "gaps": [<seconds>, ...]}
+# `gaps[i]` is the time the real model took before yielding responses[i].
+
+def request_key(llm_request: LlmRequest) -> str:
+    """Identifies a model call by its newest content (the user message or tool result that triggered it)."""
+    if not llm_request.contents:
+        return ""
+    latest = llm_request.contents[-1].model_dump(mode="json", exclude_none=True)
+    return hashlib.sha256(json.dumps(latest, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ReplayLlm(BaseLlm):
+    """
+    Plays back model calls recorded by RecordingLlm, so the agent pipeline (transfers, tool calls,
+    streamed text) runs without Gemini. A call is matched by agent and request_key; calls with no
+    exact match take the agent's recorded calls in order, cycling.
+    Pacing is fixed by default so runs are comparable: first_token_delay before the first response,
+    chunk_delay between streamed chunks (text without recorded chunks is split into chunk_chars
+    pieces when streaming). With recorded_pacing_scale > 0 the recorded gaps are replayed instead,
+    scaled by that factor.
+    """
+    agent_name: str
+    fixture_path: str
+    first_token_delay: float = 0.0
+    chunk_delay: float = 0.0
+    chunk_chars: int = 16
+    recorded_pacing_scale: float = 0.0
+
+    _by_key: Dict[str, List[dict]] = PrivateAttr(default_factory=dict)
+    _in_order: List[dict] = PrivateAttr(default_factory=list)
+    _cursor: int = PrivateAttr(default=0)
+    _loaded: bool = PrivateAttr(default=False)
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"replay"]
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.fixture_path):
+            logger.warning(f"ReplayLlm ({self.agent_name}): fixture {self.fixture_path} not found; every call gets a placeholder reply.")
+            return
+        by_key: Dict[str, List[dict]] = defaultdict(list)
+        with open(self.fixture_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                call = json.loads(line)
+                if call.get("agent") != self.agent_name:
+                    continue
+                by_key[call.get("request_key", "")].append(call)
+                self._in_order.append(call)
+        self._by_key = dict(by_key)
+        logger.info(f"ReplayLlm ({self.agent_name}): loaded {len(self._in_order)} recorded call(s) from {self.fixture_path}")
+
+    def _next_call(self, llm_request: LlmRequest) -> Optional[dict]:
+        self._load()
+        matches = self._by_key.get(request_key(llm_request))
+        if matches:
+            call = matches.pop(0)
+            matches.append(call) # Repeated identical requests (e.g. many load-test users) cycle through the recordings
+            return call
+        if not self._in_order:
+            return None
+        call = self._in_order[self._cursor % len(self._in_order)]
+        self._cursor += 1
+        return call
+
+    def _chunk(self, response: LlmResponse) -> List[LlmResponse]:
+        text = response.content.parts[0].text if response.content and response.content.parts else None
+        if not text or len(response.content.parts) > 1:
+            return [response]
+        pieces = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        partials = [
+            LlmResponse(content=genai_types.Content(role=response.content.role, parts=[genai_types.Part(text=piece)]), partial=True)
+            for piece in pieces
+        ]
+        return partials + [response]
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        call = self._next_call(llm_request)
+        if call is None:
+            yield LlmResponse(content=genai_types.Content(role="model", parts=[genai_types.Part(text=f"[replay] No recorded response for {self.agent_name}.")]))
+            return
+        responses = [LlmResponse.model_validate(response) for response in call["responses"]]
+        if self.recorded_pacing_scale > 0:
+            gaps = call.get("gaps") or [0.0] * len(responses)
+            for response, gap in zip(responses, gaps):
+                await asyncio.sleep(gap * self.recorded_pacing_scale)
+                if stream or not response.partial:
+                    yield response
+            return
+
+        if stream:
+            if not any(response.partial for response in responses):
+                responses = [chunk for response in responses for chunk in self._chunk(response)]
+        else:
+            responses = [response for response in responses if not response.partial]
+
+        await asyncio.sleep(self.first_token_delay)
+        for i, response in enumerate(responses):
+            if i and response.partial:
+                await asyncio.sleep(self.chunk_delay)
+            yield response
+
+
+class RecordingLlm(BaseLlm):
+    """Passes calls through to a real model and appends each call's responses to a fixture for ReplayLlm."""
+    agent_name: str
+    fixture_path: str
+    inner: BaseLlm
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"record"]
+
+    def _append(self, record: dict):
+        os.makedirs(os.path.dirname(self.fixture_path) or ".", exist_ok=True)
+        with open(self.fixture_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        record = {"agent": self.agent_name, "request_key": request_key(llm_request), "responses": [], "gaps": []}
+        last = time.monotonic()
+        try:
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                now = time.monotonic()
+                record["responses"].append(response.model_dump(mode="json", exclude_none=True))
+                record["gaps"].append(round(now - last, 4))
+                last = now
+                yield response
+        finally:
+            if record["responses"]:
+                await asyncio.to_thread(self._append, record)
+
+
+def build_llm(agent_name: str) -> BaseLlm:
+    """The model an agent runs on, per LLM_BACKEND: Gemini, Gemini with recording, or replay of a recording."""
+    if environment.LLM_BACKEND == "replay":
+        return ReplayLlm(
+            model="replay",
+            agent_name=agent_name,
+            fixture_path=environment.LLM_FIXTURE_PATH,
+            first_token_delay=environment.LLM_REPLAY_FIRST_TOKEN_DELAY_SECONDS,
+            chunk_delay=environment.LLM_REPLAY_CHUNK_DELAY_SECONDS,
+            chunk_chars=environment.LLM_REPLAY_CHUNK_CHARS,
+            recorded_pacing_scale=environment.LLM_REPLAY_RECORDED_PACING_SCALE
+        )
+    gemini = Gemini(
+        model_name=environment.AI_AGENT_MODEL,
+        api_key=environment.GOOGLE_API_KEY
+    )
+    if environment.LLM_BACKEND == "record":
+        return RecordingLlm(model="record", agent_name=agent_name, fixture_path=environment.LLM_FIXTURE_PATH, inner=gemini)
+    return gemini
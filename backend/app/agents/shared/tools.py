@@ -0,0 +1,53 @@
+import logging
+from typing import Any, Dict
+
+from google.adk.tools import ToolContext
+
+from app.config.environment import environment
+from app.infrastructure.blobs import get_blob_store
+from app.infrastructure.metrics import instrument_tool
+
+logger = logging.getLogger(__name__)
+
+@instrument_tool
+async def fetch_tool_output(tool_context: ToolContext, blob_ref: str, offset: int = 0) -> Dict[str, Any]:
+    """Reads a large tool output that was stored out of line, one slice at a time.
+
+    Context entries too large to keep inline are replaced by a reference such as
+    {"blob_ref": "sha256:...", "size_bytes": ..., "schema": {...}, "preview": "..."}.
+    Use this tool only when the preview and schema are not enough to answer.
+
+    Args:
+        tool_context: The ADK ToolContext.
+        blob_ref (str): The `blob_ref` value from the context entry.
+        offset (int): Character offset to start reading from (default 0). Use `next_offset` from the previous call to continue.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the status and the requested slice of the JSON text or an error message.
+                         Example success: {"status": "success", "content": "...", "offset": 0, "next_offset": 20000, "total_chars": 54321, "has_more": true}
+                         Example error:   {"status": "error", "message": "..."}
+    """
+    invocation_id = getattr(tool_context, 'invocation_id', 'N/A')
+    logger.info(f"--- Tool: fetch_tool_output called [Inv: {invocation_id}] with blob_ref: '{blob_ref}', offset: {offset} ---")
+
+    if not isinstance(offset, int) or offset < 0:
+        offset = 0
+
+    try:
+        data = await get_blob_store().get(blob_ref)
+    except Exception as e:
+        logger.error(f"Tool: Failed to read blob '{blob_ref}': {e}", exc_info=True)
+        return {"status": "error", "message": "Failed to read the stored tool output."}
+    if data is None:
+        return {"status": "error", "message": f"No stored tool output found for '{blob_ref}'."}
+
+    text = data.decode("utf-8", errors="replace")
+    end = min(offset + environment.TOOL_OUTPUT_FETCH_MAX_CHARS, len(text))
+    return {
+        "status": "success",
+        "content": text[offset:end],
+        "offset": offset,
+        "next_offset": end,
+        "total_chars": len(text),
+        "has_more": end < len(text),
+    }
@@ -14,6 +14,8 @@ from app.features.agent.services import AgentService, ADKService
 from app.features.user.repositories import UserRepository
 from app.features.chat.repositories import ChatRepository, WebSocketRepository, ScreenshotRepository, ContextRepository
 from app.features.agent.repositories import ADKRepository
+# Process-wide registries
+from app.infrastructure.turns import TurnRegistry, get_turn_registry
 
 # --- Import Provider Functions --- #
 from .common import get_redis
@@ -36,7 +38,7 @@ from .services import (
     get_agent_service,
     get_adk_service,
 )
-from .auth import get_current_user, get_current_user_ws
+from .auth import get_current_user, get_current_user_ws, get_current_admin_user
 
 # --- Define Annotated Dependency Types --- #
 # Services
@@ -58,9 +60,13 @@ ScreenshotRepositoryDep = Annotated[ScreenshotRepository, Depends(get_screenshot
 ContextRepositoryDep = Annotated[ContextRepository, Depends(get_context_repository)]
 ADKRepositoryDep = Annotated[ADKRepository, Depends(get_adk_repository)]
 
+# Process-wide registries
+TurnRegistryDep = Annotated[TurnRegistry, Depends(get_turn_registry)]
+
 # User Objects
 UserDep = Annotated[User, Depends(get_current_user)]
 CurrentUserWsDep = Annotated[User, Depends(get_current_user_ws)]
+AdminUserDep = Annotated[User, Depends(get_current_admin_user)]
 
 
 # --- Exports --- #
@@ -91,6 +97,7 @@ __all__ = [
     # Auth Providers (These ARE likely needed externally)
     "get_current_user",
     "get_current_user_ws",
+    "get_current_admin_user",
 
     # Annotated Service Types (These ARE needed externally)
     "AuthServiceDep",
@@ -111,7 +118,11 @@ __all__ = [
     "ContextRepositoryDep",
     "ADKRepositoryDep",
 
+    # Annotated Registry Types
+    "TurnRegistryDep",
+
     # Annotated User Types (These ARE needed externally)
     "UserDep",
     "CurrentUserWsDep",
+    "AdminUserDep",
 ] 
\ No newline at end of file
@@ -4,6 +4,7 @@ from jose import JWTError
 from pydantic import ValidationError
 from typing import TYPE_CHECKING
 
+from app.config.environment import environment
 from app.features.user.models import User
 from app.features.common.exceptions import AppException
 
@@ -35,6 +36,13 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+async def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """Dependency that only lets through users listed in ADMIN_EMAILS."""
+    admin_emails = {email.lower() for email in environment.ADMIN_EMAILS}
+    if not current_user.email or current_user.email.lower() not in admin_emails:
+        raise AppException(message="Admin access required", error_code="FORBIDDEN", status_code=status.HTTP_403_FORBIDDEN)
+    return current_user
+
 # --- WebSocket Authentication Dependency --- 
 async def get_current_user_ws(
     websocket: WebSocket,
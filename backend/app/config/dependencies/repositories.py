@@ -5,23 +5,31 @@ from app.features.chat.repositories import ChatRepository, WebSocketRepository,
 from app.features.chat.repositories import ContextRepository
 from app.features.agent.repositories import ADKRepository
 from app.features.chat.services import ContextService
+from app.infrastructure.caching import get_pubsub_broker
+from app.infrastructure.websockets import get_connection_registry, get_chat_event_log
+from app.infrastructure.adk import get_session_service
+from app.infrastructure.database import get_write_queue
 
 def get_user_repository() -> UserRepository:
     return UserRepository()
 
 def get_chat_repository() -> ChatRepository:
-    return ChatRepository()
+    return ChatRepository(write_queue=get_write_queue())
 
 def get_screenshot_repository() -> ScreenshotRepository:
     return ScreenshotRepository()
 
 def get_websocket_repository() -> WebSocketRepository:
-    return WebSocketRepository()
+    return WebSocketRepository(
+        registry=get_connection_registry(),
+        event_log=get_chat_event_log(),
+        broker=get_pubsub_broker()
+    )
 
 def get_context_repository() -> ContextRepository:
-    return ContextRepository()
+    return ContextRepository(write_queue=get_write_queue())
 
 def get_adk_repository(
     chat_repository: Annotated[ChatRepository, Depends(get_chat_repository)]
 ) -> ADKRepository:
-    return ADKRepository(chat_repository=chat_repository)
+    return ADKRepository(chat_repository=chat_repository, session_service=get_session_service())
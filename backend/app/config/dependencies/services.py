@@ -1,6 +1,8 @@
 from typing import Annotated
 from fastapi import Depends
 from app.infrastructure.caching.redis import get_redis_client
+from app.infrastructure.adk import get_runner_registry
+from app.infrastructure.blobs import get_blob_store
 
 # --- Import Actual Classes needed for type hints & construction --- #
 from app.features.user.services import UserService
@@ -48,7 +50,7 @@ def get_websocket_service(
 def get_context_service(
     context_repository: Annotated[ContextRepository, Depends(get_context_repository)]
 ) -> ContextService:
-    return ContextService(context_repository=context_repository)
+    return ContextService(context_repository=context_repository, blob_store=get_blob_store())
 
 # Providers that depend on repositories AND potentially other services
 # Define dependent services first if possible
@@ -75,7 +77,8 @@ def get_adk_service(
     return ADKService(
         adk_repository=adk_repository,
         chat_service=chat_service,
-        context_service=context_service
+        context_service=context_service,
+        runner_registry=get_runner_registry()
     )
 
 def get_agent_service(
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional, Literal
 
 class Settings(BaseSettings):
     """Application settings."""
@@ -20,10 +20,22 @@ class Settings(BaseSettings):
     AI_AGENT_MODEL: str = "gemini-2.5-pro-preview-03-25"
     BROWSER_EXECUTION_MODEL: str = "gemini-2.0-flash"
     BROWSER_PLANNER_MODEL: str = "gemini-1.5-flash"
+    # Model backend of the ADK agents: "gemini", "record" (Gemini, appending every call to LLM_FIXTURE_PATH)
+    # or "replay" (plays LLM_FIXTURE_PATH back without calling Gemini, e.g. for load tests)
+    LLM_BACKEND: Literal["gemini", "record", "replay"] = "gemini"
+    LLM_FIXTURE_PATH: str = "data/llm_fixtures/recording.jsonl"
+    LLM_REPLAY_FIRST_TOKEN_DELAY_SECONDS: float = 0.0
+    LLM_REPLAY_CHUNK_DELAY_SECONDS: float = 0.0
+    LLM_REPLAY_CHUNK_CHARS: int = 16 # Size of synthesized stream chunks for recordings made without streaming
+    LLM_REPLAY_RECORDED_PACING_SCALE: float = 0.0 # > 0 replays the recorded timings (scaled) instead of the fixed delays
 
     # MongoDB Atlas Settings
     MONGODB_URL: str = "connection_string"
     MONGODB_DB_NAME: str = "DB_NAME"
+    # Agent-turn writes (messages, chat links, context) are queued and written in per-chat batches
+    WRITE_BEHIND_MAX_BATCH_SIZE: int = 500
+    WRITE_BEHIND_MAX_RETRIES: int = 3 # Per batch, for transient errors (network, failover); backoff doubles each time
+    WRITE_BEHIND_RETRY_BACKOFF_SECONDS: float = 0.2
 
     # FH MongoDB Settings (for Database Agent Tool)
     FH_MONGO_URI: str = "mongodb://localhost:27017"
@@ -44,6 +56,45 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
 
+    # WebSocket Settings
+    # "local" only reaches sockets held by this worker, "redis" fans out across workers via pub/sub
+    WEBSOCKET_BROADCAST_BACKEND: Literal["local", "redis"] = "local"
+    WEBSOCKET_CHANNEL_PREFIX: str = "ws:chat:"
+    # Per-connection outbound queue; a full queue applies the overflow policy instead of blocking broadcasts
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 256
+    WEBSOCKET_SEND_QUEUE_OVERFLOW_POLICY: Literal["drop_chunks", "coalesce", "disconnect"] = "coalesce"
+    WEBSOCKET_SEND_TIMEOUT_SECONDS: float = 10.0
+    # Streamed chunks are batched per message and sent once per window or byte threshold; 0 disables batching
+    WEBSOCKET_STREAM_COALESCE_WINDOW_MS: int = 40
+    WEBSOCKET_STREAM_COALESCE_MAX_BYTES: int = 2048
+    # Clients negotiating the MessagePack sub-protocol get large frames zlib-deflated once per broadcast
+    WEBSOCKET_BINARY_COMPRESS_THRESHOLD_BYTES: int = 1024
+    WEBSOCKET_BINARY_COMPRESS_LEVEL: int = 6
+    WEBSOCKET_MAX_INBOUND_BYTES: int = 65536 # Decoded size cap for inbound binary frames (bounds zlib inflation)
+    # Per-chat ring buffer of sequenced broadcasts replayed to clients reconnecting with ?last_seq=
+    WEBSOCKET_EVENT_LOG_SIZE: int = 512
+    WEBSOCKET_EVENT_LOG_MAX_CHATS: int = 1000 # In-memory log only; least recently active chats are evicted
+    WEBSOCKET_EVENT_LOG_TTL_SECONDS: int = 3600 # Redis log only
+    WEBSOCKET_EVENT_LOG_KEY_PREFIX: str = "ws:log:"
+
+    # Blob Store Settings
+    # Content-addressed storage for large tool outputs: "gridfs" (app database) or "local" disk
+    BLOB_STORE_BACKEND: Literal["gridfs", "local"] = "gridfs"
+    BLOB_STORE_GRIDFS_BUCKET: str = "blobs"
+    BLOB_STORE_LOCAL_DIR: str = "data/blobs"
+    # Tool outputs above this size are kept out of context documents and session state
+    TOOL_OUTPUT_OFFLOAD_THRESHOLD_BYTES: int = 16384
+    TOOL_OUTPUT_PREVIEW_CHARS: int = 800
+    TOOL_OUTPUT_FETCH_MAX_CHARS: int = 20000 # Per fetch_tool_output call
+
+    # Tracing Settings
+    # "otlp" sends to a collector (e.g. a local one at the default endpoint), "file" writes JSON spans, "console" prints them
+    TRACING_EXPORTER: Literal["none", "console", "file", "otlp"] = "none"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_FILE_PATH: str = "data/traces/spans.jsonl"
+    TRACING_SERVICE_NAME: str = "jonas-backend"
+    TRACING_SAMPLE_RATIO: float = 1.0 # Share of turns traced
+
     # Security
     # Generate a secure secret key: `openssl rand -hex 32`
     SECRET_KEY: str = "secret_key"
@@ -56,7 +107,36 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Emails allowed to call admin endpoints (e.g. runtime metrics)
+    ADMIN_EMAILS: List[str] = []
+
     # --- Agent Settings --- #
+    # How long a turn keeps running once its chat has no subscribers left; negative never abandons
+    AGENT_TURN_ABANDON_GRACE_SECONDS: float = 30.0
+    # Concurrency caps per kind of agent work; waiting requests are fair-queued across users
+    AGENT_SCHEDULER_LLM_GLOBAL_LIMIT: int = 8
+    AGENT_SCHEDULER_LLM_PER_USER_LIMIT: int = 2
+    AGENT_SCHEDULER_BROWSER_GLOBAL_LIMIT: int = 2
+    AGENT_SCHEDULER_BROWSER_PER_USER_LIMIT: int = 1
+    AGENT_SCHEDULER_DB_GLOBAL_LIMIT: int = 8
+    AGENT_SCHEDULER_DB_PER_USER_LIMIT: int = 2
+    AGENT_SCHEDULER_USER_WEIGHTS: Dict[str, float] = {} # user_id -> share of queued capacity (default 1.0)
+    # History loaded into agent sessions is bounded by (locally estimated) tokens, not message count;
+    # messages that don't fit are folded into a rolling summary stored on the chat
+    AGENT_HISTORY_TOKEN_BUDGET: int = 12000
+    AGENT_HISTORY_MESSAGE_MAX_TOKENS: int = 1500
+    AGENT_HISTORY_SUMMARY_MAX_TOKENS: int = 1000
+    AGENT_HISTORY_MAX_MESSAGES: int = 200 # Most messages considered per sync
+    # Streaming agent messages are checkpointed to Mongo every N seconds or N bytes, whichever comes first (0 disables a trigger)
+    AGENT_STREAM_CHECKPOINT_INTERVAL_SECONDS: float = 2.0
+    AGENT_STREAM_CHECKPOINT_BYTES: int = 2048
+    # Messages still marked streaming this long after their last checkpoint are marked aborted (checked at startup and every sweep interval)
+    AGENT_STREAM_STALE_SECONDS: float = 300.0
+    AGENT_STREAM_SWEEP_INTERVAL_SECONDS: float = 60.0
+    # Live ADK sessions cached per worker; evicted ones are reloaded from Mongo on next use
+    ADK_SESSION_CACHE_MAX_SESSIONS: int = 500
+    ADK_SESSION_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    ADK_SESSION_CACHE_IDLE_TTL_SECONDS: float = 1800.0 # 0 disables idle eviction
 
     # --- Credentials --- #
     TRELLO_USERNAME: Optional[str] = None
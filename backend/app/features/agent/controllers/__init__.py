@@ -0,0 +1,3 @@
+from .agent_controller import router as agent_router
+
+__all__ = ["agent_router"]
@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+
+from ..schemas import AgentMetricsData, GetAgentMetricsResponse, SessionCacheData, GetSessionCacheStatsResponse
+from app.config.dependencies import AdminUserDep, TurnRegistryDep
+from app.infrastructure.adk import get_session_service
+from app.infrastructure.database import get_write_queue
+from app.infrastructure.turns import get_turn_scheduler
+from app.infrastructure.websockets import get_connection_registry
+
+router = APIRouter(
+    prefix="/agent",
+    tags=["Agent"]
+)
+
+@router.get("/admin/metrics", response_model=GetAgentMetricsResponse)
+async def get_agent_metrics(
+    admin_user: AdminUserDep,
+    turn_registry: TurnRegistryDep
+) -> GetAgentMetricsResponse:
+    """Scheduler queues, running turns, socket counts and write-behind backlog for this worker."""
+    return GetAgentMetricsResponse(data=AgentMetricsData(
+        scheduler=get_turn_scheduler().stats(),
+        turns=turn_registry.stats(),
+        connections=get_connection_registry().stats(),
+        writes=get_write_queue().stats()
+    ))
+
+@router.get("/admin/sessions", response_model=GetSessionCacheStatsResponse)
+async def get_session_cache_stats(admin_user: AdminUserDep) -> GetSessionCacheStatsResponse:
+    """Memory footprint of the cached ADK sessions on this worker."""
+    return GetSessionCacheStatsResponse(data=SessionCacheData(**get_session_service().stats()))
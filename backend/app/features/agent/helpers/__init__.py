@@ -0,0 +1,17 @@
+from .history_window import (
+    HistoryWindow,
+    estimate_tokens,
+    truncate_to_tokens,
+    build_history_window,
+    fold_into_summary
+)
+from .stream_checkpoint import StreamCheckpoint
+
+__all__ = [
+    "HistoryWindow",
+    "estimate_tokens",
+    "truncate_to_tokens",
+    "build_history_window",
+    "fold_into_summary",
+    "StreamCheckpoint"
+]
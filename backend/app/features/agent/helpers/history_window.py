@@ -0,0 +1,90 @@
+# Helpers for fitting chat history into the model's context by token count
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from app.features.chat.models import Message
+
+# Gemini tokenizes English prose at roughly 4 characters per token; close enough to budget with
+# locally, without a round-trip to count_tokens for every message.
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4 # Role and turn delimiters
+
+SUMMARY_HEADER = "Summary of the earlier conversation (older messages are not shown):"
+_OMITTED_LINE = "- ..."
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Local token estimate for a piece of text."""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Caps text at about max_tokens, keeping the start and end (reports tend to conclude at the end)."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    marker = f"\n[... {len(text) - max_chars} characters omitted ...]\n"
+    head = max_chars * 3 // 4
+    tail = max_chars - head
+    return text[:head] + marker + text[-tail:]
+
+@dataclass
+class HistoryWindow:
+    """Messages that fit the budget (oldest first, content already capped) and the older ones left out."""
+    messages: List["Message"] = field(default_factory=list)
+    contents: List[str] = field(default_factory=list)
+    folded: List["Message"] = field(default_factory=list)
+    tokens: int = 0
+
+def build_history_window(messages: List["Message"], token_budget: int, message_max_tokens: int) -> HistoryWindow:
+    """
+    Walks messages (oldest first) from newest to oldest, keeping each while the running total
+    fits token_budget. Every message is capped at message_max_tokens first, so one long report
+    can't crowd out the rest. Everything older than the first message that doesn't fit is folded.
+    """
+    window = HistoryWindow()
+    kept = 0
+    for message in reversed(messages):
+        content = truncate_to_tokens(message.content or "", message_max_tokens)
+        tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        if window.tokens + tokens > token_budget and kept:
+            break
+        window.messages.append(message)
+        window.contents.append(content)
+        window.tokens += tokens
+        kept += 1
+    window.messages.reverse()
+    window.contents.reverse()
+    window.folded = messages[:len(messages) - kept]
+    return window
+
+def _summary_line(message: "Message", max_chars: int) -> str:
+    speaker = "Assistant" if message.sender_type == 'agent' else "User"
+    text = " ".join((message.content or "").split())
+    first_sentences = _SENTENCE_END.split(text, maxsplit=2)
+    line = " ".join(first_sentences[:2])
+    if len(line) > max_chars:
+        line = line[:max_chars].rstrip() + "..."
+    return f"- {speaker}: {line}"
+
+def fold_into_summary(previous_summary: Optional[str], messages: List["Message"], max_tokens: int, line_max_chars: int = 240) -> str:
+    """
+    Rolling extractive summary: one line per folded message (its opening sentences) appended to
+    the previous summary; the oldest lines are dropped once the summary exceeds max_tokens.
+    """
+    lines = [line for line in (previous_summary or "").splitlines() if line.startswith("- ")]
+    lines.extend(_summary_line(message, line_max_chars) for message in messages if (message.content or "").strip())
+    if lines and lines[0] == _OMITTED_LINE:
+        lines.pop(0)
+    body_budget = max_tokens - estimate_tokens(SUMMARY_HEADER) - estimate_tokens(_OMITTED_LINE)
+    total = sum(estimate_tokens(line) + 1 for line in lines)
+    dropped = False
+    while lines and total > body_budget:
+        total -= estimate_tokens(lines.pop(0)) + 1
+        dropped = True
+    if dropped:
+        lines.insert(0, _OMITTED_LINE)
+    return "\n".join([SUMMARY_HEADER, *lines])
@@ -0,0 +1,28 @@
+# Decides when a streaming agent message is persisted mid-stream
+import time
+
+class StreamCheckpoint:
+    """
+    Tracks text streamed since the last checkpoint of a message. A checkpoint is due once
+    interval_seconds have passed or min_bytes have accumulated, whichever comes first
+    (0 disables that trigger).
+    """
+    def __init__(self, interval_seconds: float, min_bytes: int):
+        self.interval_seconds = interval_seconds
+        self.min_bytes = min_bytes
+        self._pending_bytes = 0
+        self._last_checkpoint = time.monotonic()
+
+    def add(self, chunk: str) -> bool:
+        """Accounts for a streamed chunk; True if the message should be checkpointed now."""
+        self._pending_bytes += len(chunk.encode("utf-8"))
+        if self._pending_bytes == 0:
+            return False
+        if self.min_bytes > 0 and self._pending_bytes >= self.min_bytes:
+            return True
+        return self.interval_seconds > 0 and time.monotonic() - self._last_checkpoint >= self.interval_seconds
+
+    def mark(self):
+        """Records that everything streamed so far has been checkpointed."""
+        self._pending_bytes = 0
+        self._last_checkpoint = time.monotonic()
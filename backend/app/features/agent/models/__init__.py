@@ -0,0 +1,7 @@
+from .adk_session_model import ADKSessionRecord, ADKEventRecord, ADKSessionVersion
+
+__all__ = [
+    "ADKSessionRecord",
+    "ADKEventRecord",
+    "ADKSessionVersion"
+]
@@ -0,0 +1,40 @@
+from beanie import Document
+from pymongo import IndexModel
+from pydantic import BaseModel, Field
+from typing import Dict, Any
+
+class ADKSessionRecord(Document):
+    """Persisted ADK session: identity, state and the time of its last event. Events live in ADKEventRecord."""
+    app_name: str = Field(...)
+    user_id: str = Field(...)
+    session_id: str = Field(...)
+    state: Dict[str, Any] = Field(default_factory=dict)
+    last_update_time: float = Field(default=0.0)
+
+    class Settings:
+        name = "adk_sessions"
+        indexes = [
+            IndexModel([ ("app_name", 1), ("user_id", 1), ("session_id", 1) ], unique=True)
+        ]
+
+class ADKEventRecord(Document):
+    """One ADK event of a persisted session, stored as the event's JSON so it round-trips exactly."""
+    app_name: str = Field(...)
+    user_id: str = Field(...)
+    session_id: str = Field(...)
+    position: int = Field(...) # Index of the event within the session
+    timestamp: float = Field(...)
+    payload: str = Field(...) # Event.model_dump_json()
+
+    class Settings:
+        name = "adk_events"
+        indexes = [
+            [ ("app_name", 1), ("user_id", 1), ("session_id", 1), ("position", 1) ]
+        ]
+
+class ADKSessionVersion(BaseModel):
+    """Projection used to check whether a cached session is stale without loading its state."""
+    last_update_time: float = 0.0
+
+ADKSessionRecord.model_rebuild()
+ADKEventRecord.model_rebuild()
@@ -2,16 +2,23 @@ import time
 from typing import Optional, Dict, List, Any, TYPE_CHECKING
 from beanie import PydanticObjectId
 from google.adk.events import Event
-from google.adk.sessions import Session, InMemorySessionService # Assuming InMemory for now
+from google.adk.sessions import Session
 from google.genai.types import Content, Part
 import logging
 
+from app.config.environment import environment
+from ..helpers import build_history_window, fold_into_summary
+
 if TYPE_CHECKING:
     from app.features.chat.repositories import ChatRepository
     from app.features.chat.models import Chat, Message # Add Message import
+    from app.infrastructure.adk import MongoSessionService
 
 logger = logging.getLogger(__name__)
 
+# Session state key holding the id of the newest chat Message already represented in the session
+HISTORY_MARK_STATE_KEY = "history_synced_through"
+
 class ADKRepository:
     """
     Handles interactions with the ADK Session Service and history loading/formatting.
@@ -20,6 +27,7 @@ class ADKRepository:
     def __init__(
         self,
         chat_repository: "ChatRepository",
+        session_service: "MongoSessionService",
         app_name: str = "Jonas" # Default app name, can be overridden
     ):
         """
@@ -27,8 +35,8 @@ class ADKRepository:
         """
         # Store ChatRepository directly
         self.chat_repository = chat_repository
-        # Initialize the session service
-        self.session_service = InMemorySessionService()
+        # App-scoped, Mongo-backed session service: sessions outlive connections, restarts and workers
+        self.session_service = session_service
         self.app_name = app_name
         logger.info(f"ADKRepository initialized for app: {self.app_name}")
 
@@ -39,15 +47,13 @@ class ADKRepository:
         initial_state: Optional[Dict[str, Any]] = None
     ) -> Session:
         """
-        Loads history into a session, creating it with the provided initial state if it doesn't exist.
-        Returns the ADK Session object.
+        Loads or creates the chat's session (creating it with the provided initial state), then
+        appends any chat messages the session hasn't seen yet. Returns the ADK Session object.
         """
         session_id = str(chat.id)
         user_id_str = str(user_id)
 
-        session_obj = self.session_service.get_session(
-            app_name=self.app_name, user_id=user_id_str, session_id=session_id
-        )
+        session_obj = await self.session_service.load_session(self.app_name, user_id_str, session_id)
 
         if session_obj is None:
             logger.info(f"Creating new ADK session: user_id={user_id_str}, session_id={session_id}")
@@ -61,19 +67,29 @@ class ADKRepository:
                 session_id=session_id,
                 state=state_to_use # Use the prepared state
             )
-            # Load history only for new sessions *after* creation
-            await self._load_history_into_session(chat.id, session_obj)
         else:
             logger.info(f"Found existing ADK session: user_id={user_id_str}, session_id={session_id}")
-            # TODO: Decide if history/state should be updated on existing sessions
+
+        await self._sync_history_into_session(chat, session_obj)
 
         return session_obj
 
-    def _format_db_messages_to_adk_events(self, messages: List["Message"]) -> List[Event]:
-        """Formats DB Message list to a list of ADK Event objects."""
+    def _format_db_messages_to_adk_events(
+        self,
+        messages: List["Message"],
+        contents: Optional[List[str]] = None,
+        from_first_user_message: bool = True,
+        summary: Optional[str] = None
+    ) -> List[Event]:
+        """
+        Formats DB Message list to a list of ADK Event objects. `contents` overrides each message's
+        text (e.g. capped to a token limit); a `summary` of older messages is put in front.
+        """
         formatted_events: List[Event] = []
         if not messages:
             return formatted_events
+        if contents is None:
+            contents = [msg.content for msg in messages]
         # Find the index of the first user message
         first_user_index = -1
         for i, msg in enumerate(messages):
@@ -81,11 +97,15 @@ class ADKRepository:
                 first_user_index = i
                 break
         # Process messages starting from the first user message, or all if no user message
-        process_from_index = first_user_index if first_user_index != -1 else 0
+        process_from_index = first_user_index if first_user_index != -1 and from_first_user_message else 0
 
-        for msg in messages[process_from_index:]:
+        if summary:
+            summary_timestamp = messages[process_from_index].created_at.timestamp() - 0.001 # Sorts just before the history
+            formatted_events.append(Event(author='user', content=Content(role='user', parts=[Part(text=summary)]), timestamp=summary_timestamp))
+
+        for msg, content in zip(messages[process_from_index:], contents[process_from_index:]):
             role = 'model' if msg.sender_type == 'agent' else 'user'
-            content_text = msg.content if msg.content is not None else ""
+            content_text = content if content is not None else ""
             # Create ADK Content object
             adk_content = Content(role=role, parts=[Part(text=content_text)])
             # Use message creation timestamp for the event
@@ -96,31 +116,90 @@ class ADKRepository:
         logger.debug(f"Formatted {len(formatted_events)} DB messages into ADK events.")
         return formatted_events
 
-    async def _load_history_into_session(
-        self,
-        chat_id: PydanticObjectId,
-        session_obj: Session
-    ):
-        """Loads chat history into the provided ADK session object."""
-        session_id_for_log = str(chat_id)
-        logger.debug(f"Loading history for session: {session_id_for_log}")
-        start_time = time.time()
+    async def _build_history_events(self, chat: "Chat", messages: List["Message"], is_new_session: bool) -> List[Event]:
+        """
+        Token-budgeted history: the newest messages that fit AGENT_HISTORY_TOKEN_BUDGET (each capped
+        at AGENT_HISTORY_MESSAGE_MAX_TOKENS), with older ones folded into the chat's rolling summary.
+        """
+        window = build_history_window(
+            messages,
+            token_budget=environment.AGENT_HISTORY_TOKEN_BUDGET - environment.AGENT_HISTORY_SUMMARY_MAX_TOKENS,
+            message_max_tokens=environment.AGENT_HISTORY_MESSAGE_MAX_TOKENS
+        )
+        if window.folded:
+            summary = await self._update_history_summary(chat, window.folded)
+        else:
+            # Nothing new fell out of the window; a fresh session still needs what fell out before
+            summary = chat.history_summary if is_new_session else None
+        logger.debug(f"History window for chat {chat.id}: {len(window.messages)} messages, ~{window.tokens} tokens, {len(window.folded)} folded")
+        return self._format_db_messages_to_adk_events(
+            window.messages, window.contents, from_first_user_message=is_new_session, summary=summary
+        )
 
-        # Fetch messages directly using injected chat_repository
-        db_messages = await self.chat_repository.find_recent_messages_by_chat_id(
-            chat_id=chat_id
+    async def _update_history_summary(self, chat: "Chat", folded: List["Message"]) -> Optional[str]:
+        """Folds messages not yet covered by the chat's cached summary into it; reuses the cache otherwise."""
+        through = chat.history_summary_through
+        new_messages = [msg for msg in folded if through is None or msg.id > through] # ObjectIds grow over time
+        if not new_messages:
+            return chat.history_summary
+        summary = fold_into_summary(chat.history_summary, new_messages, environment.AGENT_HISTORY_SUMMARY_MAX_TOKENS)
+        await self.chat_repository.update_history_summary(chat, summary, new_messages[-1].id)
+        logger.info(f"Folded {len(new_messages)} messages into the history summary of chat {chat.id}")
+        return summary
+
+    async def _find_unsynced_messages(self, chat: "Chat", session_obj: Session) -> List["Message"]:
+        """
+        The chat's messages newer than the session's high-water mark, oldest first, fetched with one
+        indexed query on chat_id. The newest message is the one this turn answers; the Runner appends it itself.
+        """
+        mark = session_obj.state.get(HISTORY_MARK_STATE_KEY)
+        newest_first = await self.chat_repository.find_messages_after(
+            chat.id,
+            PydanticObjectId(mark) if mark else None,
+            limit=environment.AGENT_HISTORY_MAX_MESSAGES + 1
         )
-        # Format messages using the internal method
-        adk_events = self._format_db_messages_to_adk_events(db_messages)
+        return newest_first[1:][::-1]
+
+    async def _sync_history_into_session(self, chat: "Chat", session_obj: Session):
+        """Appends the chat messages the session hasn't seen yet."""
+        session_id_for_log = str(chat.id)
+        is_new_session = HISTORY_MARK_STATE_KEY not in session_obj.state
+        start_time = time.time()
+        db_messages = await self._find_unsynced_messages(chat, session_obj)
+        if not db_messages:
+            logger.debug(f"History already in sync for session {session_id_for_log}")
+            return
+
+        # A new session starts at the first user message; an existing one takes whatever it missed
+        adk_events = await self._build_history_events(chat, db_messages, is_new_session)
 
         if adk_events:
-            for event in adk_events:
-                self.session_service.append_event(session_obj, event)
-            logger.info(f"Loaded {len(adk_events)} history events into session {session_id_for_log} in {time.time() - start_time:.2f}s")
-        else:
-            logger.info(f"No history events found to load for session {session_id_for_log}")
+            self.session_service.append_events(session_obj, adk_events) # One write for the whole batch
+        self.session_service.update_state(session_obj, {HISTORY_MARK_STATE_KEY: str(db_messages[-1].id)})
+        logger.info(f"Synced {len(adk_events)} history events into session {session_id_for_log} in {time.time() - start_time:.2f}s")
+
+    async def mark_history_synced(self, chat: "Chat", user_id: PydanticObjectId, through: Optional[PydanticObjectId] = None):
+        """
+        Moves the session's high-water mark to `through`, by default the chat's newest message. Called when
+        a turn ends, with the newest message that reached the session as a Runner event; anything newer is
+        synced into the session as history on the next turn.
+        """
+        through = through or chat.last_message_id
+        if through is None:
+            return
+        session_obj = await self.session_service.load_session(self.app_name, str(user_id), str(chat.id))
+        if session_obj is not None:
+            self.session_service.update_state(session_obj, {HISTORY_MARK_STATE_KEY: str(through)})
+
+    async def find_session(self, chat_id: PydanticObjectId, user_id: PydanticObjectId) -> Optional[Session]:
+        """Returns the chat's ADK session (from cache or Mongo), or None if it was never created."""
+        return await self.session_service.load_session(self.app_name, str(user_id), str(chat_id))
+
+    async def flush_session(self, chat_id: PydanticObjectId, user_id: PydanticObjectId):
+        """Waits until every change made to the chat's session so far is stored."""
+        await self.session_service.flush(self.app_name, str(user_id), str(chat_id))
 
-    def get_session_service(self) -> InMemorySessionService:
+    def get_session_service(self) -> "MongoSessionService":
         """Returns the underlying session service instance."""
         return self.session_service
 
@@ -1,3 +1,3 @@
-from .schemas import AgentOutputType, AgentOutputEvent
+from .schemas import AgentOutputType, AgentOutputEvent, AgentMetricsData, GetAgentMetricsResponse, SessionCacheData, GetSessionCacheStatsResponse
 
-__all__ = ["AgentOutputType", "AgentOutputEvent"]
\ No newline at end of file
+__all__ = ["AgentOutputType", "AgentOutputEvent", "AgentMetricsData", "GetAgentMetricsResponse", "SessionCacheData", "GetSessionCacheStatsResponse"]
\ No newline at end of file
@@ -1,7 +1,8 @@
 from enum import Enum
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 from beanie import PydanticObjectId
+from app.features.common.schemas.common_schemas import BaseResponse
 
 class AgentOutputType(str, Enum):
     """Defines the types of output events the AgentService recognizes."""
@@ -27,4 +28,34 @@ class AgentOutputEvent(BaseModel):
 
 class ToolResult(BaseModel):
     """Structured data yielded by ADKService (internal to Agent feature)."""
-    result: str
\ No newline at end of file
+    result: str
+
+# --- API Response Schemas --- #
+
+class AgentMetricsData(BaseModel):
+    """Runtime snapshot of agent capacity on this worker."""
+    scheduler: Dict[str, Dict[str, Any]] # resource -> pool stats (limits, active, queued, waits)
+    turns: Dict[str, Any]
+    connections: Dict[str, Any]
+    writes: Dict[str, Any] # Write-behind queue backlog and batch counters
+
+class GetAgentMetricsResponse(BaseResponse[AgentMetricsData]):
+    """Response schema for the admin agent metrics endpoint."""
+    pass
+
+class SessionCacheData(BaseModel):
+    """Footprint of the ADK session cache on this worker."""
+    sessions: int
+    max_sessions: int
+    total_bytes: int
+    max_bytes: int
+    idle_ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: Dict[str, int] # reason (lru, bytes, idle) -> count
+    sessions_with_pending_writes: int
+    largest: List[Dict[str, Any]] # Biggest cached sessions with their event/state byte counts
+
+class GetSessionCacheStatsResponse(BaseResponse[SessionCacheData]):
+    """Response schema for the admin session cache endpoint."""
+    pass
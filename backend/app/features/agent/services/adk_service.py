@@ -1,14 +1,22 @@
+import asyncio
 import traceback
 from typing import TYPE_CHECKING, Optional, Tuple, Any, AsyncGenerator, Dict
 from beanie import PydanticObjectId
-from google.adk.runners import Runner
 from google.adk.events import Event
 from google.genai import types as genai_types
+from opentelemetry import trace
 import json
 import logging
+import time
 
 # Import the specific agent instance directly
 from app.agents.jonas_agent import jonas_agent
+from app.agents.shared import fetch_tool_output
+from app.config.environment import environment
+from app.features.agent.helpers import StreamCheckpoint
+from app.infrastructure.database.internal.write_behind import WriteBehindError # The package imports the models, which import this feature
+from app.infrastructure.metrics import AGENT_TURN_SECONDS, AGENT_DELEGATIONS_TOTAL, AGENT_DELEGATION_HOPS
+from app.infrastructure.tracing import get_tracer
 
 # Assuming ContextService is in a 'context' feature - CORRECTING this assumption
 from app.features.chat.services import ContextService
@@ -19,6 +27,7 @@ if TYPE_CHECKING:
     from app.features.chat.models import Chat, Message
     from app.features.chat.services import ChatService, WebSocketService
     from app.features.agent.repositories.adk_repository import ADKRepository
+    from app.infrastructure.adk import RunnerRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -31,14 +40,15 @@ class ADKService:
         # Services needed by handlers and state preparation
         chat_service: "ChatService",
         context_service: "ContextService",
+        runner_registry: "RunnerRegistry",
         app_name: str = "Jonas" # Match ADKRepository
     ):
         self.adk_repo = adk_repository
         self.chat_service = chat_service
         self.context_service = context_service
         self.app_name = app_name
-        # Runner is initialized per-request or per-agent in the processing method
-        # self.runner = None # Initialize runner later
+        # Runners are app-scoped and shared across turns; see RunnerRegistry
+        self.runner_registry = runner_registry
         logger.info("ADKService initialized.")
 
     # --- Add State Preparation Method --- #
@@ -55,14 +65,9 @@ class ADKService:
             # Add other base state required by agents if any
         }
 
-        # Fetch and format context items using the injected context_service
-        context_items = await self.context_service.fetch_all_chat_context(chat.id)
-        logger.debug(f"ADKService: Fetched {len(context_items)} context items for chat {chat.id}.")
-        formatted_context_state = {'context': {}}
-        for item in context_items:
-            if item.source_agent not in formatted_context_state['context']:
-                formatted_context_state['context'][item.source_agent] = {}
-            formatted_context_state['context'][item.source_agent][item.content_type] = item.data
+        # Latest value per (source_agent, content_type): one point read of the chat's context snapshot
+        latest_context = await self.context_service.fetch_latest_context(chat.id)
+        formatted_context_state = {'context': latest_context}
 
         # Merge formatted context into the initial state
         initial_state.update(formatted_context_state)
@@ -79,31 +84,37 @@ class ADKService:
         """
         Processes a user message using the jonas_agent via the ADK Runner
         and yields structured events representing the agent's output.
+        Raises WriteBehindError after an otherwise completed turn whose messages could not be persisted.
         """
         agent_message_id: Optional[PydanticObjectId] = None
         accumulated_content = ""
+        stream_finalized = False # Set once the streamed message got its final content
+        checkpoint = StreamCheckpoint(
+            interval_seconds=environment.AGENT_STREAM_CHECKPOINT_INTERVAL_SECONDS,
+            min_bytes=environment.AGENT_STREAM_CHECKPOINT_BYTES
+        )
         session_id = str(chat.id)
         chat_id_obj = chat.id
         user_id_str = str(user_id)
         should_break_loop = False
-
-        # Get session service from repo
-        session_service = self.adk_repo.get_session_service()
-
-        # Initialize Runner for this agent and request
-        runner = Runner(
-            agent=jonas_agent,
-            app_name=self.app_name,
-            session_service=session_service
-        )
-        logger.info(f"ADK Runner initialized for agent '{jonas_agent.name}' in session {session_id}")
+        turn_start = time.perf_counter()
+        turn_outcome = "completed"
+        delegation_hops = 0
+        # The message this turn answers; the Runner has put it in the session once it yields an event
+        turn_message_id = chat.last_message_id
+        runner_started = False
+        # Not made current: this generator yields to its caller mid-span, so event spans name it as parent instead
+        tracer = get_tracer()
+        turn_span = tracer.start_span("adk.turn", attributes={"chat.id": session_id, "agent.name": jonas_agent.name})
+        turn_context = trace.set_span_in_context(turn_span)
+
+        # Reuse the app-scoped Runner for this agent (shares the repo's session service)
+        runner = self.runner_registry.get(jonas_agent, self.app_name)
 
         try:
             # --- Session Management --- #
             # Check if session exists before potentially preparing state
-            session_obj = session_service.get_session(
-                 app_name=self.app_name, user_id=user_id_str, session_id=session_id
-            )
+            session_obj = await self.adk_repo.find_session(chat_id_obj, user_id)
             initial_state_for_creation: Optional[Dict[str, Any]] = None
             if session_obj is None:
                 logger.debug(f"Session {session_id} not found, preparing initial state.")
@@ -126,6 +137,7 @@ class ADKService:
             # --- ADK Runner Event Loop --- 
             logger.info(f"Starting ADK Runner loop for session {session_id}...")
             async for event in runner.run_async(user_id=user_id_str, session_id=session_id, new_message=content):
+                runner_started = True
                 logger.debug(f"ADK Event Received: Type={type(event).__name__}, Author={event.author}, Partial={event.partial}, Final={event.is_final_response()}, Actions={event.actions}, Error={event.error_code}")
 
                 # --- Event Processing Logic --- 
@@ -138,30 +150,45 @@ class ADKService:
 
                 output_event: Optional[AgentOutputEvent] = None
 
-                if event.partial and event.content and event.content.parts and event.content.parts[0].text:
-                    agent_message_id, accumulated_content, output_event = await self._handle_streaming_chunk(
-                        event, chat, session_id, agent_message_id, accumulated_content
-                    )
-                elif event.actions and event.actions.transfer_to_agent:
-                    output_event = await self._handle_delegation_signal(event, chat)
-                elif event.get_function_calls():
-                    # Log tool call requests, but don't yield an event unless needed by UI
-                    self._log_tool_call_request(event)
-                elif function_responses:
-                    logger.debug("Processing tool result via get_function_responses()")
-                    await self._handle_tool_result(event, chat_id_obj)
-                    # TODO: Decide if tool results should yield an AgentOutputEvent
-                elif tool_results_in_delta:
-                    logger.debug("Processing tool result via state_delta['tool_result']")
-                    await self._handle_tool_result_from_delta(tool_results_in_delta, event.author, chat_id_obj)
-                    # TODO: Decide if tool results should yield an AgentOutputEvent
-                elif event.is_final_response():
-                    accumulated_content, should_break_loop, output_event = await self._handle_final_response(
-                        event, chat, session_id, agent_message_id, accumulated_content
-                    )
-                elif event.error_code or event.error_message:
-                    output_event = await self._handle_error_event(event, chat, session_id)
-                    should_break_loop = True # Stop processing on error
+                with tracer.start_as_current_span("adk.event", context=turn_context, attributes={
+                    "adk.author": event.author or "",
+                    "adk.partial": bool(event.partial),
+                    "adk.final": event.is_final_response(),
+                    "adk.transfer_to_agent": event.actions.transfer_to_agent or "",
+                }):
+                    if event.partial and event.content and event.content.parts and event.content.parts[0].text:
+                        if stream_finalized:
+                            # More text after a final response (e.g. the next agent's): the message is streaming again
+                            stream_finalized = False
+                            await self.chat_service.update_message_content(
+                                agent_message_id, accumulated_content, status='streaming', chat_id=chat_id_obj, defer_write=True
+                            )
+                        agent_message_id, accumulated_content, output_event = await self._handle_streaming_chunk(
+                            event, chat, session_id, agent_message_id, accumulated_content, checkpoint
+                        )
+                    elif event.actions and event.actions.transfer_to_agent:
+                        delegation_hops += 1
+                        output_event = await self._handle_delegation_signal(event, chat)
+                    elif event.get_function_calls():
+                        # Log tool call requests, but don't yield an event unless needed by UI
+                        self._log_tool_call_request(event)
+                    elif function_responses:
+                        logger.debug("Processing tool result via get_function_responses()")
+                        await self._handle_tool_result(event, chat_id_obj)
+                        # TODO: Decide if tool results should yield an AgentOutputEvent
+                    elif tool_results_in_delta:
+                        logger.debug("Processing tool result via state_delta['tool_result']")
+                        await self._handle_tool_result_from_delta(tool_results_in_delta, event.author, chat_id_obj)
+                        # TODO: Decide if tool results should yield an AgentOutputEvent
+                    elif event.is_final_response():
+                        accumulated_content, should_break_loop, output_event = await self._handle_final_response(
+                            event, chat, session_id, agent_message_id, accumulated_content
+                        )
+                        stream_finalized = agent_message_id is not None
+                    elif event.error_code or event.error_message:
+                        turn_outcome = "error"
+                        output_event = await self._handle_error_event(event, chat, session_id)
+                        should_break_loop = True # Stop processing on error
 
                 # Yield the processed event if one was generated
                 if output_event:
@@ -174,8 +201,13 @@ class ADKService:
             # --- End ADK Runner Event Loop --- 
             logger.info(f"ADK Runner loop finished for session {session_id}.")
 
+        except asyncio.CancelledError:
+            logger.info(f"ADKService: Turn cancelled for session {session_id}.")
+            turn_outcome = "cancelled"
+            raise
         except Exception as e:
             logger.error(f"ADKService: Error during Runner execution for session {session_id}: {e}", exc_info=True)
+            turn_outcome = "error"
             traceback.print_exc()
             # Yield a final error event
             # Import late (one level up)
@@ -188,6 +220,7 @@ class ADKService:
                      sender_type='agent',
                      content=error_content,
                      message_type='error',
+                     defer_write=True # Behind this turn's other queued writes, so chat order is kept
                  )
                  yield AgentOutputEvent(
                      type=AgentOutputType.ERROR,
@@ -200,8 +233,35 @@ class ADKService:
                      content=error_content
                  )
         finally:
+            AGENT_TURN_SECONDS.labels(agent=jonas_agent.name, outcome=turn_outcome).observe(time.perf_counter() - turn_start)
+            AGENT_DELEGATION_HOPS.labels(agent=jonas_agent.name).observe(delegation_hops)
+            turn_span.set_attributes({"adk.outcome": turn_outcome, "adk.delegation_hops": delegation_hops})
+            if turn_outcome == "error":
+                turn_span.set_status(trace.Status(trace.StatusCode.ERROR))
+            turn_span.end()
+            if agent_message_id and not stream_finalized:
+                # Cancelled or failed mid-stream: keep whatever was streamed so far, marked as cut short
+                await self.chat_service.update_message_content(
+                    agent_message_id, accumulated_content, status='aborted', chat_id=chat_id_obj, defer_write=True
+                )
+            # Messages, chat links and context of this turn were queued write-behind; the turn ends once they land
+            persist_error: Optional[WriteBehindError] = None
+            try:
+                await self.chat_service.flush_writes(chat_id_obj)
+            except WriteBehindError as e:
+                persist_error = e
+                logger.error(f"ADKService: Turn for session {session_id} was not fully persisted: {e}")
+            if turn_outcome == "completed":
+                # Whatever this turn added to the chat is already in the session as Runner events
+                await self.adk_repo.mark_history_synced(chat, user_id)
+            elif runner_started and turn_message_id is not None:
+                # Cut short: what the turn left in the chat (e.g. a partial reply) reaches the session as history next turn
+                await self.adk_repo.mark_history_synced(chat, user_id, through=turn_message_id)
+            # Session writes are issued as events arrive; make sure they landed before the turn ends
+            await self.adk_repo.flush_session(chat_id_obj, user_id)
             logger.debug(f"ADKService turn completed for session {session_id}.")
-            # No specific cleanup needed for InMemorySessionService typically
+            if persist_error is not None and turn_outcome == "completed":
+                raise persist_error # A cancelled or failed turn was already reported as such
 
     async def _handle_streaming_chunk(
         self,
@@ -209,9 +269,10 @@ class ADKService:
         chat: "Chat",
         session_id: str,
         agent_message_id: Optional[PydanticObjectId],
-        accumulated_content: str
+        accumulated_content: str,
+        checkpoint: StreamCheckpoint
     ) -> Tuple[Optional[PydanticObjectId], str, "AgentOutputEvent"]:
-        """Handles a streaming text chunk event, creates/updates DB message, yields chunk event."""
+        """Handles a streaming text chunk event, creates/checkpoints the DB message, yields chunk event."""
         # Import late (one level up)
         from ..schemas import AgentOutputEvent, AgentOutputType # Import from schemas
         chunk = event.content.parts[0].text
@@ -224,8 +285,10 @@ class ADKService:
             agent_msg_model: Optional["Message"] = await self.chat_service._create_and_broadcast_message(
                 chat=chat,
                 sender_type='agent',
-                content="", # Start empty, will be updated by caller later
+                content="", # Start empty; checkpoints fill it in as the stream progresses
                 message_type='text',
+                status='streaming',
+                defer_write=True
             )
             if agent_msg_model:
                 new_agent_message_id = agent_msg_model.id
@@ -250,6 +313,14 @@ class ADKService:
                 content=chunk
             )
 
+        # Checkpoint the partial answer so a crash or disconnect doesn't lose it (atomic $set, queued write-behind).
+        # The status is set too: a stream quiet for longer than the stale cutoff may have been swept as aborted meanwhile
+        if new_agent_message_id and checkpoint.add(chunk):
+            await self.chat_service.update_message_content(
+                new_agent_message_id, accumulated_content, status='streaming', chat_id=chat.id, defer_write=True
+            )
+            checkpoint.mark()
+
         # Note: Broadcasting the chunk via websocket is now handled by the caller (e.g., WebSocketController)
         # based on the yielded AgentOutputEvent.
 
@@ -260,6 +331,7 @@ class ADKService:
         # Import late (one level up)
         from ..schemas import AgentOutputEvent, AgentOutputType # Import from schemas
         delegated_agent = event.actions.transfer_to_agent
+        AGENT_DELEGATIONS_TOTAL.labels(from_agent=event.author, to_agent=delegated_agent).inc()
         logger.info(f"Detected delegation to {delegated_agent} in chat {chat.id}. Creating action message.")
         content = f"Delegating to {delegated_agent}..."
         # Create an action message in the chat log
@@ -268,7 +340,8 @@ class ADKService:
             sender_type='agent',
             content=content,
             message_type='action',
-            tool_name=delegated_agent # Store agent name in tool_name field for actions
+            tool_name=delegated_agent, # Store agent name in tool_name field for actions
+            defer_write=True
         )
         return AgentOutputEvent(
             type=AgentOutputType.DELEGATION,
@@ -293,6 +366,8 @@ class ADKService:
         logger.debug(f"--- Handling Tool Result for Chat {chat_id} (via get_function_responses) ---")
         logger.debug(f"Raw Event Object: {event}")
         for resp in function_responses:
+            if resp.name == fetch_tool_output.__name__:
+                continue # Reads back an output that is already in context; nothing new to save
             logger.debug(f"Processing result for tool '{resp.name}' from '{source_agent}'. Raw Response: {resp.response}")
             await self._save_tool_response_as_context(chat_id, source_agent, resp.name, resp.response)
         logger.debug(f"--- Handling Tool Result Complete for Chat {chat_id} ---")
@@ -357,7 +432,8 @@ class ADKService:
                 chat_id=chat_id,
                 source_agent=source_agent,
                 content_type=tool_name,
-                data=context_data
+                data=context_data,
+                defer_write=True
             )
             logger.debug(f"Context save attempt complete for tool '{tool_name}'.")
         except Exception as e:
@@ -397,6 +473,9 @@ class ADKService:
             # Don't yield a FINAL_MESSAGE event for the DB agent's ignored output
             # If there was a stream (unlikely for DB agent), we still need to signal its end
             if agent_message_id:
+                 await self.chat_service.update_message_content(
+                     agent_message_id, final_content_for_db, status='complete', chat_id=chat.id, defer_write=True
+                 )
                  output_event = AgentOutputEvent(
                      type=AgentOutputType.STREAM_END,
                      message_id=agent_message_id
@@ -413,11 +492,12 @@ class ADKService:
                     content=final_text # Include the final chunk text if any
                 )
                 # Update the full message content in DB
-                if final_content_for_db:
-                    await self.chat_service.update_message_content(agent_message_id, final_content_for_db)
-                    logger.info(f"Updated final content for message {agent_message_id}")
-                else:
+                if not final_content_for_db:
                     logger.warning(f"Final response for streamed message {agent_message_id} had no text content to update.")
+                await self.chat_service.update_message_content(
+                    agent_message_id, final_content_for_db, status='complete', chat_id=chat.id, defer_write=True
+                )
+                logger.info(f"Updated final content for message {agent_message_id}")
 
             elif final_content_for_db: # Final response is the only content (no stream)
                 logger.info(f"Final response is the only content. Creating single message.")
@@ -427,6 +507,7 @@ class ADKService:
                     sender_type='agent',
                     content=final_content_for_db,
                     message_type='text',
+                    defer_write=True
                 )
                 if final_msg:
                      output_event = AgentOutputEvent(
@@ -457,7 +538,8 @@ class ADKService:
             chat=chat,
             sender_type='agent',
             content=error_msg_content,
-            message_type='error'
+            message_type='error',
+            defer_write=True
         )
         return AgentOutputEvent(
             type=AgentOutputType.ERROR,
@@ -1,11 +1,18 @@
 from typing import TYPE_CHECKING, Optional, Dict, Any, AsyncGenerator
 from beanie import PydanticObjectId
+import asyncio
+import functools
 import logging
+import time
 from enum import Enum
 from pydantic import BaseModel
 
 # Import the specific agent instance we want to use for now
 from app.agents.jonas_agent import jonas_agent
+from app.infrastructure.database.internal.write_behind import WriteBehindError # The package imports the models, which import this feature
+from app.infrastructure.turns import LLM, current_turn, get_turn_scheduler
+from app.infrastructure.metrics import AGENT_TIME_TO_FIRST_TOKEN_SECONDS
+from app.infrastructure.tracing import get_tracer
 
 # Import schemas from the new file (one level up)
 from ..schemas import AgentOutputType, AgentOutputEvent
@@ -49,76 +56,120 @@ class AgentService:
 
         # Agent instance check is removed as we use the imported one directly
 
-        # 2. Run the agent turn via ADKService and handle events internally
-        try:
-            # Directly use the imported jonas_agent instance
-            async for event in self.adk_service.run_agent_turn(
-                chat=chat,
-                user_id=user_id,
-                user_content=user_content
-            ):
-                logger.debug(f"AgentService Handling Event: Type={event.type}, MsgId={event.message_id}, Content='{str(event.content)[:50]}...'")
-                # Handle broadcasting based on event type
-                if event.type == AgentOutputType.STREAM_START:
-                    if event.message_id and event.content:
-                         await self.websocket_service.broadcast_message_update(
-                             chat_id=connection_id,
-                             message_id=str(event.message_id),
-                             chunk=event.content,
-                             is_error=False
-                         )
-                elif event.type == AgentOutputType.STREAM_CHUNK:
-                    if event.message_id and event.content:
-                         await self.websocket_service.broadcast_message_update(
-                             chat_id=connection_id,
-                             message_id=str(event.message_id),
-                             chunk=event.content,
-                             is_error=False
-                         )
-                elif event.type == AgentOutputType.STREAM_END:
-                    if event.message_id:
-                         if event.content:
-                             await self.websocket_service.broadcast_message_update(
-                                 chat_id=connection_id,
-                                 message_id=str(event.message_id),
-                                 chunk=event.content,
-                                 is_error=False
-                             )
-                         await self.websocket_service.broadcast_stream_end(
-                             chat_id=connection_id,
-                             message_id=str(event.message_id)
-                         )
-                elif event.type == AgentOutputType.FINAL_MESSAGE:
-                     # Message already created and broadcasted by ChatService via ADKService
-                     logger.debug(f"AgentService: Final message event (ID: {event.message_id}). Broadcast handled.")
-                     pass
-                elif event.type == AgentOutputType.DELEGATION:
-                     # Action message already created and broadcasted by ChatService via ADKService
-                     logger.debug(f"AgentService: Delegation event (MsgID: {event.message_id}). Broadcast handled.")
-                     pass
-                elif event.type == AgentOutputType.ERROR:
-                     # Error message already created and broadcasted by ChatService via ADKService
-                     logger.error(f"AgentService: Error event from ADKService: {event.content}")
-                     # Potentially stop processing further events if needed?
-                     pass
+        # Message currently streaming, so a cancelled turn can still close it out for viewers
+        streaming_message_id: Optional[str] = None
+        # Time to first token as the user sees it: includes waiting for an LLM slot
+        turn_start = time.perf_counter()
+        first_token_seen = False
 
-            logger.info(f"Finished processing message for chat {chat.id} (connection: {connection_id}) with agent '{agent_name}'")
+        # Tool calls in this turn (browser, DB) report their queue positions to the same viewers
+        queue_listener = functools.partial(self.websocket_service.broadcast_queue_position, connection_id)
+        turn = current_turn()
+        if turn is not None:
+            turn.queue_listener = queue_listener
 
-        except Exception as e:
-            logger.exception(f"AgentService: Unhandled error during agent processing for chat {chat.id}: {e}")
-            # How to report this error back to the specific user?
-            # ADKService already tries to create a DB message and yields an ERROR event handled above.
-            # This catches errors within AgentService itself or the loop.
-            # Maybe broadcast a generic error via websocket_service?
+        # 2. Run the agent turn via ADKService and handle events internally
+        with get_tracer().start_as_current_span("agent.process_user_message", attributes={"chat.id": str(chat.id), "agent.name": agent_name}):
             try:
-                 error_text = "An unexpected error occurred in the agent service."
-                 # Use broadcast_message_update for errors, potentially without message_id for general errors
-                 # Or create a dedicated error broadcast method in WebSocketService
-                 await self.websocket_service.broadcast_message_update(
-                     chat_id=connection_id,
-                     message_id=None, # No specific message ID for this general error
-                     chunk=error_text, # Send error text as the chunk
-                     is_error=True
-                 )
-            except Exception as broadcast_err:
-                 logger.error(f"AgentService: Failed to broadcast unhandled exception to {connection_id}: {broadcast_err}")
\ No newline at end of file
+                # Wait for an LLM slot; viewers get QUEUE_POSITION frames while we wait
+                async with get_turn_scheduler().slot(LLM, user_id=str(user_id), on_position=queue_listener):
+                    # Directly use the imported jonas_agent instance
+                    async for event in self.adk_service.run_agent_turn(
+                        chat=chat,
+                        user_id=user_id,
+                        user_content=user_content
+                    ):
+                        logger.debug(f"AgentService Handling Event: Type={event.type}, MsgId={event.message_id}, Content='{str(event.content)[:50]}...'")
+                        if not first_token_seen and event.content and event.type in (AgentOutputType.STREAM_START, AgentOutputType.FINAL_MESSAGE):
+                            first_token_seen = True
+                            AGENT_TIME_TO_FIRST_TOKEN_SECONDS.labels(agent=agent_name).observe(time.perf_counter() - turn_start)
+                        # Handle broadcasting based on event type
+                        if event.type == AgentOutputType.STREAM_START:
+                            if event.message_id:
+                                 streaming_message_id = str(event.message_id)
+                            if event.message_id and event.content:
+                                 await self.websocket_service.broadcast_message_update(
+                                     chat_id=connection_id,
+                                     message_id=str(event.message_id),
+                                     chunk=event.content,
+                                     is_error=False
+                                 )
+                        elif event.type == AgentOutputType.STREAM_CHUNK:
+                            if event.message_id and event.content:
+                                 await self.websocket_service.broadcast_message_update(
+                                     chat_id=connection_id,
+                                     message_id=str(event.message_id),
+                                     chunk=event.content,
+                                     is_error=False
+                                 )
+                        elif event.type == AgentOutputType.STREAM_END:
+                            streaming_message_id = None
+                            if event.message_id:
+                                 if event.content:
+                                     await self.websocket_service.broadcast_message_update(
+                                         chat_id=connection_id,
+                                         message_id=str(event.message_id),
+                                         chunk=event.content,
+                                         is_error=False
+                                     )
+                                 await self.websocket_service.broadcast_stream_end(
+                                     chat_id=connection_id,
+                                     message_id=str(event.message_id)
+                                 )
+                        elif event.type == AgentOutputType.FINAL_MESSAGE:
+                             # Message already created and broadcasted by ChatService via ADKService
+                             logger.debug(f"AgentService: Final message event (ID: {event.message_id}). Broadcast handled.")
+                             pass
+                        elif event.type == AgentOutputType.DELEGATION:
+                             # Action message already created and broadcasted by ChatService via ADKService
+                             logger.debug(f"AgentService: Delegation event (MsgID: {event.message_id}). Broadcast handled.")
+                             pass
+                        elif event.type == AgentOutputType.ERROR:
+                             # Error message already created and broadcasted by ChatService via ADKService
+                             logger.error(f"AgentService: Error event from ADKService: {event.content}")
+                             # Potentially stop processing further events if needed?
+                             pass
+
+                logger.info(f"Finished processing message for chat {chat.id} (connection: {connection_id}) with agent '{agent_name}'")
+
+            except asyncio.CancelledError:
+                turn = current_turn()
+                reason = turn.cancel_reason if turn and turn.cancel_reason else "cancelled"
+                logger.info(f"AgentService: Turn for chat {chat.id} cancelled ({reason}).")
+                if streaming_message_id:
+                    await self.websocket_service.broadcast_stream_end(chat_id=connection_id, message_id=streaming_message_id)
+                await self.websocket_service.broadcast_turn_cancelled(chat_id=connection_id, reason=reason)
+                raise
+            except WriteBehindError as e:
+                # The reply was shown live but some of it never reached the database
+                logger.error(f"AgentService: Turn for chat {chat.id} was not persisted: {e}")
+                try:
+                    await self.websocket_service.broadcast_message_update(
+                        chat_id=connection_id,
+                        message_id=None,
+                        chunk="This reply could not be saved and may be missing after a reload.",
+                        is_error=True
+                    )
+                except Exception as broadcast_err:
+                    logger.error(f"AgentService: Failed to broadcast persistence failure to {connection_id}: {broadcast_err}")
+            except Exception as e:
+                logger.exception(f"AgentService: Unhandled error during agent processing for chat {chat.id}: {e}")
+                # How to report this error back to the specific user?
+                # ADKService already tries to create a DB message and yields an ERROR event handled above.
+                # This catches errors within AgentService itself or the loop.
+                # Maybe broadcast a generic error via websocket_service?
+                try:
+                     error_text = "An unexpected error occurred in the agent service."
+                     # Use broadcast_message_update for errors, potentially without message_id for general errors
+                     # Or create a dedicated error broadcast method in WebSocketService
+                     await self.websocket_service.broadcast_message_update(
+                         chat_id=connection_id,
+                         message_id=None, # No specific message ID for this general error
+                         chunk=error_text, # Send error text as the chunk
+                         is_error=True
+                     )
+                except Exception as broadcast_err:
+                     logger.error(f"AgentService: Failed to broadcast unhandled exception to {connection_id}: {broadcast_err}")
+            finally:
+                # Don't leave chunks waiting on a coalescing window once the turn is over
+                await self.websocket_service.flush_stream_updates()
\ No newline at end of file
@@ -28,7 +28,8 @@ from app.config.dependencies import (
     CurrentUserWsDep,
     WebSocketServiceDep,
     AgentServiceDep,
-    ContextServiceDep
+    ContextServiceDep,
+    TurnRegistryDep
 )
 from app.features.common.schemas.common_schemas import PaginatedResponseData
 from ..models import ContextItem # Import the model for type hinting
@@ -49,6 +50,9 @@ async def websocket_endpoint(
     chat_service: ChatServiceDep,
     websocket_service: WebSocketServiceDep,
     agent_service: AgentServiceDep,
+    turn_registry: TurnRegistryDep,
+    last_seq: Optional[int] = Query(None, ge=0),
+    epoch: Optional[str] = Query(None, max_length=64),
 ):
     """Handles WebSocket connection setup and teardown, delegates processing to WebSocketController."""
     try:
@@ -67,7 +71,10 @@ async def websocket_endpoint(
         websocket_repository=websocket_repository,
         chat_service=chat_service,
         websocket_service=websocket_service,
-        agent_service=agent_service
+        agent_service=agent_service,
+        turn_registry=turn_registry,
+        last_seq=last_seq,
+        epoch=epoch
     )
 
     await controller.handle_connect()
@@ -82,7 +89,7 @@ async def websocket_endpoint(
             except RuntimeError:
                  pass
     finally:
-        controller.handle_disconnect()
+        await controller.handle_disconnect()
 
 # --- REST Endpoints --- #
 
@@ -1,9 +1,10 @@
 from fastapi import WebSocket, WebSocketDisconnect, status
 from beanie import PydanticObjectId
 from pydantic import ValidationError
-from typing import TYPE_CHECKING, Optional
-import traceback
+from typing import TYPE_CHECKING, Any, Optional, Union
+import functools
 import json
+import traceback
 import logging # Add logging
 
 from app.features.chat.schemas.chat_schemas import MessageCreate
@@ -11,9 +12,13 @@ from app.features.user.models import User
 from app.features.chat.models import Chat
 
 from app.features.agent.services import AgentService
+from app.infrastructure.websockets import BroadcastEnvelope, negotiate_protocol, decode_msgpack_frame
+from app.infrastructure.tracing import get_tracer
 
 if TYPE_CHECKING:
     from app.features.chat.repositories import WebSocketRepository
+    from app.infrastructure.websockets import ChatConnection
+    from app.infrastructure.turns import TurnRegistry
     from app.features.chat.services import ChatService, WebSocketService
 
 logger = logging.getLogger(__name__) # Setup logger
@@ -29,6 +34,9 @@ class WebSocketController:
         chat_service: "ChatService",
         websocket_service: "WebSocketService",
         agent_service: "AgentService",
+        turn_registry: "TurnRegistry",
+        last_seq: Optional[int] = None,
+        epoch: Optional[str] = None,
     ):
         self.websocket = websocket
         self.chat_id_obj = chat_id_obj
@@ -38,97 +46,135 @@ class WebSocketController:
         self.websocket_service = websocket_service
         # Store injected AgentService
         self.agent_service = agent_service
+        # Turns run as tracked tasks so this socket keeps reading (e.g. cancel frames) meanwhile
+        self.turn_registry = turn_registry
         self.connection_id: str = str(chat_id_obj)
+        self.connection: Optional["ChatConnection"] = None
+        self.protocol: Optional[str] = None
+        # Last event seq (and the log epoch it belongs to) the client saw before reconnecting, if any
+        self.last_seq = last_seq
+        self.epoch = epoch
         logger.info(f"WebSocketController initialized for chat {self.connection_id}") # Add log
 
     async def handle_connect(self):
-        """Accept connection and register it."""
-        await self.websocket.accept()
-        await self.websocket_repository.connect(self.websocket, self.connection_id)
+        """Accept connection (negotiating the frame encoding) and register it."""
+        self.protocol = negotiate_protocol(self.websocket.scope.get("subprotocols", []))
+        await self.websocket.accept(subprotocol=self.protocol)
+        self.connection = await self.websocket_repository.connect(
+            self.websocket, self.connection_id, str(self.current_user.id), self.protocol, self.last_seq, self.epoch
+        )
+        # Someone is watching again, so a turn waiting to be abandoned carries on
+        self.turn_registry.clear_abandon(self.connection_id)
         logger.info(f"WebSocket connected for user {self.current_user.id} on chat {self.connection_id}") # Add log
 
-    def handle_disconnect(self):
+    async def handle_disconnect(self):
         """Unregister the connection."""
-        self.websocket_repository.disconnect(self.websocket, self.connection_id)
+        if self.connection:
+            await self.websocket_repository.disconnect(self.connection)
+        if self.turn_registry.is_running(self.connection_id) and not self.websocket_repository.get_chat_connections(self.connection_id):
+            self.turn_registry.schedule_abandon(
+                self.connection_id, functools.partial(self.websocket_repository.has_subscribers, self.connection_id)
+            )
         logger.info(f"WebSocket disconnected for user {self.current_user.id} on chat {self.connection_id}") # Add log
 
-    async def _process_message(self, data: str):
-        """Validates input, saves user message, delegates processing to AgentService and handles output events."""
-        message_in: Optional[MessageCreate] = None
-        chat: Optional[Chat] = None
-        
+    def _send_error(self, content: str):
+        """Queues an error frame for this connection only, behind anything already queued."""
+        if self.connection:
+            self.connection.enqueue(BroadcastEnvelope.from_payload({"type": "error", "content": content}))
+
+    async def _receive(self) -> Union[str, bytes]:
+        """Receives the next client frame, text or binary."""
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE), message.get("reason"))
+        if message.get("text") is not None:
+            return message["text"]
+        return message.get("bytes") or b""
+
+    async def _handle_frame(self, data: Union[str, bytes]):
+        """Decodes a client frame and either cancels the running turn or starts a new one. Never waits on the agent."""
         try:
-            # 1. Validate incoming message format
-            message_in = MessageCreate.model_validate_json(data)
-            user_content = message_in.content.strip()
-            logger.debug(f"WS Controller: Received valid message from user {self.current_user.id} for chat {self.chat_id_obj}: '{user_content[:50]}...'")
-
-            # 2. Fetch the Chat object
-            chat = await self.chat_service.chat_repository.find_chat_by_id(
-                self.chat_id_obj
-            )
-            if not chat:
-                # Log and send error back to client
-                logger.error(f"WS Controller: Error - Chat {self.chat_id_obj} not found for user {self.current_user.id}.")
-                await self.websocket.send_text(
-                    json.dumps({"type": "error", "content": f"Chat {self.chat_id_obj} not found."})
-                )
-                return # Stop processing if chat not found
-
-            # 3. Save and broadcast the user's message (No change here)
-            logger.debug(f"WS Controller: Saving user message for chat {chat.id}")
-            await self.chat_service._create_and_broadcast_message(
-                chat=chat,
-                sender_type='user',
-                content=user_content,
-                message_type='text',
-                author_id=self.current_user.id,
-            )
-            
-            # 4. Process input via Agent Service (AgentService now handles broadcasting)
-            logger.info(f"WS Controller: Calling agent_service.process_user_message for chat {chat.id}")
-            await self.agent_service.process_user_message(
-                chat=chat,
-                user_content=user_content,
-                user_id=self.current_user.id,
-                connection_id=self.connection_id
-            )
-            logger.info(f"WS Controller: agent_service.process_user_message completed for chat {chat.id}")
+            payload: Any = decode_msgpack_frame(data) if isinstance(data, bytes) else json.loads(data)
+        except ValueError as e:
+            logger.warning(f"WS Controller: Undecodable frame from {self.current_user.id} on chat {self.chat_id_obj}: {e}")
+            self._send_error(f"Invalid message format: {e}")
+            return
+
+        if isinstance(payload, dict) and payload.get("type") == "cancel":
+            if not self.turn_registry.cancel(self.connection_id, reason="client"):
+                self._send_error("There is no running agent response to cancel.")
+            return
 
+        try:
+            message_in = MessageCreate.model_validate(payload)
         except ValidationError as e:
-            error_content = f"Invalid message format: {e}"
             logger.warning( # Log as warning, it's a client issue
                 f"WS Controller: Invalid message format from {self.current_user.id} on chat {self.chat_id_obj}: {e}"
             )
+            self._send_error(f"Invalid message format: {e}")
+            return
+
+        turn = self.turn_registry.start(
+            self.connection_id, str(self.current_user.id), functools.partial(self._process_message, message_in)
+        )
+        if turn is None:
+            self._send_error("The agent is still answering in this chat. Cancel it or wait for it to finish.")
+
+    async def _process_message(self, message_in: MessageCreate):
+        """Saves the user message and delegates processing to AgentService. Runs as the chat's agent turn."""
+        chat: Optional[Chat] = None
+        
+        with get_tracer().start_as_current_span("ws.process_message", attributes={"chat.id": str(self.chat_id_obj), "user.id": str(self.current_user.id)}):
             try:
-                await self.websocket.send_text(
-                    json.dumps({"type": "error", "content": error_content})
+                user_content = message_in.content.strip()
+                logger.debug(f"WS Controller: Received valid message from user {self.current_user.id} for chat {self.chat_id_obj}: '{user_content[:50]}...'")
+
+                # 1. Fetch the Chat object
+                chat = await self.chat_service.chat_repository.find_chat_by_id(
+                    self.chat_id_obj
                 )
-            except Exception as send_err:
-                logger.error(
-                    f"WS Controller: Failed to send validation error to user {self.current_user.id}: {send_err}"
+                if not chat:
+                    # Log and send error back to client
+                    logger.error(f"WS Controller: Error - Chat {self.chat_id_obj} not found for user {self.current_user.id}.")
+                    self._send_error(f"Chat {self.chat_id_obj} not found.")
+                    return # Stop processing if chat not found
+
+                # 2. Save and broadcast the user's message (No change here)
+                logger.debug(f"WS Controller: Saving user message for chat {chat.id}")
+                await self.chat_service._create_and_broadcast_message(
+                    chat=chat,
+                    sender_type='user',
+                    content=user_content,
+                    message_type='text',
+                    author_id=self.current_user.id,
                 )
+            
+                # 3. Process input via Agent Service (AgentService now handles broadcasting)
+                logger.info(f"WS Controller: Calling agent_service.process_user_message for chat {chat.id}")
+                await self.agent_service.process_user_message(
+                    chat=chat,
+                    user_content=user_content,
+                    user_id=self.current_user.id,
+                    connection_id=self.connection_id
+                )
+                logger.info(f"WS Controller: agent_service.process_user_message completed for chat {chat.id}")
 
-        except Exception as e:
-            error_content = "An internal error occurred processing your message."
-            logger.exception( # Use logger.exception to include traceback
-                f"WS Controller: Unhandled error during message processing for user {self.current_user.id} on chat {self.chat_id_obj}: {e}"
-            )
-            # Attempt to send an error message back via WS
-            try:
+            except Exception as e:
+                error_content = "An internal error occurred processing your message."
+                logger.exception( # Use logger.exception to include traceback
+                    f"WS Controller: Unhandled error during message processing for user {self.current_user.id} on chat {self.chat_id_obj}: {e}"
+                )
                 # We already created/broadcasted error messages from AgentService if possible.
                 # This sends a direct WS message as a fallback.
-                 await self.websocket.send_text(json.dumps({"type": "error", "content": error_content}))
-            except Exception as send_err:
-                 logger.error(f"WS Controller: Failed to send general error to user {self.current_user.id}: {send_err}")
+                self._send_error(error_content)
 
     async def run_message_loop(self):
         """Receive and process messages in a loop."""
         try:
             while True:
-                data = await self.websocket.receive_text()
+                data = await self._receive()
                 logger.debug(f"WS Controller: Raw message received on chat {self.connection_id}") # Log raw receive
-                await self._process_message(data)
+                await self._handle_frame(data)
         except WebSocketDisconnect as e: # Catch disconnect specifically
             # Log the disconnect reason/code
             logger.info(
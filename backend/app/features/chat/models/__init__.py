@@ -2,6 +2,7 @@ from .chat_model import Chat
 from .message_model import Message
 from .screenshot_model import Screenshot
 from .context_item_model import ContextItem
+from .context_snapshot_model import ChatContextSnapshot
 
 # Rebuild models after both are imported to resolve forward references
 Chat.model_rebuild()
@@ -17,5 +18,6 @@ __all__ = [
     "Chat",
     "Message",
     "Screenshot",
-    "ContextItem"
+    "ContextItem",
+    "ChatContextSnapshot"
 ] 
\ No newline at end of file
@@ -1,10 +1,9 @@
-from beanie import Document, Link, PydanticObjectId
+from beanie import Document, PydanticObjectId
 from pydantic import Field
 from datetime import datetime, timezone
-from typing import List, Optional, TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from .message_model import Message
     from app.features.user.models import User
 
 class Chat(Document):
@@ -13,10 +12,14 @@ class Chat(Document):
     subtitle: Optional[str] = Field(default=None)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    messages: List[Link["Message"]] = Field(default_factory=list)
     owner_id: PydanticObjectId = Field(...)
     latest_message_content: Optional[str] = Field(default=None)
     latest_message_timestamp: Optional[datetime] = Field(default=None)
+    # Newest message of any type; messages reference their chat by Message.chat_id
+    last_message_id: Optional[PydanticObjectId] = Field(default=None)
+    # Rolling summary of messages that fell out of the agent's history window, and the newest one it covers
+    history_summary: Optional[str] = Field(default=None)
+    history_summary_through: Optional[PydanticObjectId] = Field(default=None)
 
     class Settings:
         name = "chats"
@@ -31,7 +34,6 @@ class Chat(Document):
                 "subtitle": "A description or last message preview",
                 "created_at": "2023-01-01T12:00:00Z",
                 "updated_at": "2023-01-01T12:00:00Z",
-                "messages": [],
                 "owner_id": "60d5ec49abf8a7b6a0f3e8f1"
             }
         }
\ No newline at end of file
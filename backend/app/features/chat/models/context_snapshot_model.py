@@ -0,0 +1,20 @@
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel
+from datetime import datetime, timezone
+from typing import Dict, Any
+
+class ChatContextSnapshot(Document):
+    """Latest ContextItem data per (source_agent, content_type) of a chat, kept up to date on every save."""
+    chat_id: PydanticObjectId = Field(...)
+    context: Dict[str, Dict[str, Any]] = Field(default_factory=dict) # source_agent -> content_type -> data
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "chat_context_snapshots"
+        indexes = [
+            IndexModel([ ("chat_id", 1) ], unique=True)
+        ]
+
+# Explicitly rebuild model
+ChatContextSnapshot.model_rebuild()
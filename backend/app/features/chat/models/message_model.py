@@ -2,7 +2,7 @@ from beanie import Document, Link, PydanticObjectId
 from pydantic import Field
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Literal, Optional
-from ..schemas import MessageType
+from ..schemas import MessageType, MessageStatus
 
 if TYPE_CHECKING:
     from .chat_model import Chat
@@ -10,16 +10,21 @@ if TYPE_CHECKING:
 
 class Message(Document):
     """Message model for MongoDB using Beanie ODM."""
-    # chat_id: Link["Chat"] # Direct link to Chat document - REMOVED: Chat will link to Messages
+    chat_id: Optional[PydanticObjectId] = Field(default=None) # Owning chat (backfilled by migrations.message_chat_id)
     sender_type: Literal['user', 'agent'] = Field(default='user')
     content: str = Field(...)
     author_id: Optional[PydanticObjectId] = Field(default=None)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     type: MessageType = Field(default='text')
     tool_name: Optional[str] = Field(default=None)
+    status: MessageStatus = Field(default='complete')
+    updated_at: Optional[datetime] = Field(default=None) # Last content update (stream checkpoint or completion)
 
     class Settings:
         name = "messages"
+        indexes = [
+            [ ("chat_id", 1), ("created_at", -1) ] # A chat's messages, newest first
+        ]
 
     class Config:
         # Example for documentation / testing
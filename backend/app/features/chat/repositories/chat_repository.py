@@ -1,19 +1,30 @@
-from typing import List, Optional, Literal
-from beanie import PydanticObjectId, Link
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Literal, Type
+from beanie import Document, PydanticObjectId, UpdateResponse
 from beanie.odm.operators.find.comparison import In
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 # Adjusted imports for repository level
 from ..models import Chat, Message
-from ..schemas import MessageType
+from ..schemas import MessageType, MessageStatus
+
+if TYPE_CHECKING:
+    from app.infrastructure.database import WriteBehindQueue
 
 class ChatRepository:
-    """Handles database operations for Chat and Message models."""
+    """
+    Handles database operations for Chat and Message models.
+    Existing documents are changed with partial updates (update_chat / update_message), never full saves.
+    Writes made with defer_write=True are queued on the chat's write-behind queue and return
+    immediately; flush_writes() waits until they have landed.
+    """
     HISTORY_LIMIT_DEFAULT: int = 40
 
+    def __init__(self, write_queue: "WriteBehindQueue"):
+        self.write_queue = write_queue
+
     async def create_chat(self, name: Optional[str], owner_id: PydanticObjectId, subtitle: Optional[str] = None) -> Chat:
         """Creates and returns a new Chat document."""
-        new_chat = Chat(name=name, owner_id=owner_id, subtitle=subtitle, messages=[])
+        new_chat = Chat(name=name, owner_id=owner_id, subtitle=subtitle)
         await new_chat.create()
         return new_chat
 
@@ -49,9 +60,46 @@ class ChatRepository:
         chats = await query.sort(-Chat.created_at).limit(limit).find(fetch_links=False).to_list()
         return chats
 
-    async def save_chat(self, chat: Chat) -> Chat:
-        """Saves changes to an existing Chat document."""
-        await chat.save()
+    async def update_chat(
+        self,
+        chat_id: PydanticObjectId,
+        set_fields: Dict[str, Any],
+        owner_id: Optional[PydanticObjectId] = None,
+        return_document: bool = False,
+        defer_write: bool = False
+    ) -> Optional[Chat]:
+        """
+        Sets the given fields of a chat in one atomic round trip, optionally only
+        if owner_id owns it. With return_document the updated chat is returned (None if nothing matched).
+        """
+        filter: Dict[str, Any] = {"_id": chat_id}
+        if owner_id is not None:
+            filter["owner_id"] = owner_id
+        return await self._partial_update(
+            Chat, filter, self._set_operator(set_fields), return_document, chat_id, defer_write
+        )
+
+    async def update_message(
+        self,
+        message_id: PydanticObjectId,
+        set_fields: Dict[str, Any],
+        return_document: bool = False,
+        chat_id: Optional[PydanticObjectId] = None,
+        defer_write: bool = False
+    ) -> Optional[Message]:
+        """
+        Sets the given fields of a message in one atomic round trip (queued on
+        chat_id's write-behind queue if deferred). With return_document the updated message is returned.
+        """
+        return await self._partial_update(
+            Message, {"_id": message_id}, self._set_operator(set_fields), return_document, chat_id, defer_write
+        )
+
+    async def update_history_summary(self, chat: Chat, summary: str, through_message_id: PydanticObjectId) -> Chat:
+        """Stores the chat's rolling history summary without rewriting the rest of the document."""
+        chat.history_summary = summary
+        chat.history_summary_through = through_message_id
+        await self.update_chat(chat.id, set_fields={"history_summary": summary, "history_summary_through": through_message_id})
         return chat
 
     async def create_message(
@@ -60,33 +108,42 @@ class ChatRepository:
         content: str,
         author_id: Optional[PydanticObjectId],
         message_type: MessageType = 'text',
-        tool_name: Optional[str] = None
+        tool_name: Optional[str] = None,
+        status: MessageStatus = 'complete',
+        chat_id: Optional[PydanticObjectId] = None,
+        defer_write: bool = False
     ) -> Message:
-        """Creates and returns a new Message document."""
+        """Creates and returns a new Message document of the chat (queued on its write-behind queue if deferred)."""
         new_message = Message(
+            chat_id=chat_id,
             sender_type=sender_type,
             content=content,
             author_id=author_id,
             type=message_type,
-            tool_name=tool_name
+            tool_name=tool_name,
+            status=status
         )
-        await new_message.create()
+        if defer_write:
+            new_message.id = PydanticObjectId() # Callers need the id before the insert lands
+            self.write_queue.insert(self._write_key(chat_id), new_message)
+        else:
+            await new_message.create()
         return new_message
 
-    async def add_message_link_to_chat(self, chat: Chat, message: Message) -> Chat:
-        """Adds a message link to a chat and saves the chat.
+    async def record_message_on_chat(self, chat: Chat, message: Message, defer_write: bool = False) -> Chat:
+        """Points the chat at its newest message with a targeted update (no full document save).
         Conditionally updates latest_message fields based on message type.
         """
-        if chat.messages is None:
-            chat.messages = []
-        chat.messages.append(Link(ref=message, document_class=Message))
+        chat.last_message_id = message.id
         chat.updated_at = datetime.now(timezone.utc)
+        fields: Dict[str, Any] = {"last_message_id": message.id, "updated_at": chat.updated_at}
 
         if message.type in ['text', 'error']:
             chat.latest_message_content = message.content 
             chat.latest_message_timestamp = message.created_at
-            
-        await chat.save()
+            fields.update(latest_message_content=message.content, latest_message_timestamp=message.created_at)
+
+        await self.update_chat(chat.id, set_fields=fields, defer_write=defer_write)
         return chat
         
     async def find_messages_by_ids(
@@ -107,36 +164,115 @@ class ChatRepository:
         messages = await query.sort(-Message.created_at).limit(limit).to_list()
         return messages
 
+    async def find_messages_by_chat_id(
+        self,
+        chat_id: PydanticObjectId,
+        limit: int,
+        before_timestamp: Optional[datetime] = None
+    ) -> List[Message]:
+        """Finds a chat's messages, newest first, paginated by timestamp (one range scan of the chat_id index)."""
+        query = Message.find(Message.chat_id == chat_id)
+
+        if before_timestamp:
+            query = query.find(Message.created_at < before_timestamp)
+
+        return await query.sort(-Message.created_at).limit(limit).to_list()
+
+    async def find_messages_after(
+        self,
+        chat_id: PydanticObjectId,
+        after_message_id: Optional[PydanticObjectId],
+        limit: int
+    ) -> List[Message]:
+        """Finds the chat's newest messages after the given one (or overall if None), newest first."""
+        query = Message.find(Message.chat_id == chat_id)
+
+        if after_message_id is not None:
+            # The id's timestamp bounds the index range (a second back, for clock and rounding slack);
+            # the id itself excludes what is left at or before it. ObjectIds grow over time.
+            lower_bound = after_message_id.generation_time - timedelta(seconds=1)
+            query = query.find(Message.created_at >= lower_bound, Message.id > after_message_id)
+
+        return await query.sort(-Message.created_at).limit(limit).to_list()
+
     async def find_recent_messages_by_chat_id(
         self,
         chat_id: PydanticObjectId,
         history_limit: int = HISTORY_LIMIT_DEFAULT
     ) -> List[Message]:
-        """Finds the most recent messages linked to a specific chat ID."""
-        chat = await Chat.get(chat_id, fetch_links=False)
-        if not chat or not chat.messages:
-            return []
+        """Finds the most recent messages of a specific chat ID, oldest first (for LLM history)."""
+        messages = await self.find_messages_by_chat_id(chat_id, limit=history_limit)
+        return messages[::-1]
 
-        # Extract message IDs from the chat's message links
-        message_ids = [link.to_ref().id for link in chat.messages]
-        if not message_ids:
-            return []
+    async def update_message_content(
+        self,
+        message_id: PydanticObjectId,
+        new_content: str,
+        status: Optional[MessageStatus] = None,
+        chat_id: Optional[PydanticObjectId] = None,
+        defer_write: bool = False
+    ) -> Optional[Message]:
+        """
+        Atomically sets the content (and status, if given) of a message by its ID.
+        Deferred updates return None without reading the message.
+        """
+        fields: Dict[str, Any] = {"content": new_content, "updated_at": datetime.now(timezone.utc)}
+        if status is not None:
+            fields["status"] = status
+        return await self.update_message(
+            message_id, set_fields=fields, return_document=not defer_write, chat_id=chat_id, defer_write=defer_write
+        )
 
-        # Find the messages by these IDs, sort by creation date descending, and limit
-        messages = await Message.find(In(Message.id, message_ids)) \
-                                .sort(-Message.created_at) \
-                                .limit(history_limit) \
-                                .to_list()
-                                
-        # Reverse the list to get chronological order (oldest first) for LLM history
-        return messages[::-1]
+    async def abort_stale_streaming_messages(self, stale_before: datetime) -> int:
+        """
+        Marks messages still 'streaming' with no checkpoint since stale_before as 'aborted' (their turn died
+        with the process). They keep their last checkpointed content. Returns how many were marked.
+        """
+        result = await Message.get_motor_collection().update_many(
+            {
+                "status": "streaming",
+                "$or": [
+                    {"updated_at": {"$lt": stale_before}},
+                    {"updated_at": None, "created_at": {"$lt": stale_before}},
+                ],
+            },
+            {"$set": {"status": "aborted"}}
+        )
+        return result.modified_count
+
+    @staticmethod
+    def _set_operator(set_fields: Dict[str, Any]) -> Dict[str, Any]:
+        if not set_fields:
+            raise ValueError("A partial update needs at least one field to $set.")
+        return {"$set": set_fields}
+
+    async def _partial_update(
+        self,
+        document_class: Type[Document],
+        filter: Dict[str, Any],
+        update: Dict[str, Any],
+        return_document: bool,
+        chat_id: Optional[PydanticObjectId],
+        defer_write: bool
+    ) -> Optional[Document]:
+        """One update command: queued write-behind, find_one_and_update (return_document), or update_one."""
+        if defer_write:
+            if return_document:
+                raise ValueError("Deferred updates cannot return the updated document.")
+            self.write_queue.update(self._write_key(chat_id), document_class, filter, update)
+            return None
+        if return_document:
+            return await document_class.find_one(filter).update(update, response_type=UpdateResponse.NEW_DOCUMENT)
+        await document_class.get_motor_collection().update_one(filter, update)
+        return None
+
+    async def flush_writes(self, chat_id: PydanticObjectId):
+        """Waits until every deferred write queued for the chat has landed."""
+        await self.write_queue.flush(str(chat_id))
 
-    async def update_message_content(self, message_id: PydanticObjectId, new_content: str) -> Optional[Message]:
-        """Updates the content of a specific message by its ID."""
-        message = await Message.get(message_id)
-        if message:
-            message.content = new_content
-            # We could update an `updated_at` field here if Message model had one
-            await message.save()
-            return message
-        return None 
\ No newline at end of file
+    @staticmethod
+    def _write_key(chat_id: Optional[PydanticObjectId]) -> str:
+        # One queue per chat keeps a message's insert ahead of its later updates
+        if chat_id is None:
+            raise ValueError("Deferred writes need the chat they belong to.")
+        return str(chat_id)
@@ -1,14 +1,25 @@
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from beanie import PydanticObjectId
 from app.features.chat.models.context_item_model import ContextItem
-from datetime import datetime
+from app.features.chat.models.context_snapshot_model import ChatContextSnapshot
+from datetime import datetime, timezone
+
+if TYPE_CHECKING:
+    from app.infrastructure.database import WriteBehindQueue
 
 class ContextRepository:
     """Handles database operations for the ContextItem model."""
+    def __init__(self, write_queue: "WriteBehindQueue"):
+        # Shared with ChatRepository, so one flush per chat covers both
+        self.write_queue = write_queue
 
-    async def add_context_item(self, item: ContextItem) -> ContextItem:
-        """Saves a new ContextItem document."""
-        await item.insert()
+    async def add_context_item(self, item: ContextItem, defer_write: bool = False) -> ContextItem:
+        """Saves a new ContextItem document (queued on the chat's write-behind queue if deferred)."""
+        if defer_write:
+            item.id = PydanticObjectId()
+            self.write_queue.insert(str(item.chat_id), item)
+        else:
+            await item.insert()
         return item
 
     async def get_context_for_chat(
@@ -29,4 +40,31 @@ class ContextRepository:
         # Sort ascending to easily get the latest if keys collide when building state
         return await ContextItem.find(ContextItem.chat_id == chat_id) \
                               .sort(+ContextItem.created_at) \
-                              .to_list() 
\ No newline at end of file
+                              .to_list()
+
+    async def upsert_snapshot_entry(
+        self,
+        chat_id: PydanticObjectId,
+        source_agent: str,
+        content_type: str,
+        data: Dict[str, Any],
+        defer_write: bool = False
+    ):
+        """Sets one (source_agent, content_type) entry of the chat's context snapshot, creating the snapshot if needed."""
+        update = {"$set": {f"context.{source_agent}.{content_type}": data, "updated_at": datetime.now(timezone.utc)}}
+        if defer_write:
+            self.write_queue.update(str(chat_id), ChatContextSnapshot, {"chat_id": chat_id}, update, upsert=True)
+        else:
+            await ChatContextSnapshot.get_motor_collection().update_one({"chat_id": chat_id}, update, upsert=True)
+
+    async def create_snapshot_if_missing(self, chat_id: PydanticObjectId, context: Dict[str, Dict[str, Any]]):
+        """Backfills a chat's snapshot; never overwrites one a concurrent save created in the meantime."""
+        await ChatContextSnapshot.get_motor_collection().update_one(
+            {"chat_id": chat_id},
+            {"$setOnInsert": {"context": context, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    async def get_snapshot(self, chat_id: PydanticObjectId) -> Optional[ChatContextSnapshot]:
+        """Point read of the chat's context snapshot."""
+        return await ChatContextSnapshot.find_one(ChatContextSnapshot.chat_id == chat_id)
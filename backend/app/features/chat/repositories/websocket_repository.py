@@ -1,50 +1,104 @@
 from fastapi import WebSocket
-from typing import Dict, List
-import json
+from typing import List, Optional, TYPE_CHECKING
 import logging
+import time
+
+from app.infrastructure.websockets import BroadcastEnvelope
+from app.infrastructure.metrics import WEBSOCKET_BROADCAST_SECONDS
+from app.infrastructure.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from app.infrastructure.caching import RedisPubSubBroker
+    from app.infrastructure.websockets import ConnectionRegistry, ChatConnection, ChatEventLog
 
 # Renamed class
 class WebSocketRepository:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    """
+    Routes chat broadcasts to live connections.
+    Connection state lives in the process-wide ConnectionRegistry, so any instance of this
+    repository (e.g. one built per request) reaches the same sockets.
+    """
+    def __init__(
+        self,
+        registry: "ConnectionRegistry",
+        event_log: "ChatEventLog",
+        broker: Optional["RedisPubSubBroker"] = None
+    ):
+        self.registry = registry
+        # Every chat broadcast is sequenced here so reconnecting clients can replay what they missed
+        self.event_log = event_log
+        # When a broker is set, broadcasts go through Redis so every worker relays them to its own sockets
+        self.broker = broker
         self.logger = logging.getLogger(__name__)
 
-    async def connect(self, websocket: WebSocket, chat_id: str):
-        if chat_id not in self.active_connections:
-            self.active_connections[chat_id] = []
-        self.active_connections[chat_id].append(websocket)
-        print(f"WebSocket connected to chat {chat_id}. Total: {len(self.active_connections[chat_id])}")
-
-    def disconnect(self, websocket: WebSocket, chat_id: str):
-        if chat_id in self.active_connections:
-            if websocket in self.active_connections[chat_id]:
-                self.active_connections[chat_id].remove(websocket)
-                print(f"WebSocket disconnected from chat {chat_id}. Remaining: {len(self.active_connections[chat_id])}")
-                if not self.active_connections[chat_id]:
-                    del self.active_connections[chat_id]
-            else:
-                 print(f"WS disconnect: Socket already removed from chat {chat_id}.")
-        else:
-             print(f"WS disconnect: Chat room {chat_id} not found.")
-
-    async def broadcast_to_chat(self, message: str, chat_id: str):
-        self.logger.info(f"[WebSocketRepository] Attempting to broadcast to chat_id: {chat_id}. Message type: {json.loads(message).get('type', 'N/A')}")
-        print(f"Broadcasting to chat {chat_id}: {message[:50]}...")
-        if chat_id in self.active_connections and self.active_connections[chat_id]:
-            print(f"Broadcasting to chat {chat_id}: {message[:50]}...")
-            self.logger.info(f"[WebSocketRepository] Found {len(self.active_connections[chat_id])} active connection(s) for chat_id: {chat_id}")
-            # print(f"Broadcasting to chat {chat_id}: {message[:50]}...") # Log truncated message (already have a more detailed one)
-            connections = self.active_connections[chat_id][:]
-            disconnected_sockets = []
-            for connection in connections:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    print(f"Error sending to websocket in chat {chat_id}: {e}. Disconnecting.")
-                    disconnected_sockets.append(connection)
-            
-            # Use self.disconnect to ensure proper cleanup and logging
-            for sock in disconnected_sockets:
-                self.disconnect(sock, chat_id) # Call the disconnect method
+    def _channel_for_chat(self, chat_id: str) -> str:
+        return f"{self.registry.channel_prefix}{chat_id}"
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        chat_id: str,
+        user_id: str,
+        protocol: Optional[str] = None,
+        last_seq: Optional[int] = None,
+        epoch: Optional[str] = None
+    ) -> "ChatConnection":
+        """
+        Registers the socket. With last_seq, the frames it missed are sent before any live ones
+        (or RESYNC_REQUIRED, if they are gone or the client's epoch is not the log's current one).
+        """
+        connection = self.registry.register(websocket, chat_id, user_id, protocol, start=last_seq is None)
+        if self.broker and self.registry.count_for_chat(chat_id) == 1:
+            await self.broker.subscribe(self._channel_for_chat(chat_id), self.registry.relay_channel_message)
+        if last_seq is not None:
+            try:
+                await self._replay(connection, last_seq, epoch)
+            finally:
+                connection.start()
+        return connection
+
+    async def _replay(self, connection: "ChatConnection", last_seq: int, epoch: Optional[str] = None):
+        # Registered (and subscribed) first, so anything broadcast while we read the log is already queued live
+        missed = await self.event_log.read_since(connection.chat_id, last_seq, epoch)
+        if missed is None:
+            current_seq, current_epoch = await self.event_log.position(connection.chat_id)
+            self.logger.info(f"WS replay: Chat {connection.chat_id} can't replay from seq {last_seq} of epoch {epoch} (now {current_seq} of {current_epoch}). Asking client to resync.")
+            missed = [BroadcastEnvelope.resync_required(current_seq, current_epoch)]
         else:
-            self.logger.warning(f"[WebSocketRepository] No active connections found for chat_id: {chat_id}. Cannot broadcast message.") 
\ No newline at end of file
+            self.logger.debug(f"WS replay: Sending {len(missed)} missed frame(s) to {connection.connection_id} on chat {connection.chat_id}.")
+        connection.replay(missed)
+
+    async def disconnect(self, connection: "ChatConnection"):
+        if not self.registry.unregister(connection):
+            self.logger.debug(f"WS disconnect: Connection {connection.connection_id} already removed from chat {connection.chat_id}.")
+        # A failed send may already have unregistered the socket, so check the room either way
+        if self.broker and self.registry.count_for_chat(connection.chat_id) == 0:
+            await self.broker.unsubscribe(self._channel_for_chat(connection.chat_id), self.registry.relay_channel_message)
+
+    async def has_subscribers(self, chat_id: str) -> bool:
+        """Whether anyone, on this worker or (with a broker) any other, is still watching the chat."""
+        if self.registry.count_for_chat(chat_id):
+            return True
+        if self.broker:
+            return await self.broker.subscriber_count(self._channel_for_chat(chat_id)) > 0
+        return False
+
+    def get_chat_connections(self, chat_id: str) -> List["ChatConnection"]:
+        """Returns this worker's connections for a chat."""
+        return self.registry.connections_for_chat(chat_id)
+
+    def get_user_connections(self, user_id: str) -> List["ChatConnection"]:
+        """Returns this worker's connections for a user, across chats."""
+        return self.registry.connections_for_user(user_id)
+
+    async def broadcast_to_chat(self, envelope: "BroadcastEnvelope", chat_id: str):
+        """Sequences an envelope and queues it for every viewer of the chat. Never waits on a client's socket."""
+        self.logger.debug(f"[WebSocketRepository] Broadcasting {envelope.type} to chat_id: {chat_id}")
+        start_time = time.perf_counter()
+        with get_tracer().start_as_current_span("ws.broadcast", attributes={"chat.id": chat_id, "ws.frame_type": envelope.type or ""}):
+            if self.broker:
+                # The log publishes atomically with sequencing; our own subscription delivers to local sockets like any other worker
+                await self.event_log.append(chat_id, envelope, channel=self._channel_for_chat(chat_id))
+            else:
+                self.registry.enqueue_to_chat(chat_id, await self.event_log.append(chat_id, envelope))
+        WEBSOCKET_BROADCAST_SECONDS.labels(type=envelope.type or "unknown").observe(time.perf_counter() - start_time)
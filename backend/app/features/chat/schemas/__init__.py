@@ -14,6 +14,7 @@ from .chat_schemas import (
     GetChatScreenshotsResponse,
     ChatUpdate,
     MessageType,
+    MessageStatus,
     ScreenshotData,
     GetChatContextResponse,
     ContextItemData,
@@ -35,6 +36,7 @@ __all__ = [
     "GetChatScreenshotsResponse",
     "ChatUpdate",
     "MessageType",
+    "MessageStatus",
     "ScreenshotData",
     "GetChatContextResponse",
     "ContextItemData",
@@ -7,6 +7,8 @@ from app.features.common.schemas.common_schemas import BaseResponse, PaginatedRe
 
 # --- Type Alias for Message Types ---
 MessageType = Literal['text', 'thinking', 'tool_use', 'error', 'action']
+# Streamed agent messages stay 'streaming' (content checkpointed as it arrives) until completed or aborted
+MessageStatus = Literal['streaming', 'complete', 'aborted']
 
 # --- Core Data Models --- 
 
@@ -19,6 +21,7 @@ class MessageData(BaseModel):
     created_at: datetime
     type: MessageType = 'text'
     tool_name: Optional[str] = None
+    status: MessageStatus = 'complete'
 
     model_config = {
         "from_attributes": True,
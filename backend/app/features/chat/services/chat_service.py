@@ -1,15 +1,20 @@
-from typing import List, Optional, TYPE_CHECKING, Literal
+from typing import Any, Dict, List, Optional, TYPE_CHECKING, Literal
 from beanie import PydanticObjectId, Link
 from datetime import datetime, timezone
+import logging
 
 from ..models import Chat, Message, Screenshot
-from ..schemas import MessageCreate, ChatCreate, ChatUpdate, MessageData, ChatData, MessageType, ScreenshotData
+from ..schemas import MessageCreate, ChatCreate, ChatUpdate, MessageData, ChatData, MessageType, MessageStatus, ScreenshotData
 from app.features.common.schemas.common_schemas import PaginatedResponseData
 from app.features.common.exceptions import AppException
+from app.infrastructure.websockets import BroadcastEnvelope
 
 if TYPE_CHECKING:
     from app.config.dependencies import ChatRepositoryDep, WebSocketRepositoryDep, ScreenshotRepositoryDep
     from app.features.chat.repositories import ChatRepository, WebSocketRepository, ScreenshotRepository
+
+logger = logging.getLogger(__name__)
+
 class ChatService:
     """Service layer for chat operations, uses ChatRepository."""
     def __init__(self,
@@ -36,9 +41,11 @@ class ChatService:
         content: str,
         message_type: MessageType = 'text',
         tool_name: Optional[str] = None,
-        author_id: Optional[PydanticObjectId] = None
+        author_id: Optional[PydanticObjectId] = None,
+        status: MessageStatus = 'complete',
+        defer_write: bool = False
     ) -> Optional[Message]:
-        """Internal helper: Creates message, saves (conditionally), broadcasts."""
+        """Internal helper: Creates message, saves (conditionally; queued write-behind if deferred), broadcasts."""
         
         save_to_db = message_type in ['text', 'error', 'tool_use', 'action']
         new_message_model: Optional[Message] = None
@@ -51,10 +58,13 @@ class ChatService:
                 content=content,
                 author_id=author_id,
                 message_type=message_type,
-                tool_name=tool_name
+                tool_name=tool_name,
+                status=status,
+                chat_id=chat.id,
+                defer_write=defer_write
             )
-            # Add link to chat and update latest message fields
-            await self.chat_repository.add_message_link_to_chat(chat=chat, message=new_message_model)
+            # Point the chat at it and update latest message fields
+            await self.chat_repository.record_message_on_chat(chat=chat, message=new_message_model, defer_write=defer_write)
             # Prepare broadcast data from the saved model
             broadcast_data = MessageData.model_validate(new_message_model)
             message_json = broadcast_data.model_dump_json(by_alias=True, exclude_none=True)
@@ -67,13 +77,14 @@ class ChatService:
                 author_id=author_id,
                 created_at=temp_timestamp,
                 type=message_type,
-                tool_name=tool_name
+                tool_name=tool_name,
+                status=status
             )
             message_json = broadcast_data.model_dump_json(by_alias=True, exclude_none=True)
 
         await self.websocket_repository.broadcast_to_chat(
-            message=message_json, 
-            chat_id=str(chat.id) 
+            envelope=BroadcastEnvelope(payload=message_json, type=message_type, message_id=str(broadcast_data.id)),
+            chat_id=str(chat.id)
         )
         
         return new_message_model
@@ -114,8 +125,6 @@ class ChatService:
         )
         if not chat:
              raise AppException(status_code=404, error_code="CHAT_NOT_FOUND", message="Chat not found or not owned by user")
-        
-        chat.messages = []
 
         return chat
         
@@ -135,13 +144,9 @@ class ChatService:
         if not chat:
             raise AppException(status_code=404, error_code="CHAT_NOT_FOUND", message="Chat not found or not owned by user")
         
-        message_ids = [link.to_ref().id for link in chat.messages] if chat.messages else []
-        if not message_ids:
-            return PaginatedResponseData(items=[], has_more=False, next_cursor_timestamp=None)
-
         fetch_limit = limit + 1
-        messages = await self.chat_repository.find_messages_by_ids(
-            message_ids=message_ids,
+        messages = await self.chat_repository.find_messages_by_chat_id(
+            chat_id=chat_id,
             limit=fetch_limit,
             before_timestamp=before_timestamp
         )
@@ -165,35 +170,47 @@ class ChatService:
         update_data: ChatUpdate,
         owner_id: PydanticObjectId
     ) -> Chat:
-        """Updates a chat's name and/or subtitle."""
-        chat = await self.chat_repository.find_chat_by_id_and_owner(chat_id, owner_id)
-        if not chat:
-             raise AppException(status_code=404, error_code="CHAT_NOT_FOUND", message="Chat not found or not owned by user")
-
+        """Updates a chat's name and/or subtitle with one atomic partial update."""
         # Check if at least one field is provided for update
         update_payload = update_data.model_dump(exclude_unset=True)
         if not update_payload:
              raise AppException(status_code=400, error_code="NO_UPDATE_DATA", message="No fields provided for update")
 
+        # Use timezone-aware UTC timestamp
+        fields: Dict[str, Any] = {"updated_at": datetime.now(timezone.utc)}
         # Update fields if they are provided in the payload
         if "name" in update_payload:
-            chat.name = update_payload["name"]
-        
-        # Use timezone-aware UTC timestamp
-        chat.updated_at = datetime.now(timezone.utc) 
-        updated_chat = await self.chat_repository.save_chat(chat)
-        updated_chat.messages = [] 
+            fields["name"] = update_payload["name"]
+
+        updated_chat = await self.chat_repository.update_chat(
+            chat_id, set_fields=fields, owner_id=owner_id, return_document=True
+        )
+        if not updated_chat:
+             raise AppException(status_code=404, error_code="CHAT_NOT_FOUND", message="Chat not found or not owned by user")
         return updated_chat
     
-    async def update_message_content(self, message_id: PydanticObjectId, new_content: str):
-        """Service layer method to update message content."""
-        print(f"ChatService: Updating content for message {message_id}")
-        updated_message = await self.chat_repository.update_message_content(message_id, new_content)
-        if not updated_message:
-             print(f"ChatService Warning: Message {message_id} not found for content update.")
+    async def update_message_content(
+        self,
+        message_id: PydanticObjectId,
+        new_content: str,
+        status: Optional[MessageStatus] = None,
+        chat_id: Optional[PydanticObjectId] = None,
+        defer_write: bool = False
+    ):
+        """Service layer method to update message content and status (queued on chat_id's write-behind queue if deferred)."""
+        logger.debug(f"ChatService: Updating content for message {message_id}")
+        updated_message = await self.chat_repository.update_message_content(
+            message_id, new_content, status=status, chat_id=chat_id, defer_write=defer_write
+        )
+        if not updated_message and not defer_write:
+             logger.warning(f"ChatService: Message {message_id} not found for content update.")
              # Optionally raise an exception here if needed
         # No broadcast needed for content update after stream usually
 
+    async def flush_writes(self, chat_id: PydanticObjectId):
+        """Waits for the chat's deferred message and context writes to land."""
+        await self.chat_repository.flush_writes(chat_id)
+
     async def get_recent_messages(self, chat_id: PydanticObjectId, limit: int = 20) -> List[Message]:
         """Service layer method to get recent messages for history."""
         # Add validation? Check if user owns chat_id first?
@@ -1,31 +1,53 @@
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from beanie import PydanticObjectId
 from datetime import datetime
 
+from app.config.environment import environment
+from app.infrastructure.blobs import offload_if_large
+
 from ..models import ContextItem
 from ..repositories.context_repository import ContextRepository
 from app.features.common.schemas.common_schemas import PaginatedResponseData
 
+if TYPE_CHECKING:
+    from app.infrastructure.blobs import BlobStore
+
 class ContextService:
     """Service layer for managing context items."""
-    def __init__(self, context_repository: ContextRepository):
+    def __init__(self, context_repository: ContextRepository, blob_store: "BlobStore"):
         self.context_repository = context_repository
+        # Large tool outputs go here; context documents and session state keep only a reference
+        self.blob_store = blob_store
 
     async def save_agent_context(
         self,
         chat_id: PydanticObjectId,
         source_agent: str,
         content_type: str,
-        data: Dict[str, Any]
+        data: Dict[str, Any],
+        defer_write: bool = False
     ) -> ContextItem:
-        """Creates a ContextItem instance and saves it via the repository."""
+        """
+        Creates a ContextItem instance, saves it and makes it the latest value in the chat's context snapshot.
+        Data over TOOL_OUTPUT_OFFLOAD_THRESHOLD_BYTES is stored in the blob store and replaced by a reference.
+        With defer_write the writes are queued on the chat's write-behind queue instead of awaited.
+        """
+        data = await offload_if_large(
+            self.blob_store,
+            data,
+            threshold_bytes=environment.TOOL_OUTPUT_OFFLOAD_THRESHOLD_BYTES,
+            preview_chars=environment.TOOL_OUTPUT_PREVIEW_CHARS,
+            metadata={"chat_id": str(chat_id), "source_agent": source_agent, "content_type": content_type}
+        )
         context_item = ContextItem(
             chat_id=chat_id,
             source_agent=source_agent,
             content_type=content_type,
             data=data
         )
-        return await self.context_repository.add_context_item(context_item)
+        saved_item = await self.context_repository.add_context_item(context_item, defer_write=defer_write)
+        await self.context_repository.upsert_snapshot_entry(chat_id, source_agent, content_type, data, defer_write=defer_write)
+        return saved_item
 
     async def fetch_chat_context(
         self, 
@@ -63,4 +85,20 @@ class ContextService:
 
     async def fetch_all_chat_context(self, chat_id: PydanticObjectId) -> List[ContextItem]:
         """Fetches ALL context items for a chat via the repository."""
-        return await self.context_repository.get_all_context_for_chat(chat_id)
\ No newline at end of file
+        return await self.context_repository.get_all_context_for_chat(chat_id)
+
+    async def fetch_latest_context(self, chat_id: PydanticObjectId) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest data per source_agent and content_type, as one point read of the chat's snapshot.
+        Chats from before snapshots existed are rebuilt from their items once and backfilled.
+        """
+        snapshot = await self.context_repository.get_snapshot(chat_id)
+        if snapshot is not None:
+            return snapshot.context
+
+        context: Dict[str, Dict[str, Any]] = {}
+        for item in await self.context_repository.get_all_context_for_chat(chat_id):
+            context.setdefault(item.source_agent, {})[item.content_type] = item.data # Ascending: latest wins
+        if context:
+            await self.context_repository.create_snapshot_if_missing(chat_id, context)
+        return context
@@ -0,0 +1,69 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# (chat_id, message_id, chunk) -> None
+SendChunk = Callable[[str, str, str], Awaitable[None]]
+
+@dataclass
+class _PendingChunks:
+    parts: List[str] = field(default_factory=list)
+    size: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+
+class StreamCoalescer:
+    """
+    Batches streamed chunks per (chat, message) into a single MESSAGE_UPDATE.
+    A batch is sent when its time window elapses or it reaches the byte threshold,
+    whichever comes first. Callers must flush a message before signalling its end.
+    """
+    def __init__(self, send: SendChunk, window_seconds: float, max_bytes: int):
+        self._send = send
+        self.window_seconds = window_seconds
+        self.max_bytes = max_bytes
+        self._pending: Dict[Tuple[str, str], _PendingChunks] = {}
+        self._timer_tasks: Set[asyncio.Task] = set()
+        # Serializes sends so a window flush can never overtake a later explicit flush
+        self._lock = asyncio.Lock()
+        self.chunks_received = 0
+        self.frames_sent = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    async def add(self, chat_id: str, message_id: str, chunk: str):
+        """Buffers a chunk, sending the batch right away if it crossed the byte threshold."""
+        key = (chat_id, message_id)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingChunks()
+        pending.parts.append(chunk)
+        pending.size += len(chunk.encode("utf-8"))
+        self.chunks_received += 1
+
+        if pending.size >= self.max_bytes:
+            await self.flush(chat_id, message_id)
+        elif pending.timer is None:
+            pending.timer = asyncio.get_running_loop().call_later(self.window_seconds, self._on_window_elapsed, key)
+
+    def _on_window_elapsed(self, key: Tuple[str, str]):
+        task = asyncio.create_task(self.flush(*key))
+        self._timer_tasks.add(task)
+        task.add_done_callback(self._timer_tasks.discard)
+
+    async def flush(self, chat_id: str, message_id: str):
+        """Sends whatever is buffered for a message."""
+        async with self._lock:
+            pending = self._pending.pop((chat_id, message_id), None)
+            if pending is None:
+                return
+            if pending.timer:
+                pending.timer.cancel()
+            self.frames_sent += 1
+            await self._send(chat_id, message_id, "".join(pending.parts))
+
+    async def flush_all(self):
+        """Sends every buffered batch (e.g. at the end of an agent turn)."""
+        for chat_id, message_id in list(self._pending):
+            await self.flush(chat_id, message_id)
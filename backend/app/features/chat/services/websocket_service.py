@@ -1,5 +1,7 @@
-import json
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
+from app.config.environment import environment
+from app.infrastructure.websockets import BroadcastEnvelope
+from .stream_coalescer import StreamCoalescer
 
 if TYPE_CHECKING:
     from app.features.chat.repositories import WebSocketRepository
@@ -8,25 +10,36 @@ class WebSocketService:
     """Service responsible for formatting and broadcasting WebSocket messages."""
     def __init__(self, websocket_repository: "WebSocketRepository"):
         self.websocket_repository = websocket_repository
+        self.stream_coalescer = StreamCoalescer(
+            send=self._send_message_update,
+            window_seconds=environment.WEBSOCKET_STREAM_COALESCE_WINDOW_MS / 1000,
+            max_bytes=environment.WEBSOCKET_STREAM_COALESCE_MAX_BYTES
+        )
         print("WebSocketService Initialized")
 
     async def broadcast_message_update(
         self,
         chat_id: str,
-        message_id: str,
+        message_id: Optional[str],
+        chunk: str,
+        is_error: bool = False
+    ):
+        """Formats and broadcasts a message chunk update, batching stream chunks when coalescing is enabled."""
+        if message_id and not is_error and self.stream_coalescer.enabled:
+            await self.stream_coalescer.add(chat_id, message_id, chunk)
+            return
+        await self._send_message_update(chat_id, message_id, chunk, is_error)
+
+    async def _send_message_update(
+        self,
+        chat_id: str,
+        message_id: Optional[str],
         chunk: str,
         is_error: bool = False
     ):
-        """Formats and broadcasts a message chunk update."""
-        payload = {
-            "type": "MESSAGE_UPDATE",
-            "message_id": message_id,
-            "chunk": chunk,
-            "is_error": is_error
-        }
         try:
             await self.websocket_repository.broadcast_to_chat(
-                message=json.dumps(payload),
+                envelope=BroadcastEnvelope.message_update(message_id, chunk, is_error),
                 chat_id=chat_id
             )
         except Exception as e:
@@ -38,16 +51,37 @@ class WebSocketService:
         chat_id: str,
         message_id: str
     ):
-        """Formats and broadcasts a stream end signal."""
-        payload = {
-            "type": "STREAM_END",
-            "message_id": message_id
-        }
+        """Flushes any batched chunks for the message, then broadcasts a stream end signal."""
+        await self.stream_coalescer.flush(chat_id, message_id)
         try:
             await self.websocket_repository.broadcast_to_chat(
-                message=json.dumps(payload),
+                envelope=BroadcastEnvelope.stream_end(message_id),
                 chat_id=chat_id
             )
         except Exception as e:
             print(f"WebSocketService: Error broadcasting stream end to chat {chat_id}: {e}")
-            # Consider re-raising or logging more formally 
\ No newline at end of file
+            # Consider re-raising or logging more formally
+
+    async def broadcast_turn_cancelled(self, chat_id: str, reason: str):
+        """Tells viewers the agent turn was stopped before finishing."""
+        try:
+            await self.websocket_repository.broadcast_to_chat(
+                envelope=BroadcastEnvelope.turn_cancelled(reason),
+                chat_id=chat_id
+            )
+        except Exception as e:
+            print(f"WebSocketService: Error broadcasting turn cancellation to chat {chat_id}: {e}")
+
+    async def broadcast_queue_position(self, chat_id: str, resource: str, position: int):
+        """Tells viewers where the chat's agent turn is waiting for capacity."""
+        try:
+            await self.websocket_repository.broadcast_to_chat(
+                envelope=BroadcastEnvelope.queue_position(resource, position),
+                chat_id=chat_id
+            )
+        except Exception as e:
+            print(f"WebSocketService: Error broadcasting queue position to chat {chat_id}: {e}")
+
+    async def flush_stream_updates(self):
+        """Sends any chunks still waiting in the coalescing window."""
+        await self.stream_coalescer.flush_all()
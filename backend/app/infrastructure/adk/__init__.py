@@ -0,0 +1,25 @@
+from .session_cache import SessionCache
+from .session_service import (
+    MongoSessionService,
+    init_session_service,
+    close_session_service,
+    get_session_service
+)
+from .runner_registry import (
+    RunnerRegistry,
+    init_runner_registry,
+    close_runner_registry,
+    get_runner_registry
+)
+
+__all__ = [
+    "SessionCache",
+    "MongoSessionService",
+    "init_session_service",
+    "close_session_service",
+    "get_session_service",
+    "RunnerRegistry",
+    "init_runner_registry",
+    "close_runner_registry",
+    "get_runner_registry"
+]
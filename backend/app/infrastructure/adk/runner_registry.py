@@ -0,0 +1,81 @@
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.artifacts import BaseArtifactService, InMemoryArtifactService
+from google.adk.memory import BaseMemoryService, InMemoryMemoryService
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService
+
+from .session_service import get_session_service
+
+logger = logging.getLogger(__name__)
+
+class RunnerRegistry:
+    """
+    App-scoped ADK Runners, one per (agent, app name), all sharing the same session, artifact
+    and memory services. A Runner holds no per-turn state, so concurrent turns can share one.
+    """
+    def __init__(
+        self,
+        session_service: BaseSessionService,
+        artifact_service: Optional[BaseArtifactService] = None,
+        memory_service: Optional[BaseMemoryService] = None
+    ):
+        self.session_service = session_service
+        self.artifact_service = artifact_service
+        self.memory_service = memory_service
+        self._runners: Dict[Tuple[str, str], Runner] = {}
+        self.runners_created = 0
+        self.runner_reuses = 0
+
+    def get(self, agent: BaseAgent, app_name: str) -> Runner:
+        """Returns the Runner for the agent tree rooted at `agent`, building it on first use."""
+        key = (agent.name, app_name)
+        runner = self._runners.get(key)
+        if runner is not None and runner.agent is agent:
+            self.runner_reuses += 1
+            return runner
+        runner = Runner(
+            app_name=app_name,
+            agent=agent,
+            session_service=self.session_service,
+            artifact_service=self.artifact_service,
+            memory_service=self.memory_service
+        )
+        self._runners[key] = runner
+        self.runners_created += 1
+        logger.info(f"ADK Runner created for agent '{agent.name}' (app: {app_name})")
+        return runner
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runners": len(self._runners),
+            "runners_created": self.runners_created,
+            "runner_reuses": self.runner_reuses,
+        }
+
+
+_runner_registry: Optional[RunnerRegistry] = None
+
+def init_runner_registry():
+    """Initialize the process-wide runner registry on top of the ADK session service."""
+    global _runner_registry
+    if _runner_registry is None:
+        _runner_registry = RunnerRegistry(
+            session_service=get_session_service(),
+            artifact_service=InMemoryArtifactService(),
+            memory_service=InMemoryMemoryService()
+        )
+        logger.info("ADK runner registry initialized.")
+
+def close_runner_registry():
+    """Drop the registry and its runners."""
+    global _runner_registry
+    _runner_registry = None
+
+def get_runner_registry() -> RunnerRegistry:
+    """Get the process-wide runner registry."""
+    if _runner_registry is None:
+        raise RuntimeError("Runner registry is not initialized. Call init_runner_registry() first.")
+    return _runner_registry
@@ -0,0 +1,150 @@
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.adk.sessions import Session
+
+SessionKey = Tuple[str, str, str] # (app_name, user_id, session_id)
+
+def estimate_state_bytes(state: Dict[str, Any]) -> int:
+    """Size of the state as it would be serialized; close enough to compare sessions against a budget."""
+    return len(json.dumps(state, default=str))
+
+@dataclass
+class _Entry:
+    session: Session
+    event_bytes: int = 0
+    state_bytes: int = 0
+    last_access: float = field(default_factory=time.monotonic)
+
+    @property
+    def size(self) -> int:
+        return self.event_bytes + self.state_bytes
+
+
+class SessionCache:
+    """
+    LRU cache of live ADK sessions bounded by count, total bytes and idle time.
+    Sizes are accounted from serialized events and state as they are added, so no walk over a
+    session is needed to know its footprint. `is_pinned` protects entries that must not be
+    dropped yet (e.g. with writes still in flight).
+    """
+    def __init__(
+        self,
+        max_sessions: int,
+        max_bytes: int,
+        idle_ttl_seconds: float,
+        is_pinned: Callable[[SessionKey], bool] = lambda key: False
+    ):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.is_pinned = is_pinned
+        self._entries: "OrderedDict[SessionKey, _Entry]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions: Dict[str, int] = {"lru": 0, "bytes": 0, "idle": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: SessionKey) -> Optional[Session]:
+        entry = self._entries.get(key)
+        if entry is not None and self._is_idle(entry, time.monotonic()) and not self.is_pinned(key):
+            self._remove(key, "idle")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(key, entry)
+        return entry.session
+
+    def peek(self, key: SessionKey) -> Optional[Session]:
+        """Like get() but without counting or refreshing the entry."""
+        entry = self._entries.get(key)
+        return entry.session if entry else None
+
+    def put(self, key: SessionKey, session: Session, event_bytes: int):
+        """Caches a session whose events serialize to `event_bytes`, then evicts down to the limits."""
+        self.discard(key)
+        entry = _Entry(session=session, event_bytes=event_bytes, state_bytes=estimate_state_bytes(session.state))
+        self._entries[key] = entry
+        self.total_bytes += entry.size
+        self._evict()
+
+    def add_event_bytes(self, key: SessionKey, event_bytes: int, state_changed: bool = False):
+        """Accounts for events appended to a cached session (and re-measures its state if it changed)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        self.total_bytes -= entry.size
+        entry.event_bytes += event_bytes
+        if state_changed:
+            entry.state_bytes = estimate_state_bytes(entry.session.state)
+        self.total_bytes += entry.size
+        self._touch(key, entry)
+        self._evict()
+
+    def discard(self, key: SessionKey):
+        if key in self._entries:
+            self._remove(key, None)
+
+    def items(self) -> List[Tuple[SessionKey, Session]]:
+        return [(key, entry.session) for key, entry in self._entries.items()]
+
+    def _touch(self, key: SessionKey, entry: _Entry):
+        entry.last_access = time.monotonic()
+        self._entries.move_to_end(key)
+
+    def _is_idle(self, entry: _Entry, now: float) -> bool:
+        return self.idle_ttl_seconds > 0 and now - entry.last_access > self.idle_ttl_seconds
+
+    def _remove(self, key: SessionKey, reason: Optional[str]):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+        if reason:
+            self.evictions[reason] += 1
+
+    def _evict(self):
+        """Drops idle entries, then least recently used ones until both limits hold. The newest entry always stays."""
+        now = time.monotonic()
+        for key in list(self._entries)[:-1]:
+            entry = self._entries[key]
+            over_count = len(self._entries) > self.max_sessions
+            over_bytes = self.total_bytes > self.max_bytes
+            idle = self._is_idle(entry, now)
+            if not (over_count or over_bytes or idle):
+                break # Oldest remaining entry is fresh and we're within limits
+            if self.is_pinned(key):
+                continue
+            self._remove(key, "idle" if idle else "bytes" if over_bytes else "lru")
+
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        largest = sorted(self._entries.items(), key=lambda item: item[1].size, reverse=True)[:top]
+        now = time.monotonic()
+        return {
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": dict(self.evictions),
+            "largest": [
+                {
+                    "app_name": key[0],
+                    "user_id": key[1],
+                    "session_id": key[2],
+                    "events": len(entry.session.events),
+                    "event_bytes": entry.event_bytes,
+                    "state_bytes": entry.state_bytes,
+                    "idle_seconds": round(now - entry.last_access, 1),
+                }
+                for key, entry in largest
+            ],
+        }
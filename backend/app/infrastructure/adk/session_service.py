@@ -0,0 +1,321 @@
+import asyncio
+import copy
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListEventsResponse,
+    ListSessionsResponse,
+)
+
+from app.config.environment import environment
+from app.features.agent.models import ADKSessionRecord, ADKEventRecord, ADKSessionVersion
+from app.infrastructure.metrics import MONGO_WRITE_SECONDS
+from .session_cache import SessionCache, SessionKey
+
+logger = logging.getLogger(__name__)
+
+class MongoSessionService(BaseSessionService):
+    """
+    ADK session service that keeps live sessions in process and writes every change through to MongoDB.
+
+    ADK calls session services synchronously from inside the event loop, so writes are issued as
+    soon as a change happens but complete in the background, in order, per session. Callers that
+    need them durable (end of a turn, shutdown) await flush(). Sessions are (re)hydrated from Mongo
+    by load_session(), which must be awaited before handing a session id to a Runner.
+    The cache is bounded (see SessionCache); an evicted session is simply loaded again on next use.
+    """
+    def __init__(self, max_sessions: int, max_bytes: int, idle_ttl_seconds: float):
+        self._pending_writes: Dict[SessionKey, asyncio.Task] = {}
+        # Sessions with writes in flight stay cached: Mongo doesn't have their latest events yet
+        self._cache = SessionCache(
+            max_sessions=max_sessions,
+            max_bytes=max_bytes,
+            idle_ttl_seconds=idle_ttl_seconds,
+            is_pinned=lambda key: key in self._pending_writes
+        )
+
+    # --- Async API used by the app --- #
+
+    async def load_session(self, app_name: str, user_id: str, session_id: str) -> Optional[Session]:
+        """
+        Returns the session, loading it from Mongo if it isn't cached or another worker changed it since.
+        None if it doesn't exist anywhere.
+        """
+        key = (app_name, user_id, session_id)
+        cached = self._cache.get(key)
+        if cached is not None and key in self._pending_writes:
+            return cached # Our own writes are still landing, so the cache is the newest copy
+
+        version = await ADKSessionRecord.find_one(
+            ADKSessionRecord.app_name == app_name,
+            ADKSessionRecord.user_id == user_id,
+            ADKSessionRecord.session_id == session_id,
+        ).project(ADKSessionVersion)
+        if version is None:
+            self._cache.discard(key)
+            return None
+        if cached is not None and cached.last_update_time >= version.last_update_time:
+            return cached
+
+        start_time = time.time()
+        session, event_bytes = await self._read_session(key)
+        if session is not None:
+            self._cache.put(key, session, event_bytes)
+            logger.info(f"Loaded ADK session {session_id} ({len(session.events)} events) from Mongo in {time.time() - start_time:.2f}s")
+        return session
+
+    async def flush(self, app_name: Optional[str] = None, user_id: Optional[str] = None, session_id: Optional[str] = None):
+        """Waits for queued writes of one session, or of every session when no id is given."""
+        if session_id is not None:
+            tasks = [self._pending_writes.get((app_name, user_id, session_id))]
+        else:
+            tasks = list(self._pending_writes.values())
+        tasks = [task for task in tasks if task is not None]
+        if tasks:
+            # Shielded so a cancelled turn still waits for its own writes instead of abandoning them
+            await asyncio.shield(asyncio.gather(*tasks, return_exceptions=True))
+
+    def append_events(self, session: Session, events: List[Event]) -> List[Event]:
+        """Appends several events with a single write (e.g. history loaded into a new session)."""
+        start = len(session.events)
+        appended = [event for event in events if not event.partial]
+        for event in appended:
+            super().append_event(session=session, event=event)
+        if not appended:
+            return appended
+        session.last_update_time = max(session.last_update_time, appended[-1].timestamp)
+        records = [self._event_record(session, start + i, event) for i, event in enumerate(appended)]
+        state, last_update_time = dict(session.state), session.last_update_time
+        self._cache.add_event_bytes(self._key(session), sum(len(record.payload) for record in records), state_changed=True)
+
+        async def write():
+            await ADKEventRecord.insert_many(records)
+            await self._write_state(session, state, last_update_time)
+        self._schedule_write(self._key(session), write)
+        return appended
+
+    def update_state(self, session: Session, delta: Dict[str, Any]):
+        """Sets session state outside of an event (bookkeeping the agents never write themselves)."""
+        session.state.update(delta)
+        self._cache.add_event_bytes(self._key(session), 0, state_changed=True)
+        last_update_time = session.last_update_time = max(session.last_update_time, time.time())
+        self._schedule_write(self._key(session), lambda: self._write_state(session, dict(delta), last_update_time))
+
+    # --- BaseSessionService --- #
+
+    def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=copy.deepcopy(state) if state else {},
+            last_update_time=time.time(),
+        )
+        key = self._key(session)
+        self._cache.put(key, session, event_bytes=0)
+        record = ADKSessionRecord(
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            state=copy.deepcopy(session.state),
+            last_update_time=session.last_update_time,
+        )
+
+        async def write():
+            # A stale copy (e.g. created again after a crash before its events landed) is replaced
+            await ADKEventRecord.find(*self._event_filter(key)).delete()
+            await ADKSessionRecord.find_one(*self._session_filter(key)).delete()
+            await record.insert()
+        self._schedule_write(key, write)
+        return session
+
+    def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        """Served from the cache only; see load_session()."""
+        session = self._cache.peek((app_name, user_id, session_id))
+        if session is None or config is None:
+            # The live object, not a copy: the Runner appends to it and we persist what it appends
+            return session
+        events = session.events
+        if config.after_timestamp:
+            events = [event for event in events if event.timestamp > config.after_timestamp]
+        if config.num_recent_events:
+            events = events[-config.num_recent_events:]
+        return session.model_copy(update={"events": events})
+
+    def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        """Sessions of the user cached on this worker, without their events."""
+        sessions = [
+            session.model_copy(update={"events": []})
+            for (cached_app, cached_user, _), session in self._cache.items()
+            if cached_app == app_name and cached_user == user_id
+        ]
+        return ListSessionsResponse(sessions=sessions)
+
+    def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._cache.discard(key)
+
+        async def write():
+            await ADKEventRecord.find(*self._event_filter(key)).delete()
+            await ADKSessionRecord.find_one(*self._session_filter(key)).delete()
+        self._schedule_write(key, write)
+
+    def list_events(self, *, app_name: str, user_id: str, session_id: str) -> ListEventsResponse:
+        session = self._cache.peek((app_name, user_id, session_id))
+        return ListEventsResponse(events=list(session.events) if session else [])
+
+    def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event # Streamed chunks are never stored; the final event carries the full text
+        position = len(session.events)
+        super().append_event(session=session, event=event)
+        session.last_update_time = max(session.last_update_time, event.timestamp)
+        record = self._event_record(session, position, event)
+        state_delta = None
+        if event.actions and event.actions.state_delta:
+            state_delta = {k: session.state[k] for k in event.actions.state_delta if k in session.state}
+        last_update_time = session.last_update_time
+        self._cache.add_event_bytes(self._key(session), len(record.payload), state_changed=state_delta is not None)
+
+        async def write():
+            await record.insert()
+            await self._write_state(session, state_delta, last_update_time)
+        self._schedule_write(self._key(session), write)
+        return event
+
+    # --- Internals --- #
+
+    @staticmethod
+    def _key(session: Session) -> SessionKey:
+        return (session.app_name, session.user_id, session.id)
+
+    @staticmethod
+    def _session_filter(key: SessionKey):
+        return (
+            ADKSessionRecord.app_name == key[0],
+            ADKSessionRecord.user_id == key[1],
+            ADKSessionRecord.session_id == key[2],
+        )
+
+    @staticmethod
+    def _event_filter(key: SessionKey):
+        return (
+            ADKEventRecord.app_name == key[0],
+            ADKEventRecord.user_id == key[1],
+            ADKEventRecord.session_id == key[2],
+        )
+
+    @staticmethod
+    def _event_record(session: Session, position: int, event: Event) -> ADKEventRecord:
+        return ADKEventRecord(
+            app_name=session.app_name,
+            user_id=session.user_id,
+            session_id=session.id,
+            position=position,
+            timestamp=event.timestamp,
+            payload=event.model_dump_json(exclude_none=True),
+        )
+
+    async def _write_state(self, session: Session, state: Optional[Dict[str, Any]], last_update_time: float):
+        """Sets the given state keys (all of them for a full snapshot) and the session's update time."""
+        update: Dict[str, Any] = {"last_update_time": last_update_time}
+        for state_key, value in (state or {}).items():
+            update[f"state.{state_key}"] = value
+        await ADKSessionRecord.get_motor_collection().update_one(
+            {"app_name": session.app_name, "user_id": session.user_id, "session_id": session.id},
+            {"$set": update},
+        )
+
+    async def _read_session(self, key: SessionKey) -> Tuple[Optional[Session], int]:
+        """The stored session and the serialized size of its events."""
+        record = await ADKSessionRecord.find_one(*self._session_filter(key))
+        if record is None:
+            return None, 0
+        event_records = await ADKEventRecord.find(*self._event_filter(key)).sort(+ADKEventRecord.position).to_list()
+        session = Session(
+            app_name=record.app_name,
+            user_id=record.user_id,
+            id=record.session_id,
+            state=record.state,
+            events=[Event.model_validate_json(event_record.payload) for event_record in event_records],
+            last_update_time=record.last_update_time,
+        )
+        return session, sum(len(event_record.payload) for event_record in event_records)
+
+    def _schedule_write(self, key: SessionKey, write: Callable[[], Awaitable[None]]):
+        """Starts the write now, ordered after any write of the same session still in flight."""
+        previous = self._pending_writes.get(key)
+        task = asyncio.get_running_loop().create_task(self._run_write(key, previous, write))
+        self._pending_writes[key] = task
+        task.add_done_callback(lambda done, key=key: self._on_write_done(key, done))
+
+    async def _run_write(self, key: SessionKey, previous: Optional[asyncio.Task], write: Callable[[], Awaitable[None]]):
+        if previous is not None:
+            await asyncio.wait([previous])
+        start_time = time.perf_counter()
+        try:
+            await write()
+        except Exception as e:
+            logger.error(f"ADK session {key[2]}: failed to persist change: {e}", exc_info=True)
+        finally:
+            MONGO_WRITE_SECONDS.labels(collection=ADKSessionRecord.get_motor_collection().name, operation="session_write").observe(time.perf_counter() - start_time)
+
+    def _on_write_done(self, key: SessionKey, task: asyncio.Task):
+        if self._pending_writes.get(key) is task:
+            del self._pending_writes[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache footprint (sizes, hit rate, evictions, largest sessions) and write backlog."""
+        return {
+            **self._cache.stats(),
+            "sessions_with_pending_writes": len(self._pending_writes),
+        }
+
+
+_session_service: Optional[MongoSessionService] = None
+
+def init_session_service():
+    """Initialize the process-wide ADK session service (requires Beanie to be initialized)."""
+    global _session_service
+    if _session_service is None:
+        _session_service = MongoSessionService(
+            max_sessions=environment.ADK_SESSION_CACHE_MAX_SESSIONS,
+            max_bytes=environment.ADK_SESSION_CACHE_MAX_BYTES,
+            idle_ttl_seconds=environment.ADK_SESSION_CACHE_IDLE_TTL_SECONDS
+        )
+        logger.info("ADK session service initialized.")
+
+async def close_session_service():
+    """Wait for outstanding session writes, then drop the service."""
+    global _session_service
+    if _session_service is not None:
+        await _session_service.flush()
+        _session_service = None
+
+def get_session_service() -> MongoSessionService:
+    """Get the process-wide ADK session service."""
+    if _session_service is None:
+        raise RuntimeError("ADK session service is not initialized. Call init_session_service() first.")
+    return _session_service
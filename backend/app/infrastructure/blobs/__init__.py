@@ -0,0 +1,22 @@
+from .blob_store import (
+    BlobStore,
+    GridFSBlobStore,
+    LocalDiskBlobStore,
+    init_blob_store,
+    close_blob_store,
+    get_blob_store
+)
+from .offload import BLOB_REF_KEY, sketch_schema, is_blob_reference, offload_if_large
+
+__all__ = [
+    "BlobStore",
+    "GridFSBlobStore",
+    "LocalDiskBlobStore",
+    "init_blob_store",
+    "close_blob_store",
+    "get_blob_store",
+    "BLOB_REF_KEY",
+    "sketch_schema",
+    "is_blob_reference",
+    "offload_if_large"
+]
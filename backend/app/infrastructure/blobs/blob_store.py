@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+from gridfs.errors import NoFile
+
+from app.config.environment import environment
+
+logger = logging.getLogger(__name__)
+
+def content_ref(data: bytes) -> str:
+    """Content address of a blob: equal payloads share one stored copy."""
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+class BlobStore:
+    """Content-addressed store for payloads too large to keep inline in documents or session state."""
+    async def put(self, data: bytes, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Stores the bytes (if not already stored) and returns their reference."""
+        raise NotImplementedError
+
+    async def get(self, ref: str) -> Optional[bytes]:
+        """The stored bytes, or None if the reference is unknown."""
+        raise NotImplementedError
+
+
+class GridFSBlobStore(BlobStore):
+    """Blobs in a GridFS bucket of the app database, one file per content hash."""
+    def __init__(self, database: AsyncIOMotorDatabase, bucket_name: str):
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name=bucket_name)
+
+    async def put(self, data: bytes, metadata: Optional[Dict[str, Any]] = None) -> str:
+        ref = content_ref(data)
+        existing = await self.bucket.find({"filename": ref}, limit=1).to_list(1)
+        if not existing:
+            await self.bucket.upload_from_stream(ref, data, metadata=metadata or {})
+        return ref
+
+    async def get(self, ref: str) -> Optional[bytes]:
+        try:
+            stream = await self.bucket.open_download_stream_by_name(ref)
+        except NoFile:
+            return None
+        return await stream.read()
+
+
+class LocalDiskBlobStore(BlobStore):
+    """Blobs as files under a directory (single-host deployments and development)."""
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def _path(self, ref: str) -> str:
+        digest = ref.split(":", 1)[-1]
+        if not digest.isalnum():
+            raise ValueError(f"Invalid blob reference: {ref}")
+        return os.path.join(self.root_dir, digest[:2], digest)
+
+    def _write(self, path: str, data: bytes):
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path) # Readers never see a partial file
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    async def put(self, data: bytes, metadata: Optional[Dict[str, Any]] = None) -> str:
+        ref = content_ref(data)
+        await asyncio.to_thread(self._write, self._path(ref), data)
+        return ref
+
+    async def get(self, ref: str) -> Optional[bytes]:
+        try:
+            path = self._path(ref)
+        except ValueError:
+            return None
+        return await asyncio.to_thread(self._read, path)
+
+
+_blob_store: Optional[BlobStore] = None
+
+def init_blob_store(database: Optional[AsyncIOMotorDatabase] = None):
+    """Initialize the blob store: GridFS on the given database, or local disk per BLOB_STORE_BACKEND."""
+    global _blob_store
+    if _blob_store is None:
+        if environment.BLOB_STORE_BACKEND == "gridfs" and database is not None:
+            _blob_store = GridFSBlobStore(database, environment.BLOB_STORE_GRIDFS_BUCKET)
+        else:
+            _blob_store = LocalDiskBlobStore(environment.BLOB_STORE_LOCAL_DIR)
+        logger.info(f"Blob store initialized ({type(_blob_store).__name__}).")
+
+def close_blob_store():
+    """Drop the blob store."""
+    global _blob_store
+    _blob_store = None
+
+def get_blob_store() -> BlobStore:
+    """Get the process-wide blob store."""
+    if _blob_store is None:
+        raise RuntimeError("Blob store is not initialized. Call init_blob_store() first.")
+    return _blob_store
@@ -0,0 +1,56 @@
+import json
+from typing import Any, Dict, Optional
+
+from .blob_store import BlobStore
+
+BLOB_REF_KEY = "blob_ref"
+
+def sketch_schema(value: Any, depth: int = 3, max_keys: int = 25) -> Any:
+    """Shape of a JSON-like value: key names and value types, with list lengths and their first item's shape."""
+    if isinstance(value, dict):
+        if depth <= 0:
+            return f"object({len(value)} keys)"
+        sketch = {key: sketch_schema(item, depth - 1, max_keys) for key, item in list(value.items())[:max_keys]}
+        if len(value) > max_keys:
+            sketch["..."] = f"{len(value) - max_keys} more keys"
+        return sketch
+    if isinstance(value, list):
+        if not value or depth <= 0:
+            return f"array({len(value)})"
+        return {"array": len(value), "items": sketch_schema(value[0], depth - 1, max_keys)}
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return f"string({len(value)})"
+    return type(value).__name__
+
+def is_blob_reference(data: Any) -> bool:
+    return isinstance(data, dict) and isinstance(data.get(BLOB_REF_KEY), str)
+
+async def offload_if_large(
+    store: BlobStore,
+    data: Dict[str, Any],
+    threshold_bytes: int,
+    preview_chars: int,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Returns `data` unchanged when its JSON is under threshold_bytes. Otherwise stores the JSON in
+    the blob store and returns a small reference: blob ref, size, schema sketch and a preview.
+    """
+    serialized = json.dumps(data, default=str, ensure_ascii=False)
+    encoded = serialized.encode("utf-8")
+    if len(encoded) <= threshold_bytes:
+        return data
+    ref = await store.put(encoded, metadata={"content_type": "application/json", **(metadata or {})})
+    return {
+        BLOB_REF_KEY: ref,
+        "size_bytes": len(encoded),
+        "schema": sketch_schema(data),
+        "preview": serialized[:preview_chars],
+        "note": "Full output stored out of line. Call fetch_tool_output with this blob_ref to read it.",
+    }
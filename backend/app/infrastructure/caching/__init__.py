@@ -1,7 +1,12 @@
 from .redis import init_redis_pool, close_redis_pool, get_redis_client
+from .pubsub import RedisPubSubBroker, init_pubsub_broker, close_pubsub_broker, get_pubsub_broker
 
 __all__ = [
     "init_redis_pool",
     "close_redis_pool",
-    "get_redis_client"
+    "get_redis_client",
+    "RedisPubSubBroker",
+    "init_pubsub_broker",
+    "close_pubsub_broker",
+    "get_pubsub_broker"
 ]
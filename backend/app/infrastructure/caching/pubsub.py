@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set
+import redis.asyncio as redis
+from .redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Handler signature: (channel, data) -> None
+PubSubHandler = Callable[[str, str], Awaitable[None]]
+
+class RedisPubSubBroker:
+    """
+    Relays Redis pub/sub channels to in-process handlers.
+    A single pub/sub connection is shared by every channel this worker listens on;
+    channels are subscribed when their first handler registers and dropped with the last one.
+    """
+    def __init__(self, client: redis.Redis):
+        self._client = client
+        self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self._handlers: Dict[str, Set[PubSubHandler]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def publish(self, channel: str, message: str) -> int:
+        """Publishes a message to a channel. Returns the number of receiving workers."""
+        return await self._client.publish(channel, message)
+
+    async def subscriber_count(self, channel: str) -> int:
+        """Number of pub/sub connections (i.e. workers) currently subscribed to a channel, cluster-wide."""
+        counts = await self._client.pubsub_numsub(channel)
+        return int(counts[0][1]) if counts else 0
+
+    async def subscribe(self, channel: str, handler: PubSubHandler):
+        """Registers a handler for a channel, subscribing to it if needed."""
+        async with self._lock:
+            handlers = self._handlers.setdefault(channel, set())
+            is_first_handler = not handlers
+            handlers.add(handler)
+            if is_first_handler:
+                await self._pubsub.subscribe(channel)
+                logger.info(f"PubSub: Subscribed to channel {channel}")
+            self._ensure_listener()
+
+    async def unsubscribe(self, channel: str, handler: PubSubHandler):
+        """Removes a handler from a channel, unsubscribing when none remain."""
+        async with self._lock:
+            handlers = self._handlers.get(channel)
+            if not handlers:
+                return
+            handlers.discard(handler)
+            if not handlers:
+                del self._handlers[channel]
+                await self._pubsub.unsubscribe(channel)
+                logger.info(f"PubSub: Unsubscribed from channel {channel}")
+
+    def _ensure_listener(self):
+        """Starts the listener task if it is not already running."""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        """Reads messages while at least one channel is subscribed and dispatches them."""
+        while self._handlers:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"PubSub: Error reading from Redis: {e}", exc_info=True)
+                await asyncio.sleep(1.0)
+                continue
+
+            if message is None or message.get("type") != "message":
+                continue
+
+            channel = message["channel"]
+            for handler in list(self._handlers.get(channel, ())):
+                try:
+                    await handler(channel, message["data"])
+                except Exception as e:
+                    logger.error(f"PubSub: Handler failed for channel {channel}: {e}", exc_info=True)
+
+    async def close(self):
+        """Stops the listener and releases the pub/sub connection."""
+        if self._listener and not self._listener.done():
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._handlers.clear()
+        await self._pubsub.aclose()
+
+
+_pubsub_broker: Optional[RedisPubSubBroker] = None
+
+def init_pubsub_broker():
+    """Initialize the process-wide pub/sub broker. Requires the Redis pool."""
+    global _pubsub_broker
+    if _pubsub_broker is None:
+        _pubsub_broker = RedisPubSubBroker(get_redis_client())
+        logger.info("Redis pub/sub broker initialized.")
+
+async def close_pubsub_broker():
+    """Close the process-wide pub/sub broker."""
+    global _pubsub_broker
+    if _pubsub_broker:
+        await _pubsub_broker.close()
+        _pubsub_broker = None
+        logger.info("Redis pub/sub broker closed.")
+
+def get_pubsub_broker() -> Optional[RedisPubSubBroker]:
+    """Returns the pub/sub broker, or None when broadcasts are local-only."""
+    return _pubsub_broker
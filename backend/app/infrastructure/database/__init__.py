@@ -1,4 +1,11 @@
-from .internal import init_db
+from .internal import (
+    init_db,
+    WriteBehindQueue,
+    WriteBehindError,
+    init_write_queue,
+    close_write_queue,
+    get_write_queue
+)
 from .external import (
     init_external_mongo_client, 
     get_external_mongo_db,
@@ -8,6 +15,11 @@ from .external import (
 
 __all__ = [
     "init_db",
+    "WriteBehindQueue",
+    "WriteBehindError",
+    "init_write_queue",
+    "close_write_queue",
+    "get_write_queue",
     "init_external_mongo_client",
     "get_external_mongo_db",
     "init_sql_engine",
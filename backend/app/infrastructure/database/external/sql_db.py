@@ -3,6 +3,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.pool import QueuePool
 from app.config.environment import environment
+from app.infrastructure.tracing import instrument_sql_engine
 
 logger = logging.getLogger(__name__)
 
@@ -46,7 +47,9 @@ def init_sql_engine():
     except Exception as e:
         logger.critical(f"An unexpected error occurred during SQLAlchemy engine creation: {e}", exc_info=True)
         sql_engine = None
-        
+
+    if sql_engine is not None:
+        instrument_sql_engine(sql_engine) # No-op unless tracing is on
     return sql_engine
 
 def close_sql_engine():
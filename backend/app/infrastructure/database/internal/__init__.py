@@ -1,3 +1,11 @@
 from .main_mongo_db import init_db
+from .write_behind import WriteBehindQueue, WriteBehindError, init_write_queue, close_write_queue, get_write_queue
 
-__all__ = ["init_db"]
+__all__ = [
+    "init_db",
+    "WriteBehindQueue",
+    "WriteBehindError",
+    "init_write_queue",
+    "close_write_queue",
+    "get_write_queue"
+]
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from beanie import Document
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure, PyMongoError
+
+from app.config.environment import environment
+from app.infrastructure.metrics import MONGO_WRITE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_DUPLICATE_KEY = 11000
+
+# Update operators that leave the same document when applied twice: a batch is retried whole, since a
+# transient error mid bulk_write doesn't tell which of its updates already landed
+_IDEMPOTENT_OPERATORS = frozenset({"$set", "$unset", "$setOnInsert"})
+
+@dataclass
+class _Write:
+    document_class: Type[Document]
+    document: Optional[Document] = None # Insert
+    update: Optional[UpdateOne] = None # Update
+
+    def batches_with(self, other: "_Write") -> bool:
+        """Consecutive writes of the same kind to the same collection go out as one command."""
+        return self.document_class is other.document_class and (self.document is None) == (other.document is None)
+
+
+class WriteBehindError(Exception):
+    """Raised by flush() when queued writes could not be written, even after retries."""
+    def __init__(self, key: Optional[str], failed: List[_Write], cause: Exception):
+        self.key = key
+        self.failed = failed
+        self.cause = cause
+        super().__init__(f"{len(failed)} queued write(s) for {key or 'all keys'} were not persisted: {cause}")
+
+def _is_transient(error: Exception) -> bool:
+    """Errors worth retrying: lost connections, elections, and anything Mongo labels retryable."""
+    if isinstance(error, ConnectionFailure):
+        return True
+    if isinstance(error, PyMongoError) and error.has_error_label("RetryableWriteError"):
+        return True
+    return isinstance(error, OperationFailure) and error.code in (91, 189, 10107, 11600, 11602, 13435, 13436)
+
+def _only_duplicate_keys(error: Exception) -> bool:
+    """A retried insert_many whose documents partly landed the first time only fails on those documents."""
+    if not isinstance(error, BulkWriteError):
+        return False
+    errors = error.details.get("writeErrors", [])
+    return bool(errors) and all(e.get("code") == _DUPLICATE_KEY for e in errors) and not error.details.get("writeConcernErrors")
+
+
+class WriteBehindQueue:
+    """
+    In-process write-behind queue for the agent turn's database writes.
+
+    Writes are queued per key (a chat) and drained in the background in the order they were queued:
+    runs of inserts into one collection become one insert_many, runs of updates one bulk_write.
+    Whatever queues up while a batch is in flight goes out with the next batch, so a fast stream
+    produces few, large writes. Callers that need the writes durable (end of a turn, shutdown)
+    await flush(), which raises WriteBehindError if any of them could not be written.
+    Transient errors are retried with exponential backoff before a batch counts as failed.
+    """
+    def __init__(self, max_batch_size: int, max_retries: int = 3, retry_backoff_seconds: float = 0.2):
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._queues: Dict[str, List[_Write]] = {}
+        self._drains: Dict[str, asyncio.Task] = {}
+        # Writes that failed for good, with the last error, until a flush() reports them
+        self._failures: Dict[str, Tuple[List[_Write], Exception]] = {}
+        self.writes_queued = 0
+        self.batches_written = 0
+        self.retried_batches = 0
+        self.failed_writes = 0
+        self.max_write_seconds = 0.0
+
+    def insert(self, key: str, document: Document):
+        """Queues the insert of a document whose id is already set."""
+        if document.id is None:
+            raise ValueError("Queued inserts need their id assigned up front.")
+        self._enqueue(key, _Write(document_class=type(document), document=document))
+
+    def update(self, key: str, document_class: Type[Document], filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        """Queues a raw update of one document in document_class's collection. Only idempotent operators ($set, $unset, $setOnInsert)."""
+        unsafe = set(update) - _IDEMPOTENT_OPERATORS
+        if unsafe:
+            raise ValueError(f"Queued updates may be retried, so they can't use {', '.join(sorted(unsafe))}.")
+        self._enqueue(key, _Write(document_class=document_class, update=UpdateOne(filter, update, upsert=upsert)))
+
+    async def flush(self, key: Optional[str] = None):
+        """
+        Waits until everything queued for the key, or for every key, has been written.
+        Raises WriteBehindError for the writes that failed since the last flush of those keys.
+        """
+        if key is not None:
+            tasks = [self._drains.get(key)]
+        else:
+            tasks = list(self._drains.values())
+        tasks = [task for task in tasks if task is not None]
+        if tasks:
+            # Shielded so a cancelled turn still waits for its own writes instead of abandoning them
+            await asyncio.shield(asyncio.gather(*tasks, return_exceptions=True))
+
+        keys = [key] if key is not None else list(self._failures)
+        failures = [self._failures.pop(k) for k in keys if k in self._failures]
+        if failures:
+            raise WriteBehindError(key, [write for failed, _ in failures for write in failed], failures[-1][1])
+
+    def _enqueue(self, key: str, write: _Write):
+        self._queues.setdefault(key, []).append(write)
+        self.writes_queued += 1
+        if key not in self._drains:
+            task = asyncio.get_running_loop().create_task(self._drain(key))
+            self._drains[key] = task
+
+    async def _drain(self, key: str):
+        try:
+            while self._queues.get(key):
+                pending = self._queues[key]
+                batch = [pending[0]]
+                while len(batch) < min(len(pending), self.max_batch_size) and pending[len(batch)].batches_with(batch[0]):
+                    batch.append(pending[len(batch)])
+                del pending[:len(batch)]
+                await self._write_batch(key, batch)
+        finally:
+            del self._drains[key]
+            self._queues.pop(key, None)
+
+    async def _write_batch(self, key: str, batch: List[_Write]):
+        document_class = batch[0].document_class
+        operation = "insert_many" if batch[0].document is not None else "bulk_write"
+        start_time = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    if batch[0].document is not None:
+                        # Unordered, so a retry still inserts the rest when some documents landed the first time
+                        await document_class.insert_many([write.document for write in batch], ordered=False)
+                    else:
+                        await document_class.get_motor_collection().bulk_write([write.update for write in batch], ordered=True)
+                    self.batches_written += 1
+                    return
+                except Exception as e:
+                    if attempt > 0 and _only_duplicate_keys(e):
+                        self.batches_written += 1
+                        return
+                    if attempt < self.max_retries and _is_transient(e):
+                        attempt += 1
+                        self.retried_batches += 1
+                        logger.warning(f"Write-behind {key}: retrying {len(batch)} {document_class.__name__} change(s) (attempt {attempt}): {e}")
+                        await asyncio.sleep(self.retry_backoff_seconds * 2 ** (attempt - 1))
+                        continue
+                    self.failed_writes += len(batch)
+                    failed, _ = self._failures.get(key, ([], e))
+                    self._failures[key] = (failed + batch, e)
+                    logger.error(f"Write-behind {key}: failed to write {len(batch)} {document_class.__name__} change(s): {e}", exc_info=True)
+                    return
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self.max_write_seconds = max(self.max_write_seconds, elapsed)
+            MONGO_WRITE_SECONDS.labels(collection=document_class.get_motor_collection().name, operation=operation).observe(elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys_pending": len(self._drains),
+            "writes_pending": sum(len(queue) for queue in self._queues.values()),
+            "writes_queued": self.writes_queued,
+            "batches_written": self.batches_written,
+            "retried_batches": self.retried_batches,
+            "failed_writes": self.failed_writes,
+            "max_write_seconds": round(self.max_write_seconds, 4),
+        }
+
+
+_write_queue: Optional[WriteBehindQueue] = None
+
+def init_write_queue():
+    """Initialize the process-wide write-behind queue (requires Beanie to be initialized)."""
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteBehindQueue(
+            max_batch_size=environment.WRITE_BEHIND_MAX_BATCH_SIZE,
+            max_retries=environment.WRITE_BEHIND_MAX_RETRIES,
+            retry_backoff_seconds=environment.WRITE_BEHIND_RETRY_BACKOFF_SECONDS
+        )
+        logger.info("Write-behind queue initialized.")
+
+async def close_write_queue():
+    """Wait for every queued write, then drop the queue."""
+    global _write_queue
+    if _write_queue is not None:
+        try:
+            await _write_queue.flush()
+        except WriteBehindError as e:
+            logger.error(f"Write-behind queue closed with unwritten changes: {e}")
+        _write_queue = None
+
+def get_write_queue() -> WriteBehindQueue:
+    """Get the process-wide write-behind queue."""
+    if _write_queue is None:
+        raise RuntimeError("Write-behind queue is not initialized. Call init_write_queue() first.")
+    return _write_queue
@@ -0,0 +1,25 @@
+from .metrics import (
+    AGENT_TURN_SECONDS,
+    AGENT_TIME_TO_FIRST_TOKEN_SECONDS,
+    AGENT_DELEGATIONS_TOTAL,
+    AGENT_DELEGATION_HOPS,
+    TOOL_CALL_SECONDS,
+    WEBSOCKET_BROADCAST_SECONDS,
+    MONGO_WRITE_SECONDS,
+    CONTENT_TYPE_LATEST,
+    instrument_tool,
+    render_metrics
+)
+
+__all__ = [
+    "AGENT_TURN_SECONDS",
+    "AGENT_TIME_TO_FIRST_TOKEN_SECONDS",
+    "AGENT_DELEGATIONS_TOTAL",
+    "AGENT_DELEGATION_HOPS",
+    "TOOL_CALL_SECONDS",
+    "WEBSOCKET_BROADCAST_SECONDS",
+    "MONGO_WRITE_SECONDS",
+    "CONTENT_TYPE_LATEST",
+    "instrument_tool",
+    "render_metrics"
+]
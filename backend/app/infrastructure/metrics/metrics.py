@@ -0,0 +1,81 @@
+import functools
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+from app.infrastructure.tracing import get_tracer
+
+# Buckets in seconds: agent turns take seconds to minutes, socket fan-out and DB writes milliseconds
+_TURN_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+_TOOL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+AGENT_TURN_SECONDS = Histogram(
+    "jonas_agent_turn_seconds",
+    "Wall time of an agent turn, from the Runner starting to its last event.",
+    ["agent", "outcome"], # outcome: completed, error, cancelled
+    buckets=_TURN_BUCKETS,
+)
+AGENT_TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "jonas_agent_time_to_first_token_seconds",
+    "Time from the start of a turn until the first text reached the user.",
+    ["agent"], # The agent that produced the text
+    buckets=_TURN_BUCKETS,
+)
+AGENT_DELEGATIONS_TOTAL = Counter(
+    "jonas_agent_delegations_total",
+    "Transfers of control between agents.",
+    ["from_agent", "to_agent"],
+)
+AGENT_DELEGATION_HOPS = Histogram(
+    "jonas_agent_delegation_hops",
+    "Agent transfers in a single turn.",
+    ["agent"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12),
+)
+TOOL_CALL_SECONDS = Histogram(
+    "jonas_tool_call_seconds",
+    "Duration of agent tool calls, including time queued for a scheduler slot.",
+    ["agent", "tool", "status"], # status: the tool's reported status, or "exception"
+    buckets=_TOOL_BUCKETS,
+)
+WEBSOCKET_BROADCAST_SECONDS = Histogram(
+    "jonas_websocket_broadcast_seconds",
+    "Time to sequence a chat broadcast and hand it to every viewer (or the pub/sub broker).",
+    ["type"], # Frame type
+    buckets=_FAST_BUCKETS,
+)
+MONGO_WRITE_SECONDS = Histogram(
+    "jonas_mongo_write_seconds",
+    "Latency of the app's background MongoDB writes.",
+    ["collection", "operation"],
+    buckets=_FAST_BUCKETS,
+)
+
+T = TypeVar("T")
+
+def instrument_tool(tool: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Decorates an async agent tool so every call is timed into TOOL_CALL_SECONDS, labelled with the
+    calling agent (from its ToolContext), and traced as a "tool.<name>" span. functools.wraps keeps
+    the name, docstring and signature ADK builds the tool declaration from.
+    """
+    @functools.wraps(tool)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        agent = getattr(kwargs.get("tool_context"), "agent_name", None) or "unknown"
+        start_time = time.perf_counter()
+        status = "exception"
+        with get_tracer().start_as_current_span(f"tool.{tool.__name__}", attributes={"agent.name": agent}) as span:
+            try:
+                result = await tool(*args, **kwargs)
+                status = str(result.get("status", "unknown")) if isinstance(result, dict) else "unknown"
+                return result
+            finally:
+                span.set_attribute("tool.status", status)
+                TOOL_CALL_SECONDS.labels(agent=agent, tool=tool.__name__, status=status).observe(time.perf_counter() - start_time)
+    return wrapper
+
+def render_metrics() -> bytes:
+    """The process's metrics in the Prometheus text exposition format."""
+    return generate_latest()
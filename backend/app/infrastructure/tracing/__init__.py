@@ -0,0 +1,3 @@
+from .tracing import init_tracing, close_tracing, get_tracer, instrument_sql_engine
+
+__all__ = ["init_tracing", "close_tracing", "get_tracer", "instrument_sql_engine"]
@@ -0,0 +1,81 @@
+import logging
+import os
+from typing import IO, Optional
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from app.config.environment import environment
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "jonas"
+
+_tracer_provider: Optional[TracerProvider] = None
+_trace_file: Optional[IO[str]] = None
+
+def _build_exporter() -> SpanExporter:
+    global _trace_file
+    exporter = environment.TRACING_EXPORTER
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=environment.TRACING_OTLP_ENDPOINT)
+    if exporter == "file":
+        # One JSON span per line; readable offline or replayable into a collector later
+        os.makedirs(os.path.dirname(environment.TRACING_FILE_PATH) or ".", exist_ok=True)
+        _trace_file = open(environment.TRACING_FILE_PATH, "a", encoding="utf-8")
+        return ConsoleSpanExporter(out=_trace_file, formatter=lambda span: span.to_json(indent=None) + os.linesep)
+    return ConsoleSpanExporter()
+
+def _instrument_libraries():
+    """Spans for every MongoDB command (Beanie and Motor run on PyMongo). SQL engines: see instrument_sql_engine()."""
+    from opentelemetry.instrumentation.pymongo import PymongoInstrumentor
+    PymongoInstrumentor().instrument()
+
+def instrument_sql_engine(engine):
+    """
+    Spans for every query on the engine, when tracing is on. Patching create_engine would miss engines made
+    through a name imported before init_tracing() ran (sql_db's), so the engine is instrumented directly.
+    """
+    if _tracer_provider is None:
+        return
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    instrumentor = SQLAlchemyInstrumentor()
+    if instrumentor.is_instrumented_by_opentelemetry:
+        instrumentor.uninstrument() # A re-created engine; instrument() is a no-op until the old one is released
+    instrumentor.instrument(engine=engine, tracer_provider=_tracer_provider)
+
+def init_tracing():
+    """
+    Install the process-wide tracer provider and library instrumentation per TRACING_EXPORTER.
+    With "none" nothing is installed and every span in the app is a no-op.
+    """
+    global _tracer_provider
+    if _tracer_provider is not None or environment.TRACING_EXPORTER == "none":
+        return
+    _tracer_provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: environment.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(environment.TRACING_SAMPLE_RATIO))
+    )
+    _tracer_provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+    # Global, so ADK's own spans (LLM calls, tool calls) land in the same traces
+    trace.set_tracer_provider(_tracer_provider)
+    _instrument_libraries()
+    logger.info(f"Tracing initialized (exporter: {environment.TRACING_EXPORTER}).")
+
+def close_tracing():
+    """Export buffered spans and shut the provider down."""
+    global _tracer_provider, _trace_file
+    if _tracer_provider is not None:
+        _tracer_provider.shutdown()
+        _tracer_provider = None
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+
+def get_tracer() -> trace.Tracer:
+    """The app's tracer. Works (as a no-op) before or without init_tracing()."""
+    return trace.get_tracer(TRACER_NAME)
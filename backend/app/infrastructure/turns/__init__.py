@@ -0,0 +1,37 @@
+from .turn_registry import (
+    AgentTurn,
+    TurnRegistry,
+    current_turn,
+    on_turn_cancel,
+    init_turn_registry,
+    close_turn_registry,
+    get_turn_registry
+)
+from .scheduler import (
+    LLM,
+    BROWSER,
+    DB,
+    ResourcePool,
+    AgentTurnScheduler,
+    init_turn_scheduler,
+    close_turn_scheduler,
+    get_turn_scheduler
+)
+
+__all__ = [
+    "AgentTurn",
+    "TurnRegistry",
+    "current_turn",
+    "on_turn_cancel",
+    "init_turn_registry",
+    "close_turn_registry",
+    "get_turn_registry",
+    "LLM",
+    "BROWSER",
+    "DB",
+    "ResourcePool",
+    "AgentTurnScheduler",
+    "init_turn_scheduler",
+    "close_turn_scheduler",
+    "get_turn_scheduler"
+]
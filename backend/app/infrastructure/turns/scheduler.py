@@ -0,0 +1,210 @@
+import asyncio
+import contextlib
+import inspect
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app.config.environment import environment
+from .turn_registry import current_turn, _spawn
+
+logger = logging.getLogger(__name__)
+
+# (resource, position) -> None; position 0 means the slot was granted. May return an awaitable.
+PositionListener = Callable[[str, int], Any]
+
+LLM = "llm"
+BROWSER = "browser"
+DB = "db"
+
+@dataclass(eq=False)
+class _Waiter:
+    user_id: str
+    finish_tag: float
+    order: int
+    future: asyncio.Future
+    on_position: Optional[PositionListener] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    last_position: int = -1
+
+class ResourcePool:
+    """
+    Global and per-user concurrency caps for one kind of work.
+    Waiting requests are granted by weighted fair queuing: each gets a virtual finish tag
+    (max(virtual time, the user's previous tag) + 1/weight), and the eligible waiter with the
+    smallest tag goes next, so a user with many queued requests can't starve the others.
+    """
+    def __init__(self, name: str, global_limit: int, per_user_limit: int):
+        self.name = name
+        self.global_limit = global_limit
+        self.per_user_limit = per_user_limit
+        self._active_total = 0
+        self._active_by_user: Dict[str, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._last_finish_tag: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._order = itertools.count()
+        self.granted_total = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _can_run(self, user_id: str) -> bool:
+        return (
+            self._active_total < self.global_limit
+            and self._active_by_user.get(user_id, 0) < self.per_user_limit
+        )
+
+    async def acquire(self, user_id: str, weight: float = 1.0, on_position: Optional[PositionListener] = None):
+        """Waits for a slot. Callers must release() it exactly once."""
+        if not self._waiters and self._can_run(user_id):
+            self._grant(user_id, waited=0.0)
+            return
+
+        finish_tag = max(self._virtual_time, self._last_finish_tag.get(user_id, 0.0)) + 1.0 / max(weight, 0.01)
+        self._last_finish_tag[user_id] = finish_tag
+        waiter = _Waiter(
+            user_id=user_id,
+            finish_tag=finish_tag,
+            order=next(self._order),
+            future=asyncio.get_running_loop().create_future(),
+            on_position=on_position
+        )
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(user_id) # Granted just as we were cancelled
+            else:
+                if waiter in self._waiters: # _dispatch() may have dropped it already
+                    self._waiters.remove(waiter)
+                self._dispatch()
+            raise
+
+    def release(self, user_id: str):
+        self._active_total -= 1
+        remaining = self._active_by_user.get(user_id, 1) - 1
+        if remaining > 0:
+            self._active_by_user[user_id] = remaining
+        else:
+            self._active_by_user.pop(user_id, None)
+        self._dispatch()
+
+    def _grant(self, user_id: str, waited: float):
+        self._active_total += 1
+        self._active_by_user[user_id] = self._active_by_user.get(user_id, 0) + 1
+        self.granted_total += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def _dispatch(self):
+        """Grants slots to eligible waiters in finish-tag order, then tells the rest where they stand."""
+        # A waiter whose task was cancelled has a done future but stays queued until that task resumes
+        self._waiters = [w for w in self._waiters if not w.future.done()]
+        self._waiters.sort(key=lambda w: (w.finish_tag, w.order))
+        while self._active_total < self.global_limit:
+            waiter = next((w for w in self._waiters if self._can_run(w.user_id)), None)
+            if waiter is None:
+                break
+            self._waiters.remove(waiter)
+            self._virtual_time = max(self._virtual_time, waiter.finish_tag)
+            self._grant(waiter.user_id, waited=time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+            self._notify(waiter, 0)
+
+        for position, waiter in enumerate(self._waiters, start=1):
+            if waiter.last_position != position:
+                self._notify(waiter, position)
+
+        if not self._waiters and not self._active_total:
+            # Idle: reset virtual time so tags don't grow forever
+            self._virtual_time = 0.0
+            self._last_finish_tag.clear()
+
+    def _notify(self, waiter: _Waiter, position: int):
+        waiter.last_position = position
+        if waiter.on_position is None:
+            return
+        try:
+            result = waiter.on_position(self.name, position)
+            if inspect.isawaitable(result):
+                _spawn(result)
+        except Exception as e:
+            logger.warning(f"Scheduler ({self.name}): position listener failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "global_limit": self.global_limit,
+            "per_user_limit": self.per_user_limit,
+            "active": self._active_total,
+            "queued": len(self._waiters),
+            "users_active": len(self._active_by_user),
+            "users_waiting": len({w.user_id for w in self._waiters}),
+            "granted_total": self.granted_total,
+            "avg_wait_seconds": self.total_wait_seconds / self.granted_total if self.granted_total else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+
+
+class AgentTurnScheduler:
+    """Admission control for agent work: LLM turns, browser tasks and DB tool calls each have their own pool."""
+    def __init__(self, pools: Dict[str, ResourcePool], user_weights: Optional[Dict[str, float]] = None):
+        self.pools = pools
+        self.user_weights = user_weights or {}
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self,
+        resource: str,
+        user_id: Optional[str] = None,
+        on_position: Optional[PositionListener] = None
+    ) -> AsyncIterator[None]:
+        """
+        Holds a slot of `resource` for the duration of the block.
+        Inside an agent turn, the user and position listener default to the turn's.
+        """
+        turn = current_turn()
+        if user_id is None:
+            user_id = turn.user_id if turn else "anonymous"
+        if on_position is None and turn is not None:
+            on_position = turn.queue_listener
+        pool = self.pools[resource]
+        await pool.acquire(user_id, self.user_weights.get(user_id, 1.0), on_position)
+        try:
+            yield
+        finally:
+            pool.release(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+
+_turn_scheduler: Optional[AgentTurnScheduler] = None
+
+def init_turn_scheduler():
+    """Initialize the process-wide agent turn scheduler."""
+    global _turn_scheduler
+    if _turn_scheduler is None:
+        _turn_scheduler = AgentTurnScheduler(
+            pools={
+                LLM: ResourcePool(LLM, environment.AGENT_SCHEDULER_LLM_GLOBAL_LIMIT, environment.AGENT_SCHEDULER_LLM_PER_USER_LIMIT),
+                BROWSER: ResourcePool(BROWSER, environment.AGENT_SCHEDULER_BROWSER_GLOBAL_LIMIT, environment.AGENT_SCHEDULER_BROWSER_PER_USER_LIMIT),
+                DB: ResourcePool(DB, environment.AGENT_SCHEDULER_DB_GLOBAL_LIMIT, environment.AGENT_SCHEDULER_DB_PER_USER_LIMIT),
+            },
+            user_weights=environment.AGENT_SCHEDULER_USER_WEIGHTS
+        )
+        logger.info("Agent turn scheduler initialized.")
+
+def close_turn_scheduler():
+    """Drop the scheduler."""
+    global _turn_scheduler
+    _turn_scheduler = None
+
+def get_turn_scheduler() -> AgentTurnScheduler:
+    """Get the process-wide agent turn scheduler."""
+    if _turn_scheduler is None:
+        raise RuntimeError("Turn scheduler is not initialized. Call init_turn_scheduler() first.")
+    return _turn_scheduler
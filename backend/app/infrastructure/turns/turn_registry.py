@@ -0,0 +1,195 @@
+import asyncio
+import contextvars
+import inspect
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config.environment import environment
+
+logger = logging.getLogger(__name__)
+
+CancelCallback = Callable[[], Any] # May return an awaitable, which is scheduled rather than awaited
+
+_current_turn: contextvars.ContextVar[Optional["AgentTurn"]] = contextvars.ContextVar("current_agent_turn", default=None)
+
+class AgentTurn:
+    """An agent turn running as its own task, plus the hooks that tear down its external work on cancel."""
+    def __init__(self, chat_id: str, user_id: str):
+        self.chat_id = chat_id
+        self.user_id = user_id
+        self.started_at: datetime = datetime.now(timezone.utc)
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_reason: Optional[str] = None
+        # Told about this turn's queue position whenever it waits on the scheduler: (resource, position)
+        self.queue_listener: Optional[Callable[[str, int], Any]] = None
+        self._cancel_callbacks: List[CancelCallback] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_reason is not None
+
+    def on_cancel(self, callback: CancelCallback) -> Callable[[], None]:
+        """Registers a hook run when the turn is cancelled. Returns a function that unregisters it."""
+        self._cancel_callbacks.append(callback)
+        def unregister():
+            try:
+                self._cancel_callbacks.remove(callback)
+            except ValueError:
+                pass
+        return unregister
+
+    def cancel(self, reason: str) -> bool:
+        """Runs the cancel hooks (browser stop, query kill, ...) then cancels the task. False if already finished."""
+        if self.task is None or self.task.done() or self.cancelled:
+            return False
+        self.cancel_reason = reason
+        logger.info(f"Turn on chat {self.chat_id} cancelled ({reason}). Running {len(self._cancel_callbacks)} cancel hook(s).")
+        for callback in list(self._cancel_callbacks):
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    _spawn(result)
+            except Exception as e:
+                logger.warning(f"Turn on chat {self.chat_id}: cancel hook failed: {e}")
+        self.task.cancel()
+        return True
+
+
+_background: Set[asyncio.Future] = set()
+
+def _spawn(awaitable: Awaitable):
+    future = asyncio.ensure_future(awaitable)
+    _background.add(future)
+    future.add_done_callback(_background.discard)
+
+def current_turn() -> Optional[AgentTurn]:
+    """The turn the calling code runs in (also visible from asyncio.to_thread workers), if any."""
+    return _current_turn.get()
+
+def on_turn_cancel(callback: CancelCallback) -> Callable[[], None]:
+    """Registers a cancel hook on the current turn. A no-op outside of a turn."""
+    turn = current_turn()
+    if turn is None:
+        return lambda: None
+    return turn.on_cancel(callback)
+
+
+class TurnRegistry:
+    """
+    Process-wide index of running agent turns, at most one per chat.
+    Turns run detached from the socket that started them so the socket keeps reading frames,
+    and a turn nobody is watching anymore is cancelled after a grace period.
+    """
+    def __init__(self, abandon_grace_seconds: float):
+        self.abandon_grace_seconds = abandon_grace_seconds
+        self._turns: Dict[str, AgentTurn] = {}
+        self._abandon_checks: Dict[str, asyncio.Task] = {}
+        self.turns_started = 0
+        self.turns_cancelled = 0
+
+    def get(self, chat_id: str) -> Optional[AgentTurn]:
+        return self._turns.get(chat_id)
+
+    def is_running(self, chat_id: str) -> bool:
+        return chat_id in self._turns
+
+    def start(
+        self,
+        chat_id: str,
+        user_id: str,
+        run: Callable[[], Awaitable[None]]
+    ) -> Optional[AgentTurn]:
+        """Starts `run` as the chat's turn. Returns None if the chat already has one running."""
+        if self.is_running(chat_id):
+            return None
+        turn = AgentTurn(chat_id, user_id)
+        self._turns[chat_id] = turn
+        turn.task = asyncio.create_task(self._run(turn, run))
+        self.turns_started += 1
+        return turn
+
+    async def _run(self, turn: AgentTurn, run: Callable[[], Awaitable[None]]):
+        _current_turn.set(turn) # Task-local: the task runs in its own copy of the context
+        try:
+            await run()
+        except asyncio.CancelledError:
+            logger.info(f"Turn on chat {turn.chat_id} stopped ({turn.cancel_reason or 'cancelled'}).")
+        except Exception as e:
+            logger.exception(f"Turn on chat {turn.chat_id} failed: {e}")
+        finally:
+            if self._turns.get(turn.chat_id) is turn:
+                del self._turns[turn.chat_id]
+            self.clear_abandon(turn.chat_id)
+
+    def cancel(self, chat_id: str, reason: str = "client") -> bool:
+        """Cancels the chat's running turn. False if there was nothing to cancel."""
+        turn = self._turns.get(chat_id)
+        if turn is None or not turn.cancel(reason):
+            return False
+        self.turns_cancelled += 1
+        return True
+
+    def schedule_abandon(self, chat_id: str, is_watched: Callable[[], Awaitable[bool]]):
+        """After the grace period, cancels the chat's turn unless someone is watching it again. Negative grace disables."""
+        if self.abandon_grace_seconds < 0 or not self.is_running(chat_id) or chat_id in self._abandon_checks:
+            return
+        self._abandon_checks[chat_id] = asyncio.create_task(self._abandon_after_grace(chat_id, is_watched))
+
+    async def _abandon_after_grace(self, chat_id: str, is_watched: Callable[[], Awaitable[bool]]):
+        try:
+            await asyncio.sleep(self.abandon_grace_seconds)
+            if await is_watched():
+                return
+            if self.cancel(chat_id, reason="abandoned"):
+                logger.info(f"Turn on chat {chat_id} abandoned: no subscribers for {self.abandon_grace_seconds}s.")
+        except Exception as e:
+            logger.warning(f"Turn on chat {chat_id}: could not check for subscribers ({e}). Keeping it running.")
+        finally:
+            if self._abandon_checks.get(chat_id) is asyncio.current_task():
+                del self._abandon_checks[chat_id]
+
+    def clear_abandon(self, chat_id: str):
+        """Called when someone (re)subscribes to the chat."""
+        task = self._abandon_checks.pop(chat_id, None)
+        if task and task is not asyncio.current_task():
+            task.cancel()
+
+    async def cancel_all(self, reason: str = "shutdown"):
+        """Cancels every running turn and waits for them to unwind (used on shutdown)."""
+        turns = list(self._turns.values())
+        for turn in turns:
+            turn.cancel(reason)
+        await asyncio.gather(*(t.task for t in turns if t.task), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": len(self._turns),
+            "pending_abandon_checks": len(self._abandon_checks),
+            "turns_started": self.turns_started,
+            "turns_cancelled": self.turns_cancelled,
+        }
+
+
+_turn_registry: Optional[TurnRegistry] = None
+
+def init_turn_registry():
+    """Initialize the process-wide agent turn registry."""
+    global _turn_registry
+    if _turn_registry is None:
+        _turn_registry = TurnRegistry(abandon_grace_seconds=environment.AGENT_TURN_ABANDON_GRACE_SECONDS)
+        logger.info("Agent turn registry initialized.")
+
+async def close_turn_registry():
+    """Cancel every running turn and drop the registry."""
+    global _turn_registry
+    if _turn_registry:
+        await _turn_registry.cancel_all()
+        _turn_registry = None
+        logger.info("Agent turn registry closed.")
+
+def get_turn_registry() -> TurnRegistry:
+    """Get the process-wide agent turn registry."""
+    if _turn_registry is None:
+        raise RuntimeError("Turn registry is not initialized. Call init_turn_registry() first.")
+    return _turn_registry
@@ -0,0 +1,44 @@
+from .connection import ChatConnection, SendQueueMetrics
+from .envelope import BroadcastEnvelope
+from .protocols import (
+    JSON_PROTOCOL,
+    MSGPACK_PROTOCOL,
+    negotiate_protocol,
+    is_binary,
+    decode_msgpack_frame
+)
+from .event_log import (
+    ChatEventLog,
+    MemoryChatEventLog,
+    RedisChatEventLog,
+    init_chat_event_log,
+    close_chat_event_log,
+    get_chat_event_log
+)
+from .connection_registry import (
+    ConnectionRegistry,
+    init_connection_registry,
+    close_connection_registry,
+    get_connection_registry
+)
+
+__all__ = [
+    "ChatConnection",
+    "SendQueueMetrics",
+    "BroadcastEnvelope",
+    "JSON_PROTOCOL",
+    "MSGPACK_PROTOCOL",
+    "negotiate_protocol",
+    "is_binary",
+    "decode_msgpack_frame",
+    "ChatEventLog",
+    "MemoryChatEventLog",
+    "RedisChatEventLog",
+    "init_chat_event_log",
+    "close_chat_event_log",
+    "get_chat_event_log",
+    "ConnectionRegistry",
+    "init_connection_registry",
+    "close_connection_registry",
+    "get_connection_registry"
+]
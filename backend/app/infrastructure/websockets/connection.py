@@ -0,0 +1,182 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Deque, Iterable, Literal, Optional
+from fastapi import WebSocket, status
+import logging
+import uuid
+
+from .envelope import BroadcastEnvelope
+from .protocols import is_binary
+
+logger = logging.getLogger(__name__)
+
+OverflowPolicy = Literal["drop_chunks", "coalesce", "disconnect"]
+
+@dataclass
+class SendQueueMetrics:
+    """Counters shared by every connection of a registry."""
+    frames_enqueued: int = 0
+    frames_sent: int = 0
+    frames_dropped: int = 0
+    frames_coalesced: int = 0
+    slow_consumer_disconnects: int = 0
+
+class ChatConnection:
+    """
+    A live WebSocket registered for a chat on this worker.
+    Outbound frames go into a bounded queue drained by a dedicated writer task,
+    so a slow client only ever delays itself.
+    """
+    def __init__(
+        self,
+        websocket: WebSocket,
+        chat_id: str,
+        user_id: str,
+        max_queue_size: int,
+        overflow_policy: OverflowPolicy,
+        send_timeout: float,
+        metrics: SendQueueMetrics,
+        protocol: Optional[str] = None
+    ):
+        self.websocket = websocket
+        self.chat_id = chat_id
+        self.user_id = user_id
+        # Negotiated sub-protocol; None means plain JSON text frames
+        self.protocol = protocol
+        self.connection_id: str = uuid.uuid4().hex
+        self.connected_at: datetime = datetime.now(timezone.utc)
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.metrics = metrics
+        self.closed = False
+        self.frames_dropped = 0
+        self._queue: Deque[BroadcastEnvelope] = deque()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._close_code: Optional[int] = None
+        # Highest seq delivered by replay; live copies of those envelopes are skipped
+        self._replayed_through = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        """Starts the writer task."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._drain())
+
+    def enqueue(self, frame: BroadcastEnvelope) -> bool:
+        """Queues a frame without blocking. Returns False if the frame was not accepted."""
+        if self.closed:
+            return False
+        if frame.seq is not None and frame.seq <= self._replayed_through:
+            return True
+
+        if self.overflow_policy == "coalesce" and self._queue and self._queue[-1].can_merge(frame):
+            self._queue[-1] = self._queue[-1].merge(frame)
+            self.metrics.frames_coalesced += 1
+            return True
+
+        if len(self._queue) >= self.max_queue_size and not self._make_room(frame):
+            return False
+
+        self._queue.append(frame)
+        self.metrics.frames_enqueued += 1
+        self._ready.set()
+        return True
+
+    def replay(self, envelopes: Iterable[BroadcastEnvelope]):
+        """
+        Puts missed envelopes ahead of anything queued live since registration.
+        Call before start(); replayed envelopes are bounded by the event log, not the queue size.
+        """
+        first_live = next((queued.seq for queued in self._queue if queued.seq is not None), None)
+        missed = [e for e in envelopes if e.seq is None or first_live is None or e.seq < first_live]
+        self._queue.extendleft(reversed(missed))
+        self._replayed_through = max((e.seq for e in missed if e.seq is not None), default=self._replayed_through)
+        if self._queue:
+            self._ready.set()
+
+    def _make_room(self, frame: BroadcastEnvelope) -> bool:
+        """Applies the overflow policy to a full queue. Returns True if the frame can now be appended."""
+        if self.overflow_policy == "coalesce":
+            self._compact()
+            if len(self._queue) < self.max_queue_size:
+                return True
+        elif self.overflow_policy == "drop_chunks":
+            for index, queued in enumerate(self._queue):
+                if queued.is_droppable:
+                    del self._queue[index]
+                    self._record_drop()
+                    return True
+            if frame.is_droppable:
+                self._record_drop()
+                return False
+
+        # Nothing left to shed (or policy is "disconnect"): treat the client as a slow consumer
+        self._abort(status.WS_1013_TRY_AGAIN_LATER)
+        return False
+
+    def _compact(self):
+        """Merges every run of adjacent MESSAGE_UPDATE frames for the same message."""
+        compacted: Deque[BroadcastEnvelope] = deque()
+        for queued in self._queue:
+            if compacted and compacted[-1].can_merge(queued):
+                compacted[-1] = compacted[-1].merge(queued)
+                self.metrics.frames_coalesced += 1
+            else:
+                compacted.append(queued)
+        self._queue = compacted
+
+    def _record_drop(self):
+        self.frames_dropped += 1
+        self.metrics.frames_dropped += 1
+
+    def _abort(self, close_code: int):
+        logger.warning(f"Connection {self.connection_id} on chat {self.chat_id} overflowed its send queue ({self.max_queue_size}). Disconnecting slow consumer.")
+        self.metrics.slow_consumer_disconnects += 1
+        self.metrics.frames_dropped += len(self._queue)
+        self._queue.clear()
+        self._close_code = close_code
+        self.closed = True
+        self._ready.set()
+
+    async def _drain(self):
+        """Writer task: sends queued frames in order until the connection closes."""
+        try:
+            while not self.closed:
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                frame = self._queue.popleft()
+                data = frame.encode_for(self.protocol)
+                if is_binary(self.protocol):
+                    send = self.websocket.send_bytes(data)
+                else:
+                    send = self.websocket.send_text(data)
+                await asyncio.wait_for(send, timeout=self.send_timeout)
+                self.metrics.frames_sent += 1
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.warning(f"Connection {self.connection_id} on chat {self.chat_id}: send failed ({e!r}). Closing.")
+            self.closed = True
+            self._close_code = status.WS_1011_INTERNAL_ERROR
+
+        if self._close_code is not None:
+            try:
+                await self.websocket.close(code=self._close_code)
+            except Exception:
+                pass # Socket may already be closing
+
+    def close(self):
+        """Stops the writer and discards anything still queued."""
+        self.closed = True
+        self._queue.clear()
+        if self._writer and not self._writer.done():
+            self._writer.cancel()
@@ -0,0 +1,157 @@
+import logging
+from dataclasses import asdict
+from typing import Any, Collection, Dict, List, Optional
+from fastapi import WebSocket, status
+
+from app.config.environment import environment
+from .connection import ChatConnection, OverflowPolicy, SendQueueMetrics
+from .envelope import BroadcastEnvelope
+
+logger = logging.getLogger(__name__)
+
+class ConnectionRegistry:
+    """
+    Process-wide index of the WebSocket connections held by this worker.
+    Connections are indexed by chat and by user so lookups and fan-out never scan unrelated sockets.
+    """
+    def __init__(
+        self,
+        channel_prefix: str,
+        max_queue_size: int = 256,
+        overflow_policy: OverflowPolicy = "coalesce",
+        send_timeout: float = 10.0
+    ):
+        self.channel_prefix = channel_prefix
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.metrics = SendQueueMetrics()
+        self._by_chat: Dict[str, Dict[str, ChatConnection]] = {}
+        self._by_user: Dict[str, Dict[str, ChatConnection]] = {}
+
+    def register(
+        self,
+        websocket: WebSocket,
+        chat_id: str,
+        user_id: str,
+        protocol: Optional[str] = None,
+        start: bool = True
+    ) -> ChatConnection:
+        """Adds a connection to the chat and user indexes and (unless told not to, e.g. to replay first) starts its writer."""
+        connection = ChatConnection(
+            websocket=websocket,
+            chat_id=chat_id,
+            user_id=user_id,
+            max_queue_size=self.max_queue_size,
+            overflow_policy=self.overflow_policy,
+            send_timeout=self.send_timeout,
+            metrics=self.metrics,
+            protocol=protocol
+        )
+        if start:
+            connection.start()
+        self._by_chat.setdefault(chat_id, {})[connection.connection_id] = connection
+        self._by_user.setdefault(user_id, {})[connection.connection_id] = connection
+        logger.info(f"Registry: Connection {connection.connection_id} registered for chat {chat_id}. Total: {self.count_for_chat(chat_id)}")
+        return connection
+
+    def unregister(self, connection: ChatConnection) -> bool:
+        """Removes a connection from both indexes. Returns False if it was already removed."""
+        connection.close()
+        chat_connections = self._by_chat.get(connection.chat_id)
+        if not chat_connections or connection.connection_id not in chat_connections:
+            return False
+
+        del chat_connections[connection.connection_id]
+        if not chat_connections:
+            del self._by_chat[connection.chat_id]
+
+        user_connections = self._by_user.get(connection.user_id)
+        if user_connections is not None:
+            user_connections.pop(connection.connection_id, None)
+            if not user_connections:
+                del self._by_user[connection.user_id]
+
+        logger.info(f"Registry: Connection {connection.connection_id} unregistered from chat {connection.chat_id}. Remaining: {self.count_for_chat(connection.chat_id)}")
+        return True
+
+    def connections_for_chat(self, chat_id: str) -> List[ChatConnection]:
+        return list(self._by_chat.get(chat_id, {}).values())
+
+    def connections_for_user(self, user_id: str) -> List[ChatConnection]:
+        return list(self._by_user.get(user_id, {}).values())
+
+    def chat_ids(self) -> Collection[str]:
+        """Chats with at least one connection on this worker."""
+        return self._by_chat.keys()
+
+    def count_for_chat(self, chat_id: str) -> int:
+        return len(self._by_chat.get(chat_id, ()))
+
+    def enqueue_to_chat(self, chat_id: str, envelope: BroadcastEnvelope):
+        """Queues an envelope on every connection this worker holds for the chat. Never blocks on the network."""
+        connections = self.connections_for_chat(chat_id)
+        if not connections:
+            logger.debug(f"Registry: No local connections for chat {chat_id}.")
+            return
+
+        for connection in connections:
+            if connection.closed:
+                self.unregister(connection)
+                continue
+            connection.enqueue(envelope)
+
+    async def relay_channel_message(self, channel: str, message: str):
+        """Pub/sub handler: delivers a message published on a chat channel to local connections."""
+        self.enqueue_to_chat(channel[len(self.channel_prefix):], BroadcastEnvelope.from_wire(message))
+
+    async def close_all(self):
+        """Closes every registered connection (used on shutdown)."""
+        for chat_connections in list(self._by_chat.values()):
+            for connection in list(chat_connections.values()):
+                self.unregister(connection) # Stops the writer before we close underneath it
+                try:
+                    await connection.websocket.close(code=status.WS_1001_GOING_AWAY)
+                except Exception:
+                    pass # Socket may already be closing
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection counts, current send queue depths and cumulative queue counters."""
+        depths = [c.queue_depth for chat in self._by_chat.values() for c in chat.values()]
+        return {
+            "chats": len(self._by_chat),
+            "users": len(self._by_user),
+            "connections": len(depths),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            **asdict(self.metrics),
+        }
+
+
+_connection_registry: Optional[ConnectionRegistry] = None
+
+def init_connection_registry():
+    """Initialize the process-wide connection registry."""
+    global _connection_registry
+    if _connection_registry is None:
+        _connection_registry = ConnectionRegistry(
+            channel_prefix=environment.WEBSOCKET_CHANNEL_PREFIX,
+            max_queue_size=environment.WEBSOCKET_SEND_QUEUE_SIZE,
+            overflow_policy=environment.WEBSOCKET_SEND_QUEUE_OVERFLOW_POLICY,
+            send_timeout=environment.WEBSOCKET_SEND_TIMEOUT_SECONDS
+        )
+        logger.info("WebSocket connection registry initialized.")
+
+async def close_connection_registry():
+    """Close all registered connections and drop the registry."""
+    global _connection_registry
+    if _connection_registry:
+        await _connection_registry.close_all()
+        _connection_registry = None
+        logger.info("WebSocket connection registry closed.")
+
+def get_connection_registry() -> ConnectionRegistry:
+    """Get the process-wide connection registry."""
+    if _connection_registry is None:
+        raise RuntimeError("Connection registry is not initialized. Call init_connection_registry() first.")
+    return _connection_registry
@@ -0,0 +1,172 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from json.encoder import encode_basestring_ascii
+from typing import Any, Dict, Optional, Union
+import json
+
+from .protocols import encode_msgpack_frame, is_binary
+
+MESSAGE_UPDATE = "MESSAGE_UPDATE"
+STREAM_END = "STREAM_END"
+RESYNC_REQUIRED = "RESYNC_REQUIRED"
+TURN_CANCELLED = "TURN_CANCELLED"
+QUEUE_POSITION = "QUEUE_POSITION"
+
+# Separates the metadata header from the payload on the pub/sub wire.
+# Encoded JSON never contains a raw newline, so the first one is always the boundary.
+_WIRE_SEPARATOR = "\n"
+
+def _encode_optional_str(value: Optional[str]) -> str:
+    return "null" if value is None else encode_basestring_ascii(value)
+
+@dataclass(eq=False)
+class BroadcastEnvelope:
+    """
+    A broadcast payload encoded exactly once, plus the metadata routing and send queues need.
+    The same envelope is handed to every socket; nothing downstream re-parses or re-encodes the payload.
+    """
+    payload: str
+    type: Optional[str] = None
+    message_id: Optional[str] = None
+    is_error: bool = False
+    # Position in the chat's event log, stamped once at broadcast time
+    seq: Optional[int] = None
+    # Generation of the chat's event log: seqs restart from 1 whenever the log does (eviction, expiry, restart)
+    epoch: Optional[str] = None
+    _chunk: Optional[str] = field(default=None, repr=False)
+    _data: Optional[Dict[str, Any]] = field(default=None, repr=False)
+    _encoded_by_protocol: Dict[Optional[str], Union[str, bytes]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "BroadcastEnvelope":
+        """Builds an envelope from an arbitrary JSON-serializable payload dict."""
+        return cls(
+            payload=json.dumps(payload, separators=(",", ":")),
+            type=payload.get("type"),
+            message_id=payload.get("message_id"),
+            is_error=bool(payload.get("is_error", False)),
+            _chunk=payload.get("chunk"),
+            _data=payload
+        )
+
+    @classmethod
+    def message_update(cls, message_id: Optional[str], chunk: str, is_error: bool = False) -> "BroadcastEnvelope":
+        """Fast path for the hottest frame: formats the JSON directly instead of going through json.dumps."""
+        payload = (
+            f'{{"type":"{MESSAGE_UPDATE}","message_id":{_encode_optional_str(message_id)},'
+            f'"chunk":{encode_basestring_ascii(chunk)},"is_error":{"true" if is_error else "false"}}}'
+        )
+        return cls(payload=payload, type=MESSAGE_UPDATE, message_id=message_id, is_error=is_error, _chunk=chunk)
+
+    @classmethod
+    def stream_end(cls, message_id: str) -> "BroadcastEnvelope":
+        payload = f'{{"type":"{STREAM_END}","message_id":{encode_basestring_ascii(message_id)}}}'
+        return cls(payload=payload, type=STREAM_END, message_id=message_id)
+
+    @classmethod
+    def resync_required(cls, seq: int, epoch: Optional[str]) -> "BroadcastEnvelope":
+        """Tells a reconnecting client its missed frames are gone and it must reload; seq/epoch are where live frames resume."""
+        return cls(
+            payload=f'{{"type":"{RESYNC_REQUIRED}","seq":{seq},"epoch":{_encode_optional_str(epoch)}}}',
+            type=RESYNC_REQUIRED
+        )
+
+    @classmethod
+    def turn_cancelled(cls, reason: str) -> "BroadcastEnvelope":
+        return cls.from_payload({"type": TURN_CANCELLED, "reason": reason})
+
+    @classmethod
+    def queue_position(cls, resource: str, position: int) -> "BroadcastEnvelope":
+        """Where the chat's turn waits in the scheduler for `resource`; position 0 means it started."""
+        return cls.from_payload({"type": QUEUE_POSITION, "resource": resource, "position": position})
+
+    def payload_seq_tail(self) -> str:
+        """What follows the seq fields in the sequenced payload: '{"seq":N,"epoch":"E"' + tail is valid JSON."""
+        body = self.payload[1:]
+        return body if body == "}" else f",{body}"
+
+    def wire_header_prefix(self) -> str:
+        """The pub/sub header up to (not including) the seq slot: '<prefix><seq>,"<epoch>"]' closes it."""
+        return json.dumps([self.type, self.message_id, self.is_error], separators=(",", ":"))[:-1] + ","
+
+    def with_seq(self, seq: int, epoch: Optional[str]) -> "BroadcastEnvelope":
+        """Returns a copy stamped with its event log position; seq and epoch are spliced into the encoded payload, not re-encoded."""
+        return BroadcastEnvelope(
+            payload=f'{{"seq":{seq},"epoch":{_encode_optional_str(epoch)}{self.payload_seq_tail()}',
+            type=self.type,
+            message_id=self.message_id,
+            is_error=self.is_error,
+            seq=seq,
+            epoch=epoch,
+            _chunk=self._chunk,
+            _data={"seq": seq, "epoch": epoch, **self._data} if self._data is not None else None
+        )
+
+    def to_wire(self) -> str:
+        """Serializes for pub/sub: a tiny metadata header, then the already-encoded payload verbatim."""
+        seq = "null" if self.seq is None else str(self.seq)
+        return f"{self.wire_header_prefix()}{seq},{_encode_optional_str(self.epoch)}]{_WIRE_SEPARATOR}{self.payload}"
+
+    @classmethod
+    def from_wire(cls, wire: str) -> "BroadcastEnvelope":
+        """Inverse of to_wire. Only the header is parsed; the payload is passed through untouched."""
+        header, payload = wire.split(_WIRE_SEPARATOR, 1)
+        type_, message_id, is_error, seq, *rest = json.loads(header)
+        epoch = rest[0] if rest else None # Entries logged before epochs existed have none
+        return cls(payload=payload, type=type_, message_id=message_id, is_error=is_error, seq=seq, epoch=epoch)
+
+    @property
+    def chunk(self) -> Optional[str]:
+        """The MESSAGE_UPDATE chunk. Only parsed from the payload when an envelope that crossed pub/sub gets merged."""
+        if self._chunk is None and self.type == MESSAGE_UPDATE:
+            self._chunk = json.loads(self.payload).get("chunk")
+        return self._chunk
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """The payload as a dict, for non-JSON encodings. Built from metadata for the stream frames, parsed at most once otherwise."""
+        if self._data is None:
+            if self.type == MESSAGE_UPDATE:
+                self._data = {"type": MESSAGE_UPDATE, "message_id": self.message_id, "chunk": self.chunk, "is_error": self.is_error}
+            elif self.type == STREAM_END:
+                self._data = {"type": STREAM_END, "message_id": self.message_id}
+            else:
+                self._data = json.loads(self.payload)
+            if self.seq is not None:
+                self._data["seq"] = self.seq
+                self._data["epoch"] = self.epoch
+        return self._data
+
+    def encode_for(self, protocol: Optional[str]) -> Union[str, bytes]:
+        """The frame to send on a connection speaking the given sub-protocol, encoded once per protocol."""
+        if not is_binary(protocol):
+            return self.payload
+        encoded = self._encoded_by_protocol.get(protocol)
+        if encoded is None:
+            encoded = self._encoded_by_protocol[protocol] = encode_msgpack_frame(self.data)
+        return encoded
+
+    @cached_property
+    def encoded(self) -> bytes:
+        """UTF-8 bytes of the payload, computed at most once."""
+        return self.payload.encode("utf-8")
+
+    @property
+    def is_droppable(self) -> bool:
+        """Intermediate stream chunks are the only frames a slow consumer may lose."""
+        return self.type == MESSAGE_UPDATE
+
+    def can_merge(self, other: "BroadcastEnvelope") -> bool:
+        return (
+            self.type == MESSAGE_UPDATE
+            and other.type == MESSAGE_UPDATE
+            and self.message_id is not None
+            and self.message_id == other.message_id
+            and self.is_error == other.is_error
+        )
+
+    def merge(self, other: "BroadcastEnvelope") -> "BroadcastEnvelope":
+        """Returns a single MESSAGE_UPDATE carrying this envelope's chunk followed by the other's (and the later seq)."""
+        merged = BroadcastEnvelope.message_update(self.message_id, (self.chunk or "") + (other.chunk or ""), self.is_error)
+        stamped = other if other.seq is not None else self
+        return merged.with_seq(stamped.seq, stamped.epoch) if stamped.seq is not None else merged
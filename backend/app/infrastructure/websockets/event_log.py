@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Collection, Deque, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.config.environment import environment
+from .envelope import BroadcastEnvelope
+
+logger = logging.getLogger(__name__)
+
+# Ids of the chats someone on this worker is watching; their logs are never evicted or left to expire
+LiveChats = Callable[[], Collection[str]]
+
+def new_epoch() -> str:
+    return uuid.uuid4().hex[:12]
+
+class ChatEventLog:
+    """
+    Bounded, sequence-numbered history of the envelopes broadcast to each chat.
+    Lets a reconnecting client pick up exactly the frames it missed.
+    Each chat's log has an epoch; when a log starts over (evicted, expired, worker restarted) it gets a
+    new epoch and its seqs restart from 1, so clients reset instead of dropping the new frames as duplicates.
+    """
+    async def append(self, chat_id: str, envelope: BroadcastEnvelope, channel: Optional[str] = None) -> BroadcastEnvelope:
+        """Stamps the envelope with the chat's next seq (and epoch) and records it. Returns the stamped envelope."""
+        raise NotImplementedError
+
+    async def read_since(self, chat_id: str, last_seq: int, epoch: Optional[str] = None) -> Optional[List[BroadcastEnvelope]]:
+        """
+        Envelopes with seq > last_seq, oldest first. None if some of them were already evicted, or if the
+        client's epoch is not the log's current one.
+        """
+        raise NotImplementedError
+
+    async def position(self, chat_id: str) -> Tuple[int, Optional[str]]:
+        """The chat's current seq and epoch (0 and None if it has no log)."""
+        raise NotImplementedError
+
+    def close(self):
+        """Stops any background work."""
+
+
+class MemoryChatEventLog(ChatEventLog):
+    """
+    Per-worker ring buffers; only valid while every socket of a chat lives on this worker ("local" broadcast).
+    Least recently active chats are evicted past max_chats, except those with live sockets.
+    """
+    def __init__(self, max_events: int, max_chats: int, live_chats: Optional[LiveChats] = None):
+        self.max_events = max_events
+        self.max_chats = max_chats
+        self.live_chats = live_chats
+        self._seqs: "OrderedDict[str, int]" = OrderedDict()
+        self._epochs: Dict[str, str] = {}
+        self._events: Dict[str, Deque[BroadcastEnvelope]] = {}
+
+    async def append(self, chat_id: str, envelope: BroadcastEnvelope, channel: Optional[str] = None) -> BroadcastEnvelope:
+        seq = self._seqs.pop(chat_id, 0) + 1
+        self._seqs[chat_id] = seq # Re-inserted at the end: most recently used
+        if seq == 1:
+            self._epochs[chat_id] = new_epoch()
+        stamped = envelope.with_seq(seq, self._epochs[chat_id])
+        events = self._events.get(chat_id)
+        if events is None:
+            events = self._events[chat_id] = deque(maxlen=self.max_events)
+        events.append(stamped)
+
+        if len(self._seqs) > self.max_chats:
+            self._evict()
+        return stamped
+
+    def _evict(self):
+        live = self.live_chats() if self.live_chats else ()
+        # Oldest first; watched chats keep their log even if that leaves us over the cap
+        for evicted in [chat_id for chat_id in self._seqs if chat_id not in live][:len(self._seqs) - self.max_chats]:
+            del self._seqs[evicted]
+            self._epochs.pop(evicted, None)
+            self._events.pop(evicted, None)
+
+    async def read_since(self, chat_id: str, last_seq: int, epoch: Optional[str] = None) -> Optional[List[BroadcastEnvelope]]:
+        current = self._seqs.get(chat_id, 0)
+        if epoch is not None and epoch != self._epochs.get(chat_id):
+            return None # The log started over since the client saw last_seq
+        if last_seq == current:
+            return []
+        if last_seq > current:
+            return None # Log was evicted (or the worker restarted) since the client saw last_seq
+        events = self._events.get(chat_id)
+        if not events or events[0].seq > last_seq + 1:
+            return None
+        return [envelope for envelope in events if envelope.seq > last_seq]
+
+    async def position(self, chat_id: str) -> Tuple[int, Optional[str]]:
+        return self._seqs.get(chat_id, 0), self._epochs.get(chat_id)
+
+
+# KEYS: seq counter, stream, epoch. ARGV: maxlen, ttl, wire header prefix, payload tail, channel ("" = don't publish),
+# epoch to use if the log starts over. Stamping, recording and publishing in one script keeps pub/sub order
+# identical to seq order across workers.
+_APPEND_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+local epoch = redis.call('GET', KEYS[3])
+if seq == 1 or not epoch then
+    epoch = ARGV[6]
+    redis.call('SET', KEYS[3], epoch)
+end
+local payload = '{"seq":' .. seq .. ',"epoch":"' .. epoch .. '"' .. ARGV[4]
+local wire = ARGV[3] .. seq .. ',"' .. epoch .. '"]\\n' .. payload
+local ok = redis.pcall('XADD', KEYS[2], 'MAXLEN', '~', ARGV[1], seq .. '-0', 'w', wire)
+if type(ok) == 'table' and ok.err then
+    -- Counter was lost while the stream survived; start the stream over
+    redis.call('DEL', KEYS[2])
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[1], seq .. '-0', 'w', wire)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+if ARGV[5] ~= '' then
+    redis.call('PUBLISH', ARGV[5], wire)
+end
+return {seq, epoch}
+"""
+
+class RedisChatEventLog(ChatEventLog):
+    """
+    Redis-stream ring buffers shared by every worker ("redis" broadcast). Logs expire after ttl_seconds
+    without appends, except that each worker keeps refreshing the logs of the chats it has live sockets on.
+    """
+    def __init__(self, client: redis.Redis, key_prefix: str, max_events: int, ttl_seconds: int, live_chats: Optional[LiveChats] = None):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self.live_chats = live_chats
+        self._append = client.register_script(_APPEND_SCRIPT)
+        self._keepalive: Optional[asyncio.Task] = None
+        if live_chats is not None:
+            self._keepalive = asyncio.get_running_loop().create_task(self._keep_live_chats())
+
+    def _keys(self, chat_id: str) -> List[str]:
+        return [f"{self.key_prefix}{chat_id}:seq", f"{self.key_prefix}{chat_id}:events", f"{self.key_prefix}{chat_id}:epoch"]
+
+    async def append(self, chat_id: str, envelope: BroadcastEnvelope, channel: Optional[str] = None) -> BroadcastEnvelope:
+        """Also publishes the stamped envelope on `channel` (atomically with the append) when given."""
+        seq, epoch = await self._append(
+            keys=self._keys(chat_id),
+            args=[self.max_events, self.ttl_seconds, envelope.wire_header_prefix(), envelope.payload_seq_tail(), channel or "", new_epoch()]
+        )
+        return envelope.with_seq(int(seq), epoch)
+
+    async def _keep_live_chats(self):
+        """Refreshes the TTL of watched chats' logs well before it runs out, so an idle open tab keeps its seqs."""
+        interval = max(1.0, self.ttl_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                chat_ids = list(self.live_chats())
+                if not chat_ids:
+                    continue
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for chat_id in chat_ids:
+                        for key in self._keys(chat_id):
+                            pipe.expire(key, self.ttl_seconds)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Chat event log: failed to refresh live chat logs: {e}")
+
+    def close(self):
+        if self._keepalive is not None:
+            self._keepalive.cancel()
+            self._keepalive = None
+
+    async def read_since(self, chat_id: str, last_seq: int, epoch: Optional[str] = None) -> Optional[List[BroadcastEnvelope]]:
+        stream_key = self._keys(chat_id)[1]
+        current, current_epoch = await self.position(chat_id)
+        if epoch is not None and epoch != current_epoch:
+            return None
+        if last_seq == current:
+            return []
+        if last_seq > current:
+            return None
+        entries = await self.client.xrange(stream_key, min=f"{last_seq + 1}-0", max="+")
+        if not entries or int(entries[0][0].split("-")[0]) != last_seq + 1:
+            return None
+        return [BroadcastEnvelope.from_wire(fields["w"]) for _, fields in entries]
+
+    async def position(self, chat_id: str) -> Tuple[int, Optional[str]]:
+        seq_key, _, epoch_key = self._keys(chat_id)
+        seq, epoch = await self.client.mget(seq_key, epoch_key)
+        return int(seq or 0), epoch
+
+
+_chat_event_log: Optional[ChatEventLog] = None
+
+def init_chat_event_log(client: Optional[redis.Redis] = None, live_chats: Optional[LiveChats] = None):
+    """
+    Initialize the chat event log: Redis-backed when a client is given, in-memory otherwise.
+    live_chats lists the chats with sockets on this worker, whose logs must not be evicted or expire.
+    """
+    global _chat_event_log
+    if _chat_event_log is None:
+        if client is not None:
+            _chat_event_log = RedisChatEventLog(
+                client=client,
+                key_prefix=environment.WEBSOCKET_EVENT_LOG_KEY_PREFIX,
+                max_events=environment.WEBSOCKET_EVENT_LOG_SIZE,
+                ttl_seconds=environment.WEBSOCKET_EVENT_LOG_TTL_SECONDS,
+                live_chats=live_chats
+            )
+        else:
+            _chat_event_log = MemoryChatEventLog(
+                max_events=environment.WEBSOCKET_EVENT_LOG_SIZE,
+                max_chats=environment.WEBSOCKET_EVENT_LOG_MAX_CHATS,
+                live_chats=live_chats
+            )
+        logger.info(f"Chat event log initialized ({type(_chat_event_log).__name__}).")
+
+def close_chat_event_log():
+    """Drop the chat event log."""
+    global _chat_event_log
+    if _chat_event_log is not None:
+        _chat_event_log.close()
+    _chat_event_log = None
+
+def get_chat_event_log() -> ChatEventLog:
+    """Get the process-wide chat event log."""
+    if _chat_event_log is None:
+        raise RuntimeError("Chat event log is not initialized. Call init_chat_event_log() first.")
+    return _chat_event_log
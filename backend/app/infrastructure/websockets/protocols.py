@@ -0,0 +1,60 @@
+from typing import Any, Dict, Iterable, Optional
+import zlib
+import msgpack
+
+from app.config.environment import environment
+
+# Sub-protocols a client may offer in Sec-WebSocket-Protocol.
+# JSON text frames remain the default when nothing (or nothing we know) is offered.
+JSON_PROTOCOL = "jonas.json.v1"
+MSGPACK_PROTOCOL = "jonas.msgpack.v1"
+SUPPORTED_PROTOCOLS = (MSGPACK_PROTOCOL, JSON_PROTOCOL)
+
+# First byte of every binary frame: how the MessagePack body that follows is stored
+FLAG_RAW = 0x00
+FLAG_ZLIB = 0x01
+
+def negotiate_protocol(offered: Iterable[str]) -> Optional[str]:
+    """Picks the sub-protocol to accept, honouring our preference order. None means plain JSON."""
+    offered = set(offered)
+    for protocol in SUPPORTED_PROTOCOLS:
+        if protocol in offered:
+            return protocol
+    return None
+
+def is_binary(protocol: Optional[str]) -> bool:
+    return protocol == MSGPACK_PROTOCOL
+
+def encode_msgpack_frame(data: Dict[str, Any]) -> bytes:
+    """Packs a payload as MessagePack, deflating it when it exceeds the compression threshold."""
+    body = msgpack.packb(data, use_bin_type=True)
+    if len(body) >= environment.WEBSOCKET_BINARY_COMPRESS_THRESHOLD_BYTES:
+        compressed = zlib.compress(body, environment.WEBSOCKET_BINARY_COMPRESS_LEVEL)
+        if len(compressed) < len(body):
+            return bytes((FLAG_ZLIB,)) + compressed
+    return bytes((FLAG_RAW,)) + body
+
+def decode_msgpack_frame(frame: bytes, max_bytes: Optional[int] = None) -> Any:
+    """
+    Inverse of encode_msgpack_frame (used for inbound binary frames). Raises ValueError on malformed input
+    or when the body, once inflated, would exceed max_bytes (WEBSOCKET_MAX_INBOUND_BYTES by default).
+    """
+    if not frame:
+        raise ValueError("Empty binary frame.")
+    if max_bytes is None:
+        max_bytes = environment.WEBSOCKET_MAX_INBOUND_BYTES
+    flag, body = frame[0], frame[1:]
+    try:
+        if flag == FLAG_ZLIB:
+            # Inflate at most max_bytes so a small hostile frame can't expand into gigabytes
+            decompressor = zlib.decompressobj()
+            body = decompressor.decompress(body, max_bytes)
+            if decompressor.unconsumed_tail or not decompressor.eof:
+                raise ValueError(f"Binary frame inflates beyond {max_bytes} bytes or is truncated.")
+        elif flag != FLAG_RAW:
+            raise ValueError(f"Unknown binary frame flag: {flag:#x}")
+        if len(body) > max_bytes:
+            raise ValueError(f"Binary frame exceeds {max_bytes} bytes.")
+        return msgpack.unpackb(body, raw=False)
+    except (zlib.error, msgpack.UnpackException) as e:
+        raise ValueError(f"Malformed binary frame: {e}") from e
@@ -1,31 +1,92 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from app.config.environment import environment
-from app.infrastructure.database.internal import init_db
+from app.config.dependencies.repositories import get_chat_repository
+from app.infrastructure.database.internal import init_db, init_write_queue, close_write_queue
 from app.infrastructure.database.external import init_external_mongo_client, init_sql_engine, close_external_mongo_client, close_sql_engine
-from app.infrastructure.caching import init_redis_pool, close_redis_pool
+from app.infrastructure.caching import init_redis_pool, close_redis_pool, get_redis_client, init_pubsub_broker, close_pubsub_broker
+from app.infrastructure.websockets import init_connection_registry, close_connection_registry, get_connection_registry, init_chat_event_log, close_chat_event_log
+from app.infrastructure.metrics import CONTENT_TYPE_LATEST, render_metrics
+from app.infrastructure.tracing import init_tracing, close_tracing
+from app.infrastructure.blobs import init_blob_store, close_blob_store
+from app.infrastructure.adk import init_session_service, close_session_service, init_runner_registry, close_runner_registry
+from app.infrastructure.turns import init_turn_registry, close_turn_registry, init_turn_scheduler, close_turn_scheduler
 from app.features.auth.controllers import auth_controller
 from app.features.chat.controllers import chat_controller
+from app.features.agent.controllers import agent_controller
 from app.middlewares import setup_middleware, setup_exception_handlers
 from app.infrastructure.logging import setup_logging
 from app.infrastructure.security import limiter
+import asyncio
 import contextlib
+import logging
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+async def sweep_stale_streams():
+    """
+    Streams left 'streaming' by a worker that died keep their last checkpoint but can't finish anymore.
+    Any worker can die at any time, so this runs on every worker for its whole life, not just at startup.
+    """
+    while True:
+        try:
+            stale_before = datetime.now(timezone.utc) - timedelta(seconds=environment.AGENT_STREAM_STALE_SECONDS)
+            aborted = await get_chat_repository().abort_stale_streaming_messages(stale_before)
+            if aborted:
+                logger.info(f"Marked {aborted} interrupted streaming message(s) as aborted.")
+        except Exception as e:
+            logger.warning(f"Stale stream sweep failed: {e}")
+        await asyncio.sleep(environment.AGENT_STREAM_SWEEP_INTERVAL_SECONDS)
 
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
+    # --- Tracing ---
+    init_tracing() # First, so the database clients created below are instrumented
+
     # --- Internal DBs ---
-    await init_db()
+    mongo_client = await init_db()
     init_redis_pool()
+    init_write_queue()
+    init_blob_store(mongo_client[environment.MONGODB_DB_NAME])
+    stale_stream_sweeper = asyncio.create_task(sweep_stale_streams())
+
+    # --- WebSockets ---
+    init_connection_registry()
+    if environment.WEBSOCKET_BROADCAST_BACKEND == "redis":
+        init_pubsub_broker()
+        init_chat_event_log(get_redis_client(), live_chats=get_connection_registry().chat_ids)
+    else:
+        init_chat_event_log(live_chats=get_connection_registry().chat_ids)
 
     # --- External DBs ---
     init_sql_engine()
     init_external_mongo_client()
 
+    # --- Agent Sessions ---
+    init_session_service()
+    init_runner_registry()
+
+    # --- Agent Turns ---
+    init_turn_registry()
+    init_turn_scheduler()
+
     yield
 
     # --- Cleanup ---
+    stale_stream_sweeper.cancel()
+    await close_turn_registry() # Turns still broadcast while unwinding, so stop them first
+    close_turn_scheduler()
+    close_runner_registry()
+    await close_session_service() # After the turns, so their final writes are flushed
+    await close_write_queue()
+    await close_connection_registry()
+    await close_pubsub_broker()
+    close_chat_event_log()
+    close_blob_store()
     close_redis_pool()
     close_external_mongo_client()
     close_sql_engine()
+    close_tracing()
 
 app = FastAPI(
     title=environment.PROJECT_NAME,
@@ -49,8 +110,14 @@ setup_middleware(app)
 api_prefix = f"{environment.API_PREFIX}{environment.API_VERSION_PREFIX}"
 app.include_router(auth_controller.router, prefix=api_prefix)
 app.include_router(chat_controller.router, prefix=api_prefix)
+app.include_router(agent_controller.router, prefix=api_prefix)
 
 @app.get("/")
 async def root():
     """Root endpoint."""
-    return {"message": "Welcome to the API"}
\ No newline at end of file
+    return {"message": "Welcome to the API"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (agent turn, tool, WebSocket and Mongo write latencies)."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
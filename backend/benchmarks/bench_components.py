@@ -0,0 +1,255 @@
+"""
+Micro-benchmarks of the hot components of an agent turn, with JSON baselines so a change is compared
+against measured numbers:
+
+*   ChatRepository.find_messages_by_ids with large In lists, and find_messages_by_chat_id's indexed range
+    query for comparison (mongomock, or --mongo-url for a real mongod)
+*   MessageData.model_validate on a Message document, and model_dump_json as broadcast
+*   ADKRepository._format_db_messages_to_adk_events on a 40-message history
+*   The _build_history_events hot path (build_history_window with per-message truncate_to_tokens, folding
+    and the ADK event formatter) over AGENT_HISTORY_MAX_MESSAGES long messages
+*   ADKService._save_tool_response_as_context parsing a browser (JSON string) and a database (dict) result
+*   execute_mongo_query's JSON round trip of debug_logs documents (the mongomock find is included)
+*   extract_result scanning browser-use output for a ```json block
+
+Needs the bench-only packages in benchmarks/requirements.txt.
+Run from backend/:  python -m benchmarks.bench_components [--filter TEXT] [--save FILE] [--compare FILE]
+With --compare, cases slower than the baseline by more than --threshold percent are flagged and the
+exit status is 1.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import mongomock
+from beanie import PydanticObjectId, init_beanie
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.agents.browser_agent.helpers import browser_use_helper
+from app.agents.database_agent.helpers import database_helper
+from app.config.environment import environment
+from app.features.agent.helpers import build_history_window, fold_into_summary
+from app.features.agent.repositories import ADKRepository
+from app.features.agent.services import ADKService
+from app.features.chat.models import Chat, Message
+from app.features.chat.repositories import ChatRepository
+from app.features.chat.schemas import MessageData
+
+Case = Callable[[], Union[None, Awaitable[None]]]
+
+# --- Fixtures --- #
+
+def make_messages(count: int, chat_id: Optional[PydanticObjectId] = None, repeats: int = 15) -> List[Message]:
+    """Alternating user/agent text messages, a few hundred characters each (27 per repeat)."""
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    return [
+        Message(
+            id=PydanticObjectId(),
+            chat_id=chat_id,
+            sender_type="user" if i % 2 == 0 else "agent",
+            content=f"Message {i}: " + "lorem ipsum dolor sit amet " * repeats,
+            author_id=PydanticObjectId() if i % 2 == 0 else None,
+            created_at=start + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+def make_debug_logs(count: int) -> List[Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "_id": ObjectId(),
+            "transaction_id": "tx-bench",
+            "timestamp": now + timedelta(milliseconds=i),
+            "level": "info",
+            "message": f"step {i} " + "payload " * 20,
+            "context": {"attempt": i % 3, "tags": ["bench", "debug"], "amount": i * 1.5},
+        }
+        for i in range(count)
+    ]
+
+def make_browser_output(rows: int) -> str:
+    page = {"title": "Example page", "items": [{"name": f"Item {i}", "price": i * 2.5, "url": f"https://example.com/{i}"} for i in range(rows)]}
+    return json.dumps(page)
+
+class BrowserHistory:
+    """The two AgentHistoryList methods extract_result reads."""
+    def __init__(self, extracted: List[str], final: Optional[str]):
+        self._extracted = extracted
+        self._final = final
+
+    def extracted_content(self) -> List[str]:
+        return self._extracted
+
+    def final_result(self) -> Optional[str]:
+        return self._final
+
+class NullContextService:
+    """Accepts context saves without writing, so only the parsing is timed."""
+    async def save_agent_context(self, **kwargs):
+        return None
+
+# --- Cases --- #
+
+async def build_cases(mongo_url: Optional[str]) -> Dict[str, Case]:
+    client = AsyncIOMotorClient(mongo_url) if mongo_url else AsyncMongoMockClient()
+    await init_beanie(database=client["jonas_bench"], document_models=[Chat, Message])
+    await Message.delete_all()
+
+    stored_chat_id = PydanticObjectId()
+    stored = make_messages(5000, chat_id=stored_chat_id)
+    await Message.insert_many(stored)
+    chat_repository = ChatRepository(write_queue=None) # Reads only; nothing is deferred
+    ids = [message.id for message in stored]
+
+    def find_by_ids(count: int) -> Case:
+        async def run():
+            await chat_repository.find_messages_by_ids(ids[:count], limit=40)
+        return run
+
+    async def find_by_chat_id():
+        await chat_repository.find_messages_by_chat_id(stored_chat_id, limit=40)
+
+    message = stored[0]
+    message_data = MessageData.model_validate(message)
+
+    adk_repository = ADKRepository(chat_repository=chat_repository, session_service=None)
+    history = make_messages(40)
+    # ~8k characters each: over AGENT_HISTORY_MESSAGE_MAX_TOKENS, so every message is truncated
+    long_history = make_messages(environment.AGENT_HISTORY_MAX_MESSAGES, repeats=300)
+
+    def build_history_events():
+        """ADKRepository._build_history_events minus the summary write to the chat."""
+        window = build_history_window(
+            long_history,
+            token_budget=environment.AGENT_HISTORY_TOKEN_BUDGET - environment.AGENT_HISTORY_SUMMARY_MAX_TOKENS,
+            message_max_tokens=environment.AGENT_HISTORY_MESSAGE_MAX_TOKENS
+        )
+        summary = fold_into_summary(None, window.folded, environment.AGENT_HISTORY_SUMMARY_MAX_TOKENS) if window.folded else None
+        adk_repository._format_db_messages_to_adk_events(window.messages, window.contents, from_first_user_message=False, summary=summary)
+
+    adk_service = SimpleNamespace(context_service=NullContextService()) # The parser only touches context_service
+    browser_response = {"status": "success", "data": make_browser_output(200)}
+    database_response = {"status": "success", "result": [{"id": i, "status": "ok", "amount": i * 10} for i in range(200)]}
+    chat_id = PydanticObjectId()
+
+    debug_logs = mongomock.MongoClient()["external_bench"]
+    debug_logs["debug_logs"].insert_many(make_debug_logs(100))
+    database_helper.get_external_mongo_db = lambda: debug_logs
+
+    noise = ["Clicked element 12", "Scrolled down by 500px", "Navigated to https://example.com/list"] * 20
+    browser_history = BrowserHistory(noise + ["Extracted page:\n```json\n" + make_browser_output(200) + "\n```"], None)
+
+    return {
+        "find_messages_by_ids[100]": find_by_ids(100),
+        "find_messages_by_ids[1000]": find_by_ids(1000),
+        "find_messages_by_ids[5000]": find_by_ids(5000),
+        "find_messages_by_chat_id[5000]": find_by_chat_id,
+        "MessageData.model_validate": lambda: MessageData.model_validate(message),
+        "MessageData.model_dump_json": lambda: message_data.model_dump_json(by_alias=True, exclude_none=True),
+        "format_db_messages_to_adk_events[40]": lambda: adk_repository._format_db_messages_to_adk_events(history),
+        f"build_history_events[{len(long_history)} long]": build_history_events,
+        "save_tool_response_as_context[browser]": lambda: ADKService._save_tool_response_as_context(adk_service, chat_id, "browser_agent", "browser_use_tool", browser_response),
+        "save_tool_response_as_context[database]": lambda: ADKService._save_tool_response_as_context(adk_service, chat_id, "database_agent", "query_sql_database", database_response),
+        "execute_mongo_query[100]": lambda: database_helper.execute_mongo_query({"transaction_id": "tx-bench"}, limit=100),
+        "extract_result": lambda: browser_use_helper.extract_result(browser_history),
+    }
+
+# --- Measurement --- #
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "median_us": statistics.median(ordered),
+        "p95_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "iterations": len(ordered),
+    }
+
+async def measure(fn: Case, min_seconds: float, min_iterations: int) -> Dict[str, float]:
+    """Times fn (awaiting it if it returns an awaitable) until both minimums are met."""
+    async def call():
+        result = fn()
+        if inspect.isawaitable(result):
+            await result
+
+    await call() # Warm-up
+    samples = []
+    deadline = time.perf_counter() + min_seconds
+    while len(samples) < min_iterations or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return summarize(samples)
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Prints each case's median against the baseline and returns the cases that regressed."""
+    regressions = []
+    print(f"\n{'case':<44} {'baseline':>12} {'now':>12} {'change':>9}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<44} {'-':>12} {result['median_us']:>10.1f}us {'new':>9}")
+            continue
+        change = (result["median_us"] - before["median_us"]) / before["median_us"] * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<44} {before['median_us']:>10.1f}us {result['median_us']:>10.1f}us {change:>+8.1f}%{flag}")
+    return regressions
+
+async def run(args) -> Dict[str, Dict[str, float]]:
+    cases = await build_cases(args.mongo_url)
+    results = {}
+    for name, fn in cases.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = await measure(fn, args.min_seconds, args.min_iterations)
+        print(f"{name:<44} median {results[name]['median_us']:>10.1f} us   p95 {results[name]['p95_us']:>10.1f} us")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Minimum time spent per case")
+    parser.add_argument("--min-iterations", type=int, default=50)
+    parser.add_argument("--mongo-url", help="Run the repository cases against this mongod instead of mongomock")
+    parser.add_argument("--save", help="Write the results to this baseline file")
+    parser.add_argument("--compare", help="Compare against this baseline file")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    if args.save:
+        baseline = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "mongo": "mongod" if args.mongo_url else "mongomock",
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0f}%")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
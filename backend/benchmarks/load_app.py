@@ -0,0 +1,133 @@
+"""
+The FastAPI app wired to local stand-ins, for benchmarks.load_ws:
+
+*   MongoDB: mongomock-motor in process, or a real mongod when BENCH_MONGO_URL is set.
+*   Redis (only with WEBSOCKET_BROADCAST_BACKEND=redis): fakeredis, or a real Redis when BENCH_REAL_REDIS=1.
+*   Models: ReplayLlm (LLM_BACKEND=replay) on the fixture in LLM_FIXTURE_PATH.
+*   Tools: browser_use_tool, query_sql_database and query_mongodb_database return canned results
+    after BENCH_TOOL_DELAY_SECONDS, holding the same scheduler slot as the real tool.
+
+It adds two routes: POST /__bench/seed creates users with a chat each and returns their tokens,
+and GET /__bench/stats reports the worker's RSS and event-loop lag.
+Served by benchmarks.load_ws (uvicorn benchmarks.load_app:app); not meant to be run directly.
+"""
+import asyncio
+import functools
+import os
+import resource
+import time
+from typing import Any, Callable, Dict, List
+
+# Settings are read when app.config.environment is imported, so defaults go in first
+os.environ.setdefault("LLM_BACKEND", "replay")
+os.environ.setdefault("BLOB_STORE_BACKEND", "local")
+os.environ.setdefault("TRACING_EXPORTER", "none")
+os.environ.setdefault("WEBSOCKET_BROADCAST_BACKEND", "local")
+if os.environ.get("BENCH_MONGO_URL"):
+    os.environ["MONGODB_URL"] = os.environ["BENCH_MONGO_URL"]
+
+from app.infrastructure.database.internal import main_mongo_db
+from app.infrastructure.caching import redis as redis_module
+
+if not os.environ.get("BENCH_MONGO_URL"):
+    from mongomock_motor import AsyncMongoMockClient
+    main_mongo_db.AsyncIOMotorClient = AsyncMongoMockClient
+
+if os.environ.get("BENCH_REAL_REDIS") != "1":
+    import fakeredis
+    import redis.asyncio as redis
+    # init_redis_pool() leaves an existing pool alone
+    redis_module._redis_pool = redis.ConnectionPool(
+        connection_class=fakeredis.aioredis.FakeConnection,
+        server=fakeredis.FakeServer(),
+        decode_responses=True
+    )
+
+from fastapi import Query
+
+from app.main import app
+from app.agents.browser_agent.agent import browser_agent
+from app.agents.database_agent.agent import database_agent
+from app.features.auth.services.jwt_service import JWTService
+from app.features.chat.models import Chat
+from app.features.user.models import User
+from app.infrastructure.turns import BROWSER, DB, get_turn_scheduler
+
+TOOL_DELAY_SECONDS = float(os.environ.get("BENCH_TOOL_DELAY_SECONDS", "0.5"))
+
+CANNED_TOOL_RESULTS: Dict[str, tuple] = {
+    "browser_use_tool": (BROWSER, {"status": "success", "result": {"title": "Example page", "content": "Lorem ipsum dolor sit amet. " * 40}}),
+    "query_sql_database": (DB, {"status": "success", "result": [{"id": i, "status": "ok", "amount": i * 10} for i in range(25)]}),
+    "query_mongodb_database": (DB, {"status": "success", "result": [{"transaction_id": "tx-1", "level": "info", "message": f"step {i}"} for i in range(25)]}),
+}
+
+def stub_tool(tool: Callable) -> Callable:
+    """Same name, signature and docstring as the tool (ADK builds its declaration from them); canned result."""
+    kind, result = CANNED_TOOL_RESULTS[tool.__name__]
+
+    @functools.wraps(tool)
+    async def stub(*args, **kwargs) -> Dict[str, Any]:
+        async with get_turn_scheduler().slot(kind):
+            await asyncio.sleep(TOOL_DELAY_SECONDS)
+        return dict(result)
+    return stub
+
+for agent in (browser_agent, database_agent):
+    agent.tools = [stub_tool(tool) if getattr(tool, "__name__", None) in CANNED_TOOL_RESULTS else tool for tool in agent.tools]
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes a sleeping task; the lag is time other work held the loop."""
+    def __init__(self, interval_seconds: float = 0.05):
+        self.interval_seconds = interval_seconds
+        self.samples: List[float] = []
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval_seconds)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval_seconds))
+
+    def reset(self):
+        self.samples = []
+
+loop_lag = LoopLagMonitor()
+
+def rss_bytes() -> Dict[str, int]:
+    """Current and peak resident set size of this worker."""
+    current = 0
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # KiB on Linux
+    return {"current": current, "peak": peak}
+
+
+@app.post("/__bench/seed", include_in_schema=False)
+async def bench_seed(clients: int = Query(1, ge=1)):
+    """Creates one user with one chat per client and returns their access tokens and chat ids."""
+    jwt_service = JWTService()
+    run_id = int(time.time() * 1000)
+    sessions = []
+    for i in range(clients):
+        email = f"bench-{run_id}-{i}@example.com"
+        user = await User(email=email).create()
+        chat = await Chat(name=f"Bench chat {i}", owner_id=user.id).create()
+        sessions.append({"token": jwt_service.create_tokens(email)["access_token"], "chat_id": str(chat.id)})
+    loop_lag.start()
+    loop_lag.reset()
+    return {"sessions": sessions}
+
+@app.get("/__bench/stats", include_in_schema=False)
+async def bench_stats():
+    """RSS and the event-loop lag samples collected since the last seed."""
+    return {"rss_bytes": rss_bytes(), "loop_lag_seconds": loop_lag.samples}
@@ -0,0 +1,220 @@
+"""
+End-to-end WebSocket load test: starts the app with local stand-ins (benchmarks.load_app: mongomock or a
+local mongod, fakeredis, replayed model calls, canned browser/SQL/Mongo tools), then drives N concurrent
+authenticated clients through /chats/ws/{chat_id}, each sending T messages one turn at a time.
+
+Reports p50/p95/p99 of time to first chunk (message sent -> first agent text), inter-chunk gap and turn
+duration (message sent -> STREAM_END or the final agent message), frames and turns per second, and the
+server's RSS and event-loop lag. Without --fixture, every model call replays one synthetic text reply.
+
+Needs the bench-only packages in benchmarks/requirements.txt.
+Run from backend/:  python -m benchmarks.load_ws [--clients N] [--turns N] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+@dataclass
+class ClientStats:
+    time_to_first_chunk: List[float] = field(default_factory=list)
+    chunk_gaps: List[float] = field(default_factory=list)
+    turn_durations: List[float] = field(default_factory=list)
+    frames: int = 0
+    errors: int = 0
+
+def write_synthetic_fixture(path: str, reply_chars: int):
+    """One recorded jonas_agent call with a plain text reply; ReplayLlm falls back to it for every request."""
+    text = ("The quick brown fox jumps over the lazy dog. " * (reply_chars // 45 + 1))[:reply_chars]
+    call = {
+        "agent": "jonas_agent",
+        "request_key": "",
+        "responses": [{"content": {"role": "model", "parts": [{"text": text}]}}],
+        "gaps": [0.0],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(call) + "\n")
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def summarize(samples: List[float]) -> Dict[str, Optional[float]]:
+    return {"count": len(samples), "p50": percentile(samples, 0.50), "p95": percentile(samples, 0.95), "p99": percentile(samples, 0.99)}
+
+def is_agent_text(frame: dict) -> bool:
+    return frame.get("sender_type") == "agent" and frame.get("type") == "text"
+
+def ends_turn(frame: dict) -> bool:
+    if frame.get("type") in ("STREAM_END", "TURN_CANCELLED", "error"):
+        return True
+    return is_agent_text(frame) and frame.get("status", "complete") != "streaming"
+
+async def run_client(ws_url: str, turns: int, stats: ClientStats):
+    async with websockets.connect(ws_url, max_size=None) as websocket:
+        for turn in range(turns):
+            sent_at = time.perf_counter()
+            first_chunk_at: Optional[float] = None
+            last_chunk_at: Optional[float] = None
+            await websocket.send(json.dumps({"content": f"Load test message {turn}: summarize what you can do."}))
+            while True:
+                frame = json.loads(await websocket.recv())
+                now = time.perf_counter()
+                stats.frames += 1
+                is_chunk = frame.get("type") == "MESSAGE_UPDATE" or (is_agent_text(frame) and frame.get("content"))
+                if is_chunk:
+                    if first_chunk_at is None:
+                        first_chunk_at = now
+                        stats.time_to_first_chunk.append(now - sent_at)
+                    elif frame.get("type") == "MESSAGE_UPDATE":
+                        stats.chunk_gaps.append(now - last_chunk_at)
+                    last_chunk_at = now
+                if ends_turn(frame):
+                    if frame.get("type") == "error":
+                        stats.errors += 1
+                    stats.turn_durations.append(now - sent_at)
+                    break
+
+def start_server(args, fixture_path: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "LLM_BACKEND": "replay",
+        "LLM_FIXTURE_PATH": fixture_path,
+        "LLM_REPLAY_FIRST_TOKEN_DELAY_SECONDS": str(args.first_token_delay),
+        "LLM_REPLAY_CHUNK_DELAY_SECONDS": str(args.chunk_delay),
+        "BENCH_TOOL_DELAY_SECONDS": str(args.tool_delay),
+        "WEBSOCKET_BROADCAST_BACKEND": args.broadcast_backend,
+        "AGENT_SCHEDULER_LLM_GLOBAL_LIMIT": str(args.llm_slots),
+    })
+    if args.mongo_url:
+        env["BENCH_MONGO_URL"] = args.mongo_url
+    if args.real_redis:
+        env["BENCH_REAL_REDIS"] = "1"
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.load_app:app", "--host", args.host, "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Server did not come up within {timeout:.0f}s")
+        await asyncio.sleep(0.2)
+
+def format_seconds(value: Optional[float]) -> str:
+    return "      n/a" if value is None else f"{value * 1000:>7.1f}ms"
+
+def print_report(results: dict):
+    print(f"{results['clients']} clients x {results['turns']} turns in {results['wall_seconds']:.1f}s "
+          f"({results['turns_completed']} turns, {results['errors']} errors)")
+    for name in ("time_to_first_chunk", "inter_chunk_gap", "turn_duration", "loop_lag"):
+        summary = results[name]
+        print(f"{name:<22} p50 {format_seconds(summary['p50'])}   p95 {format_seconds(summary['p95'])}   "
+              f"p99 {format_seconds(summary['p99'])}   (n={summary['count']})")
+    print(f"{'throughput':<22} {results['frames_per_second']:.1f} frames/s   {results['turns_per_second']:.1f} turns/s")
+    rss = results["rss_bytes"]
+    print(f"{'server RSS':<22} {rss['current'] / 2**20:.1f} MiB (peak {rss['peak'] / 2**20:.1f} MiB)")
+
+async def run(args) -> dict:
+    base_url = f"http://{args.host}:{args.port}"
+    api_prefix = "/api/v1"
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await wait_until_ready(client, args.startup_timeout)
+        response = await client.post("/__bench/seed", params={"clients": args.clients})
+        response.raise_for_status()
+        sessions = response.json()["sessions"]
+
+        ws_base = f"ws://{args.host}:{args.port}{api_prefix}/chats/ws"
+        all_stats = [ClientStats() for _ in sessions]
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(run_client(f"{ws_base}/{session['chat_id']}?token={session['token']}", args.turns, stats)
+              for session, stats in zip(sessions, all_stats)),
+            return_exceptions=True,
+        )
+        wall_seconds = time.perf_counter() - start
+
+        server_stats = (await client.get("/__bench/stats")).json()
+
+    failed = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    for outcome in failed[:3]:
+        print(f"client failed: {outcome!r}", file=sys.stderr)
+    merged = ClientStats()
+    for stats in all_stats:
+        merged.time_to_first_chunk += stats.time_to_first_chunk
+        merged.chunk_gaps += stats.chunk_gaps
+        merged.turn_durations += stats.turn_durations
+        merged.frames += stats.frames
+        merged.errors += stats.errors
+    return {
+        "clients": args.clients,
+        "turns": args.turns,
+        "wall_seconds": wall_seconds,
+        "turns_completed": len(merged.turn_durations),
+        "errors": merged.errors + len(failed),
+        "time_to_first_chunk": summarize(merged.time_to_first_chunk),
+        "inter_chunk_gap": summarize(merged.chunk_gaps),
+        "turn_duration": summarize(merged.turn_durations),
+        "frames_per_second": merged.frames / wall_seconds,
+        "turns_per_second": len(merged.turn_durations) / wall_seconds,
+        "loop_lag": summarize(server_stats["loop_lag_seconds"]),
+        "rss_bytes": server_stats["rss_bytes"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=5, help="Messages each client sends, one turn at a time")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixture", help="Recorded model calls to replay (LLM_BACKEND=record output)")
+    parser.add_argument("--reply-chars", type=int, default=600, help="Length of the synthetic reply when no fixture is given")
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="Seconds before each replayed model response")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds between replayed streamed chunks")
+    parser.add_argument("--tool-delay", type=float, default=0.5, help="Seconds each stubbed tool call takes")
+    parser.add_argument("--llm-slots", type=int, default=8, help="AGENT_SCHEDULER_LLM_GLOBAL_LIMIT for the server")
+    parser.add_argument("--broadcast-backend", choices=["local", "redis"], default="local")
+    parser.add_argument("--mongo-url", help="Use this mongod instead of in-process mongomock")
+    parser.add_argument("--real-redis", action="store_true", help="Use the configured Redis instead of fakeredis")
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixture_path = os.path.abspath(args.fixture) if args.fixture else os.path.join(tmp_dir, "fixture.jsonl")
+        if not args.fixture:
+            write_synthetic_fixture(fixture_path, args.reply_chars)
+        server = start_server(args, fixture_path)
+        try:
+            results = asyncio.run(run(args))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+One-off migration from the Chat.messages link array to Message.chat_id:
+
+*   sets chat_id on every message linked from a chat (messages that already have one are left alone),
+*   sets the chat's last_message_id to its newest linked message if it has none yet,
+*   removes the messages array from the chat (unless --keep-links, e.g. to keep a rollback path).
+
+The (chat_id, created_at) index is created by Beanie on connect. Safe to re-run; run it right after
+deploying the chat_id release, since chats read their history by chat_id from then on.
+
+Run from backend/:  python -m migrations.message_chat_id [--dry-run] [--keep-links] [--batch-size N]
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, List
+
+from bson import DBRef
+
+from app.features.chat.models import Chat, Message
+from app.infrastructure.database.internal import init_db
+
+def linked_id(link: Any) -> Any:
+    """The message id of a stored link (a DBRef, or its plain-dict form)."""
+    if isinstance(link, DBRef):
+        return link.id
+    if isinstance(link, dict):
+        return link.get("$id", link.get("id"))
+    return link
+
+async def migrate(batch_size: int, dry_run: bool, keep_links: bool):
+    await init_db()
+    chats = Chat.get_motor_collection()
+    messages = Message.get_motor_collection()
+
+    start_time = time.time()
+    chats_seen = messages_updated = 0
+    async for chat in chats.find({"messages.0": {"$exists": True}}, projection={"messages": 1}):
+        chats_seen += 1
+        message_ids: List[Any] = [message_id for message_id in map(linked_id, chat["messages"]) if message_id is not None]
+        if dry_run:
+            messages_updated += await messages.count_documents({"_id": {"$in": message_ids}, "chat_id": None})
+            continue
+        for i in range(0, len(message_ids), batch_size):
+            result = await messages.update_many(
+                {"_id": {"$in": message_ids[i:i + batch_size]}, "chat_id": None},
+                {"$set": {"chat_id": chat["_id"]}}
+            )
+            messages_updated += result.modified_count
+        if message_ids:
+            await chats.update_one({"_id": chat["_id"], "last_message_id": None}, {"$set": {"last_message_id": message_ids[-1]}})
+        if not keep_links:
+            await chats.update_one({"_id": chat["_id"]}, {"$unset": {"messages": ""}})
+
+    if not dry_run and not keep_links:
+        await chats.update_many({"messages": {"$exists": True}}, {"$unset": {"messages": ""}}) # Empty arrays
+
+    unowned = await messages.count_documents({"chat_id": None})
+    verb = "would set" if dry_run else "set"
+    print(f"{chats_seen} chats with links: {verb} chat_id on {messages_updated} messages in {time.time() - start_time:.1f}s")
+    if unowned and not dry_run:
+        print(f"{unowned} messages have no chat_id (not linked from any chat)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Message ids per update_many")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the messages that would be updated")
+    parser.add_argument("--keep-links", action="store_true", help="Leave Chat.messages in place")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.dry_run, args.keep_links))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("module", ["app.agents", "app.agents.jonas_agent", "app.agents.shared", "app.infrastructure.database"])
+def test_module_imports_on_its_own(module):
+    """Each entry point imports in a fresh interpreter, without app.main having resolved the cycles first."""
+    result = subprocess.run([sys.executable, "-c", f"import {module}"], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
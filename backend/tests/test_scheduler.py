@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from app.infrastructure.turns.scheduler import ResourcePool
+
+def test_cancelled_waiter_is_skipped_when_a_slot_is_released():
+    """A queued acquirer cancelled before its task resumes must not be granted the freed slot."""
+    async def scenario():
+        pool = ResourcePool("llm", global_limit=1, per_user_limit=1)
+        await pool.acquire("a")
+        queued_b = asyncio.create_task(pool.acquire("b"))
+        queued_c = asyncio.create_task(pool.acquire("c"))
+        await asyncio.sleep(0) # Both are now waiting in the queue
+
+        queued_b.cancel()
+        pool.release("a") # Runs before queued_b resumes to handle its cancellation
+
+        with pytest.raises(asyncio.CancelledError):
+            await queued_b
+        await queued_c
+
+        stats = pool.stats()
+        assert stats["active"] == 1
+        assert stats["queued"] == 0
+        pool.release("c")
+        assert pool.stats()["active"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,13 @@
+import pytest
+
+from app.features.chat.models import Message
+from app.infrastructure.database.internal.write_behind import WriteBehindQueue
+
+def test_queued_updates_must_be_safe_to_retry():
+    """A retried batch re-sends every update in it, so non-idempotent operators are refused up front."""
+    queue = WriteBehindQueue(max_batch_size=10)
+    with pytest.raises(ValueError):
+        queue.update("chat", Message, {"_id": 1}, {"$set": {"status": "complete"}, "$inc": {"edits": 1}})
+    with pytest.raises(ValueError):
+        queue.update("chat", Message, {"_id": 1}, {"$push": {"tags": "x"}})
+    assert queue.writes_queued == 0
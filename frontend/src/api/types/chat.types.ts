@@ -25,6 +25,7 @@ export interface Message {
   created_at: string; // ISO 8601 format string
   type: 'text' | 'thinking' | 'tool_use' | 'error' | 'action';
   tool_name?: string;
+  status?: 'streaming' | 'complete' | 'aborted'; // Agent messages: partial content is checkpointed while streaming
   isTemporary?: boolean;
   sendError?: boolean;
   isStreaming?: boolean;
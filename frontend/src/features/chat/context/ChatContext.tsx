@@ -90,6 +90,7 @@ export const ChatProvider: React.FC<ChatProviderProps> = ({ children }) => {
   } = useChatWebSocket({
       selectedChatId,
       setMessageData,
+      onResyncRequired: refreshMessages,
   });
 
   // --- Actions managed by Context ---
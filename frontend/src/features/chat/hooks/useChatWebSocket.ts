@@ -18,6 +18,8 @@ interface UseChatWebSocketProps {
     // Make this optional again
     setChatListData?: React.Dispatch<React.SetStateAction<PaginatedResponseData<Chat> | null>>;
     setMessageData: React.Dispatch<React.SetStateAction<PaginatedResponseData<Message> | null>>;
+    // Called when the server can no longer replay the frames missed while disconnected
+    onResyncRequired?: (chatId: string) => void;
     // Optional: Original options can still be passed if needed elsewhere
     options?: WebSocketHookOptions; 
 }
@@ -28,6 +30,7 @@ export const useChatWebSocket = ({
     selectedChatId,
     setChatListData,
     setMessageData,
+    onResyncRequired,
     options 
 }: UseChatWebSocketProps) => {
     const ws = useRef<WebSocket | null>(null);
@@ -38,10 +41,14 @@ export const useChatWebSocket = ({
     const maxReconnectAttempts = 5;
     const isConnecting = useRef(false); // Track connection attempts
     const connectionPromise = useRef<Promise<WebSocket> | null>(null); // Store the pending connection promise
+    const lastSeq = useRef<number | null>(null); // Last event seq seen for the selected chat, sent on reconnect for replay
+    const lastEpoch = useRef<string | null>(null); // Server event log epoch lastSeq belongs to; seqs restart when it changes
 
 
     const [sendingMessage, setSendingMessage] = useState<boolean>(false);
     const [sendMessageError, setSendMessageError] = useState<ApiError | null>(null);
+    // Where the agent turn waits for capacity on the server; null once it is running
+    const [queuePosition, setQueuePosition] = useState<{ resource: string; position: number } | null>(null);
 
     const handleInternalMessage = useCallback((message: Message) => {
         setMessageData(prevData => {
@@ -163,7 +170,10 @@ export const useChatWebSocket = ({
                  return;
             }
             const wsBaseUrl = config.API_URL.replace(/^http/, 'ws');
-            const wsUrl = `${wsBaseUrl}/chats/ws/${selectedChatId}?token=${encodeURIComponent(token)}`;
+            const replayParam = lastSeq.current !== null
+                ? `&last_seq=${lastSeq.current}${lastEpoch.current ? `&epoch=${encodeURIComponent(lastEpoch.current)}` : ''}`
+                : '';
+            const wsUrl = `${wsBaseUrl}/chats/ws/${selectedChatId}?token=${encodeURIComponent(token)}${replayParam}`;
 
             try {
                 const currentWs = new WebSocket(wsUrl);
@@ -196,6 +206,27 @@ export const useChatWebSocket = ({
                         const rawData = event.data;
                         const messageData = JSON.parse(rawData);
 
+                        if (messageData.type === "RESYNC_REQUIRED") {
+                            // Missed frames are no longer available: reload from REST and continue from the server's position
+                            lastSeq.current = typeof messageData.seq === 'number' ? messageData.seq : null;
+                            lastEpoch.current = messageData.epoch ?? null;
+                            onResyncRequired?.(selectedChatId);
+                            return;
+                        }
+
+                        // --- Track event sequence (skip anything already applied) ---
+                        if (typeof messageData.seq === 'number') {
+                            if (messageData.epoch && messageData.epoch !== lastEpoch.current) {
+                                // The server's log started over; its seqs restart from 1
+                                lastEpoch.current = messageData.epoch;
+                                lastSeq.current = null;
+                            }
+                            if (lastSeq.current !== null && messageData.seq <= lastSeq.current) {
+                                return;
+                            }
+                            lastSeq.current = messageData.seq;
+                        }
+
                         // --- Handle Different Message Types ---
                         if (messageData.type === "MESSAGE_UPDATE") {
                             // Handle incoming chunk: Find message and append content
@@ -215,6 +246,21 @@ export const useChatWebSocket = ({
                                     ),
                                 };
                             });
+                        } else if (messageData.type === "QUEUE_POSITION") {
+                            const { resource, position } = messageData;
+                            setQueuePosition(position > 0 ? { resource, position } : null);
+                        } else if (messageData.type === "TURN_CANCELLED") {
+                            setQueuePosition(null);
+                            // Agent turn was stopped: settle anything still streaming and drop placeholders
+                            setMessageData(prevData => {
+                                if (!prevData) return prevData;
+                                return {
+                                    ...prevData,
+                                    items: prevData.items
+                                        .filter(msg => msg.type !== 'thinking')
+                                        .map(msg => msg.isStreaming ? { ...msg, isStreaming: false, status: 'aborted' } : msg),
+                                };
+                            });
                         } else if (messageData.type === "STREAM_END") {
                             // Handle stream end: Find message and mark as not streaming
                             const { message_id } = messageData;
@@ -224,7 +270,7 @@ export const useChatWebSocket = ({
                                     ...prevData,
                                     items: prevData.items.map(msg =>
                                         msg._id === message_id
-                                            ? { ...msg, isStreaming: false }
+                                            ? { ...msg, isStreaming: false, status: 'complete' }
                                             : msg
                                     ),
                                 };
@@ -278,7 +324,7 @@ export const useChatWebSocket = ({
 
         return connectionPromise.current;
 
-    }, [selectedChatId, handleInternalMessage]); // Dependencies for connect
+    }, [selectedChatId, handleInternalMessage, onResyncRequired]); // Dependencies for connect
 
     const disconnect = useCallback(() => {
         const socketToClose = ws.current; // Capture the current socket
@@ -307,6 +353,8 @@ export const useChatWebSocket = ({
 
     // --- Effect for managing connection based on selectedChatId ---
     useEffect(() => {
+        lastSeq.current = null; // Sequences are per chat
+        lastEpoch.current = null;
         if (selectedChatId) {
             // Don't auto-connect here if we want sendChatMessage to trigger it
             // connect().catch(err => console.error("Initial connection failed:", err));
@@ -387,12 +435,24 @@ export const useChatWebSocket = ({
         }
     }, [connect]); // Dependency on the new connect function
 
+    // Asks the server to stop the agent turn running in this chat
+    const cancelAgentResponse = useCallback((): boolean => {
+        const currentWs = ws.current;
+        if (!currentWs || currentWs.readyState !== WebSocket.OPEN) {
+            return false;
+        }
+        currentWs.send(JSON.stringify({ type: 'cancel' }));
+        return true;
+    }, []);
+
     return {
         ws, // Note: ws.current might be null initially or after disconnect
         isConnected,
         connectionError,
         parseError,
         sendChatMessage, 
+        cancelAgentResponse,
+        queuePosition,
         sendingMessage,
         sendMessageError,
     };